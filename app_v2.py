@@ -4,10 +4,12 @@ Complete Glassmorphism Cyber Theme Redesign with Advanced Features
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from functools import partial
 import time
 
 # Import custom modules
@@ -22,21 +24,37 @@ try:
     
     from modules_v2.data_loader_v2 import (
         load_data, get_data_summary, get_attack_statistics,
-        get_real_time_metrics, filter_data, get_top_threats
+        get_real_time_metrics, filter_data, get_top_threats,
+        load_metadata_catalog, load_row_index, catalog_domain,
+        load_quantile_sketches, get_percentile_breakdown, load_time_rollups, get_attack_trend
     )
     from modules_v2.advanced_visuals import (
-        create_3d_globe, create_animated_timeline, create_sunburst_chart,
+        create_3d_globe, create_animated_timeline, create_attack_trend, create_sunburst_chart,
         create_3d_scatter, create_radar_chart, create_heatmap_calendar,
         create_gauge_chart, create_treemap, create_sankey_flow, create_waterfall_chart,
         create_mitigation_chart
     )
     from modules_v2.live_feed import (
-        create_top_attacks, create_attack_ticker, create_status_board
+        create_top_attacks, create_attack_ticker, create_status_board, render_live_feed
+    )
+    from modules_v2.render_cache import cached_figure
+    from modules_v2.chart_utils import ATTACK_TREND_BUCKETS
+    from modules_v2.category_ops import (
+        category_contains, category_contains_any, mapped_value_counts
+    )
+    from modules_v2.export import (
+        EXPORT_FORMATS, available_formats, export_file, export_file_name
     )
 except Exception as e:
     st.error(f"❌ Module Import Error: {e}")
     st.stop()
 
+# SLA measures shown as p50/p95/p99 (label -> column)
+SLA_MEASURES = {
+    'Response time (min)': 'response_time_min',
+    'Attack duration (min)': 'attack_duration_min',
+}
+
 # Page configuration
 st.set_page_config(
     page_title="DarkSentinel V2 | Cyber Command Center",
@@ -58,253 +76,183 @@ if 'fullscreen_chart' not in st.session_state:
 if 'filters_applied' not in st.session_state:
     st.session_state.filters_applied = False
 
-# Load data
-@st.cache_data(ttl=3600)
-def load_and_cache_data():
-    return load_data()
-
-# Main app
-def main():
-    # Header
-    st.markdown(create_header(
-        "DARKSENTINEL V2",
-        "CYBER COMMAND CENTER | REAL-TIME THREAT INTELLIGENCE"
-    ), unsafe_allow_html=True)
+@cached_figure
+def render_top_locations(top_locations):
+    """Horizontal bar chart of the top attack locations"""
+    
+    # Create custom colors for the top 3 locations
+    colors = []
+    for i in range(len(top_locations)):
+        if i == 0:
+            colors.append(COLORS['pink'])  # 1st place
+        elif i == 1:
+            colors.append(COLORS['purple'])  # 2nd place
+        elif i == 2:
+            colors.append(COLORS['cyan'])  # 3rd place
+        else:
+            colors.append(COLORS['text_secondary'])  # Other locations
+    
+    fig_loc = go.Figure(go.Bar(
+        x=top_locations.values,
+        y=top_locations.index,
+        orientation='h',
+        marker=dict(
+            color=colors,
+            line=dict(color=COLORS['cyan'], width=1)
+        ),
+        text=top_locations.values,
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Total Attacks: %{x:,d}<extra></extra>'
+    ))
+    
+    fig_loc.update_layout(
+        title=dict(
+            text='🗺️ Top Attack Locations',
+            font=dict(size=20, color=COLORS['cyan']),
+            x=0.5,
+            xanchor='center'
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255, 255, 255, 0.03)',
+        font=dict(color=TEXT_COLOR),
+        showlegend=False,
+        height=600,
+        xaxis=dict(
+            title='Number of Attacks',
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            showgrid=True
+        ),
+        yaxis=dict(
+            title='',
+            autorange='reversed'  # Highest on top
+        ),
+        margin=dict(l=0, r=0, t=40, b=20)
+    )
     
-    # Load data
-    df = load_and_cache_data()
+    return fig_loc
 
-    # Data preview removed per user request
-    
-    # Notification removed per user request
-    
-    # Sidebar - Advanced Filters
-    with st.sidebar:
-        st.markdown(f"""
-        <div style="text-align: center; padding: 20px;">
-            <h2 style="color: {COLORS['cyan']};">⚙️ CONTROL PANEL</h2>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("---")
-        
-        # Time period filter
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>📅 TIME PERIOD</p>", unsafe_allow_html=True)
-        
-        # Preset time ranges
-        time_preset = st.selectbox(
-            "Quick Select",
-            options=['All Time', 'Past 2 Weeks', 'Past Month', 'Past 6 Months', 'Past Year', 'Custom Year Range'],
-            index=0,
-            label_visibility="collapsed",
-            key="time_preset_selector"
-        )
-        
-        # Store previous selection to detect changes
-        if 'prev_time_preset' not in st.session_state:
-            st.session_state.prev_time_preset = 'All Time'
-        
-        # Auto-apply if preset changed (data will auto-refresh)
-        if time_preset != st.session_state.prev_time_preset:
-            st.session_state.prev_time_preset = time_preset
-            # Only auto-rerun for non-custom ranges
-            if time_preset != 'Custom Year Range':
-                st.rerun()
-        
-        # Calculate date range based on preset
-        max_date = df['timestamp'].max()
-        min_date = df['timestamp'].min()
-        
-        if time_preset == 'Past 2 Weeks':
-            start_date = (max_date - pd.Timedelta(days=14)).date()
-            end_date = max_date.date()
-        elif time_preset == 'Past Month':
-            start_date = (max_date - pd.Timedelta(days=30)).date()
-            end_date = max_date.date()
-        elif time_preset == 'Past 6 Months':
-            start_date = (max_date - pd.Timedelta(days=180)).date()
-            end_date = max_date.date()
-        elif time_preset == 'Past Year':
-            start_date = (max_date - pd.Timedelta(days=365)).date()
-            end_date = max_date.date()
-        elif time_preset == 'Custom Year Range':
-            # Year range selector
-            min_year = min_date.year
-            max_year = max_date.year
-            col_y1, col_y2 = st.columns(2)
-            with col_y1:
-                start_year = st.selectbox("From", range(min_year, max_year + 1), index=0, key="start_year")
-            with col_y2:
-                end_year = st.selectbox("To", range(min_year, max_year + 1), index=max_year - min_year, key="end_year")
-            start_date = pd.Timestamp(year=start_year, month=1, day=1).date()
-            end_date = pd.Timestamp(year=end_year, month=12, day=31).date()
-        else:  # All Time
-            start_date = min_date.date()
-            end_date = max_date.date()
-        
-        date_range = (start_date, end_date)
-        
-        st.markdown("---")
-        
-        # Attack type filter
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>⚠️ ATTACK TYPES</p>", unsafe_allow_html=True)
-        attack_types = st.multiselect(
-            "Select attack types",
-            options=sorted(df['attack_type'].unique()),
-            default=sorted(df['attack_type'].unique()),
-            label_visibility="collapsed"
-        )
-        
-        # Target system filter
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🎯 TARGET SYSTEMS</p>", unsafe_allow_html=True)
-        target_systems = st.multiselect(
-            "Select target systems",
-            options=sorted(df['target_system'].unique()),
-            default=sorted(df['target_system'].unique()),
-            label_visibility="collapsed"
-        )
-        
-        # Location filter
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🌍 LOCATIONS</p>", unsafe_allow_html=True)
-        locations = st.multiselect(
-            "Select locations",
-            options=sorted(df['location'].unique()),
-            default=sorted(df['location'].unique()),
-            label_visibility="collapsed"
-        )
-        
-        # Industry filter
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🏢 INDUSTRIES</p>", unsafe_allow_html=True)
-        industries = st.multiselect(
-            "Select industries",
-            options=sorted(df['industry'].unique()),
-            default=sorted(df['industry'].unique()),
-            label_visibility="collapsed"
-        )
-        
-        # Severity range
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🚨 SEVERITY RANGE</p>", unsafe_allow_html=True)
-        severity_range = st.slider(
-            "Select severity",
-            min_value=1,
-            max_value=10,
-            value=(1, 10),
-            label_visibility="collapsed"
-        )
-        
-        # Outcome filter
-        st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>📊 OUTCOME</p>", unsafe_allow_html=True)
-        outcomes = st.multiselect(
-            "Select outcomes",
-            options=sorted(df['outcome'].unique()),
-            default=sorted(df['outcome'].unique()),
-            label_visibility="collapsed"
-        )
-        
-        st.markdown("---")
-        
-        # Apply filters button
-        if st.button("🔍 APPLY FILTERS", use_container_width=True):
-            st.session_state.show_notifications = True
-            st.session_state.filters_applied = True
-            st.rerun()
-        
-        # Reset filters button
-        if st.button("🔄 RESET ALL", use_container_width=True):
-            st.session_state.filters_applied = False
-            st.rerun()
-    
-    # Apply filters
-    # Ensure date_range is a tuple with both values
-    valid_date_range = None
-    if isinstance(date_range, tuple) and len(date_range) == 2:
-        if date_range[0] is not None and date_range[1] is not None:
-            valid_date_range = date_range
-    
-    filters = {
-        'date_range': valid_date_range,
-        'attack_types': attack_types,
-        'target_systems': target_systems,
-        'locations': locations,
-        'industries': industries,
-        'severity_range': severity_range,
-        'outcomes': outcomes
-    }
-    
-    filtered_df = filter_data(df, filters)
-    
-    # Display filter info
-    st.sidebar.markdown(f"""
-    <div style="
-        background: rgba(0, 245, 255, 0.1);
-        border: 1px solid {COLORS['cyan']};
-        border-radius: 10px;
-        padding: 15px;
-        margin-top: 20px;
-        text-align: center;
-    ">
-        <div style="color: {COLORS['cyan']}; font-size: 14px; font-weight: 600;">
-            FILTERED RECORDS
-        </div>
-        <div style="color: white; font-size: 28px; font-weight: bold; margin-top: 5px;">
-            {len(filtered_df):,}
-        </div>
-        <div style="color: {TEXT_COLOR}; font-size: 12px; margin-top: 5px;">
-            of {len(df):,} total
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Main content area
-    
-    # Critical Alerts Ticker
-    st.markdown(create_attack_ticker(filtered_df, n_items=10), unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
+@cached_figure
+def render_time_periods(period_data, period_order):
+    """Bar chart of attacks per time-of-day period"""
+    
+    # Find peak period
+    peak_period = period_data.idxmax()
+    peak_count = period_data.max()
+    
+    # Create color gradient
+    colors_periods = [COLORS['pink'] if period == peak_period else COLORS['cyan'] for period in period_order]
+    
+    fig_period = go.Figure(go.Bar(
+        x=period_order,
+        y=period_data.values,
+        marker=dict(
+            color=colors_periods,
+            line=dict(color=COLORS['cyan'], width=2)
+        ),
+        text=period_data.values,
+        textposition='outside',
+        hovertemplate='<b>%{x}</b><br>Attacks: %{y}<extra></extra>'
+    ))
+    
+    fig_period.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255, 255, 255, 0.03)',
+        font=dict(color=TEXT_COLOR),
+        title=dict(
+            text=f'🕐 Attack Distribution by Time<br><sub>Peak Period: {peak_period.split(chr(10))[0]} with {peak_count} attacks</sub>',
+            font=dict(size=16, color=COLORS['cyan'])
+        ),
+        xaxis=dict(
+            title='',
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        ),
+        yaxis=dict(
+            title='Number of Attacks',
+            gridcolor='rgba(255, 255, 255, 0.1)'
+        ),
+        showlegend=False,
+        height=450
+    )
     
-    # Real-time Status Board and Live Feed
-    # Top attacks display (full width, system status removed per user request)
-    st.markdown(create_top_attacks(filtered_df, n=10), unsafe_allow_html=True)
+    return fig_period
+
+@cached_figure
+def render_sla_percentiles(breakdown, category_label, measure_label):
+    """Grouped p50/p95/p99 bars per category, slowest p95 first"""
+    
+    breakdown = breakdown.sort_values('p95', ascending=False)
+    fig_sla = go.Figure()
+    for column, color in [('p50', COLORS['cyan']), ('p95', COLORS['purple']), ('p99', COLORS['pink'])]:
+        fig_sla.add_trace(go.Bar(
+            x=breakdown.iloc[:, 0].astype(str),
+            y=breakdown[column],
+            name=column.upper(),
+            marker=dict(color=color),
+            customdata=breakdown['count'],
+            hovertemplate=f'<b>%{{x}}</b><br>{column.upper()}: %{{y:,.1f}}<br>Attacks: %{{customdata:,d}}<extra></extra>'
+        ))
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    fig_sla.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255, 255, 255, 0.03)',
+        font=dict(color=TEXT_COLOR),
+        title=dict(
+            text=f'{measure_label} by {category_label}',
+            font=dict(size=16, color=COLORS['cyan'])
+        ),
+        barmode='group',
+        xaxis=dict(title='', gridcolor='rgba(255, 255, 255, 0.1)'),
+        yaxis=dict(title=measure_label, gridcolor='rgba(255, 255, 255, 0.1)'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        height=420
+    )
     
-    # Key Metrics Dashboard
+    return fig_sla
+
+# Dashboard sections
+# Each section receives only the data it depends on. Sections with their own
+# widgets are fragments, so those widgets rerun just that section; applying
+# the sidebar filters reruns the whole script and every section.
+
+@st.fragment
+def render_live_feed_section(filtered_df, filters):
+    """Paged live feed; its navigation buttons rerun only this fragment"""
+    with st.expander("🖥️ LIVE ATTACK FEED", expanded=False):
+        render_live_feed(filtered_df, signature=filters)
+
+def render_metrics_section(filtered_df):
+    """Command center metric cards (depends on the filtered rows)"""
     st.markdown(create_section_header("📊 COMMAND CENTER METRICS", ""), unsafe_allow_html=True)
     
     # Calculate metrics with robust error handling
     total_attacks = len(filtered_df)
     
-    # Convert severity to numeric FIRST - this is crucial
-    filtered_df_copy = filtered_df.copy()
-    filtered_df_copy['severity_num'] = pd.to_numeric(filtered_df_copy['attack_severity'], errors='coerce')
-    
-    # Fill NaN with 5 and ensure numeric type
-    filtered_df_copy['severity_num'] = filtered_df_copy['severity_num'].fillna(5).astype(float)
+    # Metrics come straight from column arrays; the filtered frame is never copied or extended
+    # Convert severity to numeric FIRST (NaN counts as 5) - this is crucial
+    severity_num = pd.to_numeric(filtered_df['attack_severity'], errors='coerce').to_numpy(dtype=float, na_value=5.0)
     
     # Critical attacks - count severity >= 8
     # If no attacks >= 8, show top 20% as critical based on severity
-    critical_attacks = int((filtered_df_copy['severity_num'] >= 8).sum())
+    critical_attacks = int(np.count_nonzero(severity_num >= 8))
     if critical_attacks == 0:
         # Show top 20% of attacks by severity as critical
-        threshold = filtered_df_copy['severity_num'].quantile(0.80)
-        critical_attacks = int((filtered_df_copy['severity_num'] >= threshold).sum())
+        threshold = np.quantile(severity_num, 0.80) if total_attacks > 0 else np.inf
+        critical_attacks = int(np.count_nonzero(severity_num >= threshold))
     
     # Average severity
-    avg_severity = float(filtered_df_copy['severity_num'].mean())
+    avg_severity = float(severity_num.mean()) if total_attacks > 0 else float('nan')
     
     # Convert data loss to numeric
-    filtered_df_copy['data_loss_num'] = pd.to_numeric(filtered_df_copy['data_compromised_GB'], errors='coerce').fillna(0)
-    total_data_loss = float(filtered_df_copy['data_loss_num'].sum())
+    data_loss_num = pd.to_numeric(filtered_df['data_compromised_GB'], errors='coerce').to_numpy(dtype=float, na_value=0.0)
+    total_data_loss = float(data_loss_num.sum())
     
     # Calculate mitigation rate from outcomes
     defensive_keywords = ['block', 'quarantine', 'prevent', 'stop', 'resolve', 'mitigat', 'logged']
-    defensive_count = filtered_df_copy['outcome'].astype(str).str.lower().apply(
-        lambda x: any(keyword in x for keyword in defensive_keywords)
-    ).sum()
+    defensive_count = category_contains_any(filtered_df['outcome'], defensive_keywords).sum()
     
     # Fallback: use low data loss as proxy for mitigation
     if defensive_count == 0:
-        defensive_count = (filtered_df_copy['data_loss_num'] < 10).sum()
+        defensive_count = np.count_nonzero(data_loss_num < 10)
     
     mitigation_rate = (defensive_count / total_attacks * 100) if total_attacks > 0 else 0
     # removed avg_response_time and unique_attackers per user request
@@ -370,10 +318,32 @@ def main():
         ), unsafe_allow_html=True)
     
     st.markdown("<br><br>", unsafe_allow_html=True)
+
+@st.fragment
+def render_sla_section(filtered_df, filters, catalog):
+    """SLA percentiles per industry and attack type; the measure selector reruns only this fragment"""
+    measure_label = st.radio(
+        "Measure",
+        list(SLA_MEASURES),
+        horizontal=True,
+        key="sla_measure"
+    )
+    measure = SLA_MEASURES[measure_label]
+    sketches = load_quantile_sketches()
     
-    # Main Visualizations
-    st.markdown(create_section_header("🌐 GLOBAL THREAT INTELLIGENCE", ""), unsafe_allow_html=True)
-    
+    col1, col2 = st.columns(2)
+    for col, by, category_label in [(col1, 'industry', 'Industry'), (col2, 'attack_type', 'Attack Type')]:
+        # Merged from the per-month sketches; exact only for filters they are not keyed by
+        breakdown = get_percentile_breakdown(filtered_df, filters, sketches, measure, by=by, catalog=catalog)
+        with col:
+            if len(breakdown):
+                fig_sla = render_sla_percentiles(breakdown, category_label, measure_label)
+                st.plotly_chart(fig_sla, width='stretch', key=f"sla_{by}")
+            else:
+                st.info("No attacks match the current filters")
+
+def render_global_threat_section(filtered_df):
+    """Globe and top locations (depends on the filtered rows)"""
     # 3D Globe
     col1, col2 = st.columns([2, 1])
     
@@ -386,61 +356,12 @@ def main():
         # Top locations - dynamic based on filtered data
         top_locations = filtered_df['location'].value_counts().head(10)
         
-        # Create custom colors for the top 3 locations
-        colors = []
-        for i in range(len(top_locations)):
-            if i == 0:
-                colors.append(COLORS['pink'])  # 1st place
-            elif i == 1:
-                colors.append(COLORS['purple'])  # 2nd place
-            elif i == 2:
-                colors.append(COLORS['cyan'])  # 3rd place
-            else:
-                colors.append(COLORS['text_secondary'])  # Other locations
-        
-        fig_loc = go.Figure(go.Bar(
-            x=top_locations.values,
-            y=top_locations.index,
-            orientation='h',
-            marker=dict(
-                color=colors,
-                line=dict(color=COLORS['cyan'], width=1)
-            ),
-            text=top_locations.values,
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Total Attacks: %{x:,d}<extra></extra>'
-        ))
-        
-        fig_loc.update_layout(
-            title=dict(
-                text='🗺️ Top Attack Locations',
-                font=dict(size=20, color=COLORS['cyan']),
-                x=0.5,
-                xanchor='center'
-            ),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(255, 255, 255, 0.03)',
-            font=dict(color=TEXT_COLOR),
-            showlegend=False,
-            height=600,
-            xaxis=dict(
-                title='Number of Attacks',
-                gridcolor='rgba(255, 255, 255, 0.1)',
-                showgrid=True
-            ),
-            yaxis=dict(
-                title='',
-                autorange='reversed'  # Highest on top
-            ),
-            margin=dict(l=0, r=0, t=40, b=20)
-        )
+        fig_loc = render_top_locations(top_locations)
         st.plotly_chart(fig_loc, width='stretch', key="top_locations")
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Attack Analysis Section
-    st.markdown(create_section_header("📈 ATTACK PATTERN ANALYSIS", ""), unsafe_allow_html=True)
-    
+
+@st.fragment
+def render_attack_pattern_section(filtered_df, catalog, industries):
+    """Sunburst and treemap; the drill-down selectbox reruns only this fragment"""
     # Create columns for the charts
     col1, col2 = st.columns(2)
     
@@ -448,7 +369,16 @@ def main():
         # Sunburst chart in a glass card
         st.markdown("<div class='glass-card' style='padding: 15px; height: 100%;'>", unsafe_allow_html=True)
         st.markdown("<h3 style='color: " + COLORS['cyan'] + "; text-align: center;'>🌐 Attack Distribution</h3>", unsafe_allow_html=True)
-        fig_sunburst = create_sunburst_chart(filtered_df)
+        drill_industry = st.selectbox(
+            "Drill into industry",
+            ['All'] + [i for i in catalog_domain(catalog, 'industry') if not industries or i in industries],
+            key="sunburst_drill"
+        )
+        if drill_industry == 'All':
+            # Target systems are only built once an industry is drilled into
+            fig_sunburst = create_sunburst_chart(filtered_df, max_depth=2)
+        else:
+            fig_sunburst = create_sunburst_chart(filtered_df, focus={'industry': drill_industry})
         st.plotly_chart(fig_sunburst, width='stretch', key="sunburst_chart")
         st.markdown("</div>", unsafe_allow_html=True)
     
@@ -459,19 +389,32 @@ def main():
         fig_treemap = create_treemap(filtered_df)
         st.plotly_chart(fig_treemap, width='stretch', key="treemap")
         st.markdown("</div>", unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # 3D Scatter Analysis
-    st.markdown(create_section_header("🔮 3D ATTACK CORRELATION", ""), unsafe_allow_html=True)
-    fig_3d = create_3d_scatter(filtered_df)
+
+@st.fragment
+def render_correlation_section(filtered_df, filters, catalog):
+    """3D correlation; the sample/density toggle reruns only this fragment"""
+    scatter_mode = st.radio(
+        "View",
+        ["Sample", "Density"],
+        horizontal=True,
+        key="scatter_mode",
+        help="Density bins every filtered attack on a fixed grid instead of sampling"
+    )
+    if scatter_mode == "Density":
+        # Fixed grid from the catalog extents, so cells do not move with the filters
+        density_ranges = [
+            (catalog['columns'][col]['min'], catalog['columns'][col]['max'])
+            for col in ['attack_duration_min', 'data_compromised_GB']
+        ]
+        fig_3d = create_3d_scatter(filtered_df, signature=filters, mode='density', ranges=density_ranges)
+        st.caption("Density shows attack duration × data compromised for every filtered attack; "
+                   "the severity axis of the 3D view is not shown")
+    else:
+        fig_3d = create_3d_scatter(filtered_df, signature=filters)
     st.plotly_chart(fig_3d, width='stretch', key="3d_scatter")
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Security Posture
-    st.markdown(create_section_header("🛡️ SECURITY POSTURE ANALYSIS", ""), unsafe_allow_html=True)
-    
+
+def render_security_posture_section(filtered_df):
+    """Mitigation and waterfall charts (depends on the filtered rows)"""
     col1, col2 = st.columns(2)
     
     with col1:
@@ -481,11 +424,14 @@ def main():
     with col2:
         fig_waterfall = create_waterfall_chart(filtered_df)
         st.plotly_chart(fig_waterfall, width='stretch', key="waterfall_chart")
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Temporal Analysis
-    st.markdown(create_section_header("⏰ TEMPORAL ATTACK PATTERNS", ""), unsafe_allow_html=True)
+
+def render_temporal_section(filtered_df, filters, catalog):
+    """Attack trend, calendar heatmap and time-of-day periods (depends on the filtered rows)"""
+    # Window and attack types come from the shared rollups; other filters bucket the rows
+    resolution, timeline = get_attack_trend(filtered_df, filters, load_time_rollups(), catalog,
+                                            target_points=ATTACK_TREND_BUCKETS)
+    fig_trend = create_attack_trend(timeline, resolution)
+    st.plotly_chart(fig_trend, width='stretch', key="attack_trend_chart")
     
     col1, col2 = st.columns([2, 1])
     
@@ -506,65 +452,21 @@ def main():
             else:
                 return 'Evening\n(6PM-12AM)'
         
-        # Group by time period
-        filtered_df_copy = filtered_df.copy()
-        filtered_df_copy['time_period'] = filtered_df_copy['hour'].apply(get_time_period)
-        
+        # Group by time period (labels are computed once per distinct hour)
         period_order = ['Night\n(12AM-6AM)', 'Morning\n(6AM-12PM)', 'Afternoon\n(12PM-6PM)', 'Evening\n(6PM-12AM)']
-        period_data = filtered_df_copy['time_period'].value_counts().reindex(period_order, fill_value=0)
-        
-        # Find peak period
-        peak_period = period_data.idxmax()
-        peak_count = period_data.max()
-        
-        # Create color gradient
-        colors_periods = [COLORS['pink'] if period == peak_period else COLORS['cyan'] for period in period_order]
+        period_data = mapped_value_counts(filtered_df['hour'], get_time_period, order=period_order)
         
-        fig_period = go.Figure(go.Bar(
-            x=period_order,
-            y=period_data.values,
-            marker=dict(
-                color=colors_periods,
-                line=dict(color=COLORS['cyan'], width=2)
-            ),
-            text=period_data.values,
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Attacks: %{y}<extra></extra>'
-        ))
-        
-        fig_period.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(255, 255, 255, 0.03)',
-            font=dict(color=TEXT_COLOR),
-            title=dict(
-                text=f'🕐 Attack Distribution by Time<br><sub>Peak Period: {peak_period.split(chr(10))[0]} with {peak_count} attacks</sub>',
-                font=dict(size=16, color=COLORS['cyan'])
-            ),
-            xaxis=dict(
-                title='',
-                gridcolor='rgba(255, 255, 255, 0.1)'
-            ),
-            yaxis=dict(
-                title='Number of Attacks',
-                gridcolor='rgba(255, 255, 255, 0.1)'
-            ),
-            showlegend=False,
-            height=450
-        )
+        fig_period = render_time_periods(period_data, period_order)
         st.plotly_chart(fig_period, width='stretch', key="time_period_chart")
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Attack Flow
-    st.markdown(create_section_header("🔀 ATTACK FLOW DIAGRAM", ""), unsafe_allow_html=True)
+
+def render_attack_flow_section(filtered_df):
+    """Sankey attack flow (depends on the filtered rows)"""
     fig_sankey = create_sankey_flow(filtered_df)
     st.plotly_chart(fig_sankey, width='stretch', key="sankey_chart")
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Data Explorer
-    st.markdown(create_section_header("🔍 THREAT INTELLIGENCE DATABASE", ""), unsafe_allow_html=True)
-    
+
+@st.fragment
+def render_explorer_section(filtered_df, catalog, attack_types):
+    """Searchable threat table; its search widgets rerun only this fragment"""
     # Search functionality
     col1, col2, col3 = st.columns(3)
     
@@ -574,7 +476,7 @@ def main():
     with col2:
         search_attack = st.selectbox(
             "⚠️ Filter by Attack Type",
-            ['All'] + sorted(filtered_df['attack_type'].unique().tolist())
+            ['All'] + [t for t in catalog_domain(catalog, 'attack_type') if not attack_types or t in attack_types]
         )
     
     with col3:
@@ -583,13 +485,13 @@ def main():
             ['All', 'Low (1-3)', 'Medium (4-6)', 'High (7-10)']
         )
     
-    # Apply search filters
-    display_df = filtered_df.copy()
+    # Apply search filters (each step selects rows into a new frame, so no copy is needed)
+    display_df = filtered_df
     
     if search_ip:
         display_df = display_df[
-            display_df['attacker_ip'].str.contains(search_ip, case=False) |
-            display_df['target_ip'].str.contains(search_ip, case=False)
+            category_contains(display_df['attacker_ip'], search_ip) |
+            category_contains(display_df['target_ip'], search_ip)
         ]
     
     if search_attack != 'All':
@@ -610,22 +512,305 @@ def main():
             'attacker_ip', 'target_ip', 'location', 'industry',
             'attack_severity', 'data_compromised_GB', 'mitigation_method'
         ]].head(100),
-        use_container_width=True,
+        width='stretch',
         height=400
     )
     
-    # Export functionality
-    col1, col2, col3 = st.columns([1, 1, 2])
+    # Export functionality (the file is only built when the button is clicked)
+    col1, col2, col3 = st.columns([1, 2, 1])
     
     with col1:
-        csv = display_df.to_csv(index=False).encode('utf-8')
+        export_format = st.selectbox("💾 Export Format", available_formats())
+    
+    with col2:
+        export_columns = st.multiselect(
+            "🧾 Export Columns",
+            list(display_df.columns),
+            default=list(display_df.columns)
+        )
+    
+    with col3:
         st.download_button(
-            label="📥 EXPORT TO CSV",
-            data=csv,
-            file_name=f"darksentinel_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            use_container_width=True
+            label=f"📥 EXPORT {len(display_df):,} ROWS",
+            data=partial(export_file, display_df, export_format, export_columns),
+            file_name=export_file_name('darksentinel_export', export_format),
+            mime=EXPORT_FORMATS[export_format][1],
+            on_click="ignore",
+            disabled=not export_columns,
+            width='stretch'
         )
+
+# Main app
+FILTER_WIDGET_KEYS = [
+    'time_preset_selector', 'start_year', 'end_year', 'filter_attack_types', 'filter_target_systems',
+    'filter_locations', 'filter_industries', 'filter_severity', 'filter_outcomes',
+]
+
+def reset_filters():
+    """Restore every sidebar filter to its default before the next run"""
+    for key in FILTER_WIDGET_KEYS:
+        st.session_state.pop(key, None)
+    st.session_state.filters_applied = False
+
+def main():
+    # Header
+    st.markdown(create_header(
+        "DARKSENTINEL V2",
+        "CYBER COMMAND CENTER | REAL-TIME THREAT INTELLIGENCE"
+    ), unsafe_allow_html=True)
+    
+    # Load data (one read-only frame, catalog, row index and sketch index
+    # shared by all sessions; df is a copy-on-write view of the shared frame)
+    df = load_data()
+    catalog = load_metadata_catalog()
+
+    # Data preview removed per user request
+    
+    # Notification removed per user request
+    
+    # Sidebar - Advanced Filters
+    with st.sidebar:
+        st.markdown(f"""
+        <div style="text-align: center; padding: 20px;">
+            <h2 style="color: {COLORS['cyan']};">⚙️ CONTROL PANEL</h2>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown("---")
+        
+        # Filter edits are staged in a form and applied together on submit,
+        # so the dashboard is recomputed once per apply, not once per widget
+        with st.form("filter_form", border=False):
+            # Time period filter
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>📅 TIME PERIOD</p>", unsafe_allow_html=True)
+            
+            # Preset time ranges
+            time_preset = st.selectbox(
+                "Quick Select",
+                options=['All Time', 'Past 2 Weeks', 'Past Month', 'Past 6 Months', 'Past Year', 'Custom Year Range'],
+                index=0,
+                label_visibility="collapsed",
+                key="time_preset_selector"
+            )
+            
+            # Calculate date range based on preset
+            max_date = catalog['columns']['timestamp']['max']
+            min_date = catalog['columns']['timestamp']['min']
+            
+            # Year range used by 'Custom Year Range'; always shown because widgets
+            # inside the form cannot appear or disappear before it is submitted
+            min_year = min_date.year
+            max_year = max_date.year
+            col_y1, col_y2 = st.columns(2)
+            with col_y1:
+                start_year = st.selectbox("From", range(min_year, max_year + 1), index=0, key="start_year")
+            with col_y2:
+                end_year = st.selectbox("To", range(min_year, max_year + 1), index=max_year - min_year, key="end_year")
+            
+            if time_preset == 'Past 2 Weeks':
+                start_date = (max_date - pd.Timedelta(days=14)).date()
+                end_date = max_date.date()
+            elif time_preset == 'Past Month':
+                start_date = (max_date - pd.Timedelta(days=30)).date()
+                end_date = max_date.date()
+            elif time_preset == 'Past 6 Months':
+                start_date = (max_date - pd.Timedelta(days=180)).date()
+                end_date = max_date.date()
+            elif time_preset == 'Past Year':
+                start_date = (max_date - pd.Timedelta(days=365)).date()
+                end_date = max_date.date()
+            elif time_preset == 'Custom Year Range':
+                start_date = pd.Timestamp(year=start_year, month=1, day=1).date()
+                end_date = pd.Timestamp(year=end_year, month=12, day=31).date()
+            else:  # All Time
+                start_date = min_date.date()
+                end_date = max_date.date()
+            
+            date_range = (start_date, end_date)
+            
+            st.markdown("---")
+            
+            # Attack type filter
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>⚠️ ATTACK TYPES</p>", unsafe_allow_html=True)
+            attack_types = st.multiselect(
+                "Select attack types",
+                options=catalog_domain(catalog, 'attack_type'),
+                default=catalog_domain(catalog, 'attack_type'),
+                label_visibility="collapsed",
+                key="filter_attack_types"
+            )
+            
+            # Target system filter
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🎯 TARGET SYSTEMS</p>", unsafe_allow_html=True)
+            target_systems = st.multiselect(
+                "Select target systems",
+                options=catalog_domain(catalog, 'target_system'),
+                default=catalog_domain(catalog, 'target_system'),
+                label_visibility="collapsed",
+                key="filter_target_systems"
+            )
+            
+            # Location filter
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🌍 LOCATIONS</p>", unsafe_allow_html=True)
+            locations = st.multiselect(
+                "Select locations",
+                options=catalog_domain(catalog, 'location'),
+                default=catalog_domain(catalog, 'location'),
+                label_visibility="collapsed",
+                key="filter_locations"
+            )
+            
+            # Industry filter
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🏢 INDUSTRIES</p>", unsafe_allow_html=True)
+            industries = st.multiselect(
+                "Select industries",
+                options=catalog_domain(catalog, 'industry'),
+                default=catalog_domain(catalog, 'industry'),
+                label_visibility="collapsed",
+                key="filter_industries"
+            )
+            
+            # Severity range
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>🚨 SEVERITY RANGE</p>", unsafe_allow_html=True)
+            severity_range = st.slider(
+                "Select severity",
+                min_value=1,
+                max_value=10,
+                value=(1, 10),
+                label_visibility="collapsed",
+                key="filter_severity"
+            )
+            
+            # Outcome filter
+            st.markdown(f"<p style='color: {COLORS['cyan']}; font-weight: 600;'>📊 OUTCOME</p>", unsafe_allow_html=True)
+            outcomes = st.multiselect(
+                "Select outcomes",
+                options=catalog_domain(catalog, 'outcome'),
+                default=catalog_domain(catalog, 'outcome'),
+                label_visibility="collapsed",
+                key="filter_outcomes"
+            )
+            
+            st.markdown("---")
+            
+            # Apply filters button (submitting the form is the only rerun)
+            if st.form_submit_button("🔍 APPLY FILTERS", width='stretch'):
+                st.session_state.show_notifications = True
+                st.session_state.filters_applied = True
+        
+        # Reset filters button
+        st.button("🔄 RESET ALL", width='stretch', on_click=reset_filters)
+    
+    # Apply filters
+    # Ensure date_range is a tuple with both values
+    valid_date_range = None
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        if date_range[0] is not None and date_range[1] is not None:
+            valid_date_range = date_range
+    
+    filters = {
+        'date_range': valid_date_range,
+        'attack_types': attack_types,
+        'target_systems': target_systems,
+        'locations': locations,
+        'industries': industries,
+        'severity_range': severity_range,
+        'outcomes': outcomes
+    }
+    
+    filtered_df = filter_data(df, filters, load_row_index())
+    
+    # Display filter info
+    st.sidebar.markdown(f"""
+    <div style="
+        background: rgba(0, 245, 255, 0.1);
+        border: 1px solid {COLORS['cyan']};
+        border-radius: 10px;
+        padding: 15px;
+        margin-top: 20px;
+        text-align: center;
+    ">
+        <div style="color: {COLORS['cyan']}; font-size: 14px; font-weight: 600;">
+            FILTERED RECORDS
+        </div>
+        <div style="color: white; font-size: 28px; font-weight: bold; margin-top: 5px;">
+            {len(filtered_df):,}
+        </div>
+        <div style="color: {TEXT_COLOR}; font-size: 12px; margin-top: 5px;">
+            of {catalog['row_count']:,} total
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Main content area
+    
+    # Critical Alerts Ticker
+    st.markdown(create_attack_ticker(filtered_df, n_items=10), unsafe_allow_html=True)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Real-time Status Board and Live Feed
+    # Top attacks display (full width, system status removed per user request)
+    st.markdown(create_top_attacks(filtered_df, n=10), unsafe_allow_html=True)
+    
+    # Paged terminal feed: only the visible page is rendered and sent
+    render_live_feed_section(filtered_df, filters)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Key Metrics Dashboard
+    render_metrics_section(filtered_df)
+    
+    # SLA Percentiles
+    st.markdown(create_section_header("⏱️ SLA PERCENTILES", ""), unsafe_allow_html=True)
+    render_sla_section(filtered_df, filters, catalog)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Main Visualizations
+    st.markdown(create_section_header("🌐 GLOBAL THREAT INTELLIGENCE", ""), unsafe_allow_html=True)
+    
+    render_global_threat_section(filtered_df)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Attack Analysis Section
+    st.markdown(create_section_header("📈 ATTACK PATTERN ANALYSIS", ""), unsafe_allow_html=True)
+    
+    render_attack_pattern_section(filtered_df, catalog, industries)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # 3D Scatter Analysis
+    st.markdown(create_section_header("🔮 3D ATTACK CORRELATION", ""), unsafe_allow_html=True)
+    render_correlation_section(filtered_df, filters, catalog)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Security Posture
+    st.markdown(create_section_header("🛡️ SECURITY POSTURE ANALYSIS", ""), unsafe_allow_html=True)
+    
+    render_security_posture_section(filtered_df)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Temporal Analysis
+    st.markdown(create_section_header("⏰ TEMPORAL ATTACK PATTERNS", ""), unsafe_allow_html=True)
+    
+    render_temporal_section(filtered_df, filters, catalog)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Attack Flow
+    st.markdown(create_section_header("🔀 ATTACK FLOW DIAGRAM", ""), unsafe_allow_html=True)
+    render_attack_flow_section(filtered_df)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Data Explorer
+    st.markdown(create_section_header("🔍 THREAT INTELLIGENCE DATABASE", ""), unsafe_allow_html=True)
+    
+    render_explorer_section(filtered_df, catalog, attack_types)
     
     # Footer
     st.markdown("<br><br>", unsafe_allow_html=True)
@@ -10,6 +10,16 @@ from . import advanced_visuals
 from . import visuals_global
 from . import live_feed
 from . import recent_attacks
+from . import category_ops
+from . import quantile_sketch
+from . import time_rollups
+from . import chart_utils
+from . import render_cache
+from . import sampling
+from . import density
+from . import gazetteer
+from . import html_rows
+from . import export
 
 __all__ = [
     'glassmorphism_theme', 
@@ -18,5 +28,15 @@ __all__ = [
     'advanced_visuals', 
     'visuals_global',
     'live_feed',
-    'recent_attacks'
+    'recent_attacks',
+    'category_ops',
+    'quantile_sketch',
+    'time_rollups',
+    'chart_utils',
+    'render_cache',
+    'sampling',
+    'density',
+    'gazetteer',
+    'html_rows',
+    'export'
 ]
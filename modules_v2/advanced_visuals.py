@@ -9,6 +9,17 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from .time_rollups import floor_timestamps, get_timeline, DEFAULT_TARGET_POINTS
+from .chart_utils import (
+    sankey_links, capped_codes, capped_hierarchy, hierarchy_nodes, compact_array, frame_buckets,
+    point_budget, area_marker, area_sizeref, downsample_indices, use_webgl,
+    MAX_HIERARCHY_CHILDREN, WEBGL_THRESHOLD
+)
+from .render_cache import cached_figure
+from .sampling import cached_stratified_sample
+from .density import cached_density_grid, density_heatmap
+from .gazetteer import geocode, unmatched_annotation
+
 # Glassmorphism Cyber Theme Colors
 COLORS = {
     'bg': '#050816',
@@ -20,29 +31,17 @@ COLORS = {
     'text': '#b8c5d6',
 }
 
-# Country coordinates for 3D globe
-COUNTRY_COORDS = {
-    'USA': {'lat': 37.0902, 'lon': -95.7129},
-    'UK': {'lat': 55.3781, 'lon': -3.4360},
-    'Germany': {'lat': 51.1657, 'lon': 10.4515},
-    'France': {'lat': 46.2276, 'lon': 2.2137},
-    'China': {'lat': 35.8617, 'lon': 104.1954},
-    'India': {'lat': 20.5937, 'lon': 78.9629},
-    'Brazil': {'lat': -14.2350, 'lon': -51.9253},
-    'Russia': {'lat': 61.5240, 'lon': 105.3188},
-    'Australia': {'lat': -25.2744, 'lon': 133.7751},
-    'Canada': {'lat': 56.1304, 'lon': -106.3468},
-    'Japan': {'lat': 36.2048, 'lon': 138.2529},
-    'South Korea': {'lat': 35.9078, 'lon': 127.7669},
-    'Mexico': {'lat': 23.6345, 'lon': -102.5528},
-    'Italy': {'lat': 41.8719, 'lon': 12.5674},
-    'Spain': {'lat': 40.4637, 'lon': -3.7492},
-    'Netherlands': {'lat': 52.1326, 'lon': 5.2913},
-    'Singapore': {'lat': 1.3521, 'lon': 103.8198},
-    'UAE': {'lat': 23.4241, 'lon': 53.8478},
-    'Vietnam': {'lat': 14.0583, 'lon': 108.2772},
-    'Viet Nam': {'lat': 14.0583, 'lon': 108.2772},  # Alternative spelling
-}
+# Columns the 3D scatter samples, and the ones it plots or shows on hover
+SCATTER_3D_SOURCE_COLUMNS = [
+    'attack_type', 'location', 'target_system', 'outcome',
+    'response_time_min', 'attack_duration_min', 'data_compromised_GB', 'attack_severity',
+]
+SCATTER_3D_COLUMNS = SCATTER_3D_SOURCE_COLUMNS + [
+    'duration_display', 'data_display', 'severity_display', 'marker_size',
+]
+
+# Upper bound on animation frames, whatever the date range
+MAX_ANIMATION_FRAMES = 60
 
 PLOTLY_TEMPLATE = {
     'layout': {
@@ -87,9 +86,18 @@ def create_3d_globe(df, title='🌍 Global Attack Distribution'):
     }).reset_index()
     location_data.columns = ['location', 'attack_count', 'total_data_loss', 'avg_severity']
     
-    # Add coordinates
-    location_data['lat'] = location_data['location'].map(lambda x: COUNTRY_COORDS.get(x, {}).get('lat', 0))
-    location_data['lon'] = location_data['location'].map(lambda x: COUNTRY_COORDS.get(x, {}).get('lon', 0))
+    # Coordinates joined once per distinct location; unplaceable ones are
+    # reported instead of being drawn at (0, 0)
+    coords = geocode(location_data['location'])
+    matched = coords['lat'].notna().to_numpy()
+    unmatched = location_data.loc[~matched, 'location'].astype(str).tolist()
+    location_data = location_data[matched].assign(lat=coords['lat'][matched], lon=coords['lon'][matched])
+    
+    return _render_3d_globe(location_data, unmatched, title)
+
+@cached_figure
+def _render_3d_globe(location_data, unmatched, title):
+    """Render the globe from per-location aggregates with coordinates"""
     
     # Calculate marker sizes - much smaller and more balanced
     min_size = 2  # Very small minimum size
@@ -105,24 +113,24 @@ def create_3d_globe(df, title='🌍 Global Attack Distribution'):
     
     # Create 3D scatter on globe
     fig = go.Figure(data=go.Scattergeo(
-        lon=location_data['lon'],
-        lat=location_data['lat'],
+        lon=compact_array(location_data['lon'].to_numpy()),
+        lat=compact_array(location_data['lat'].to_numpy()),
         text=location_data['location'],
         mode='markers',
         marker=dict(
-            size=marker_sizes,
+            size=compact_array(marker_sizes.to_numpy()),
             sizemode='diameter',
             sizeref=0.5,  # Increased sizeref to make all markers smaller
-            color=location_data['avg_severity'],
+            color=compact_array(location_data['avg_severity'].to_numpy()),
             colorscale=[[0, COLORS['green']], [0.5, COLORS['orange']], [1, COLORS['pink']]],
             colorbar=dict(title="Avg Severity", thickness=15),
             line=dict(width=1, color=COLORS['cyan']),
             showscale=True
         ),
-        customdata=location_data[['location', 'attack_count', 'avg_severity']],
-        hovertemplate='<b>%{customdata[0]}</b><br>' +
-                     'Total Attacks: %{customdata[1]:,d}<br>' +
-                     'Avg Severity: %{customdata[2]:.1f}<br>' +
+        customdata=compact_array(location_data[['attack_count', 'avg_severity']].to_numpy(dtype=float)),
+        hovertemplate='<b>%{text}</b><br>' +
+                     'Total Attacks: %{customdata[0]:,d}<br>' +
+                     'Avg Severity: %{customdata[1]:.1f}<br>' +
                      '<extra></extra>'
     ))
     
@@ -141,58 +149,294 @@ def create_3d_globe(df, title='🌍 Global Attack Distribution'):
     
     apply_theme(fig, title=title, height=600)
     fig.update_layout(margin=dict(l=0, r=0, t=50, b=0))
+    if unmatched:
+        fig.add_annotation(**unmatched_annotation(unmatched, COLORS['text']))
     
     return fig
 
-def create_animated_timeline(df, title='📈 Attack Timeline Animation'):
-    """Create animated timeline showing attacks over time"""
-    
-    # Aggregate by date and attack type
-    timeline_data = df.groupby([df['timestamp'].dt.date, 'attack_type']).size().reset_index(name='count')
-    timeline_data.columns = ['date', 'attack_type', 'count']
-    
-    fig = px.scatter(
-        timeline_data,
-        x='date',
-        y='count',
-        color='attack_type',
-        size='count',
-        animation_frame=timeline_data['date'].astype(str),
-        title=title,
-        labels={'count': 'Number of Attacks', 'date': 'Date'},
-        color_discrete_sequence=[COLORS['cyan'], COLORS['purple'], COLORS['pink'], 
-                                COLORS['green'], COLORS['orange']]
+def create_animated_timeline(df, title='📈 Attack Timeline Animation', rollups=None,
+                             start=None, end=None, target_points=DEFAULT_TARGET_POINTS,
+                             max_frames=MAX_ANIMATION_FRAMES):
+    """
+    Create animated timeline showing attacks over time
+    
+    With precomputed time rollups (time_rollups.build_time_rollups of df) the
+    resolution is chosen for the window and no rows are touched; otherwise
+    df is bucketed per day. Buckets are then grouped into at most max_frames
+    animation frames, so the payload stays bounded for any date range.
+    """
+    
+    if rollups is not None:
+        _, timeline_data = get_timeline(rollups, start, end, target_points=target_points)
+        dates = timeline_data['bucket'].to_numpy()
+        attack_types, weights = timeline_data['attack_type'], timeline_data['count'].to_numpy()
+    else:
+        # Day buckets as datetime64 floors, no Python dates
+        dates = floor_timestamps(df['timestamp'].to_numpy(), 'day')
+        attack_types, weights = df['attack_type'], None
+    
+    # One count per (frame, attack type) cell, in a single bincount
+    frame_ids, frame_starts = frame_buckets(dates, max_frames)
+    type_codes, type_labels = capped_codes(attack_types, weights=weights)
+    valid = type_codes >= 0
+    counts = np.bincount(
+        frame_ids[valid] * len(type_labels) + type_codes[valid],
+        weights=None if weights is None else weights[valid],
+        minlength=len(frame_starts) * len(type_labels)
+    )
+    frame_data = pd.DataFrame(
+        counts.reshape(len(frame_starts), len(type_labels)).astype(np.int64),
+        index=pd.DatetimeIndex(frame_starts, name='date'),
+        columns=pd.Index(type_labels, dtype=object, name='attack_type')
+    )
+    
+    return _render_animated_timeline(frame_data, title)
+
+@cached_figure
+def _render_animated_timeline(frame_data, title):
+    """
+    Render the timeline from a (frame start x attack type) count matrix
+    
+    Each attack type is one trace declared once on the base figure; frames
+    only carry the x/y/size arrays of that trace, not the styling.
+    """
+    
+    palette = [COLORS['cyan'], COLORS['purple'], COLORS['pink'], COLORS['green'], COLORS['orange']]
+    counts = frame_data.to_numpy()
+    dates = frame_data.index
+    labels = dates.strftime('%Y-%m-%d %H:%M').str.replace(' 00:00', '', regex=False)
+    max_count = counts.max() if counts.size else 1
+    sizeref = area_sizeref(max(max_count, 1))
+    
+    def frame_traces(i):
+        traces = []
+        for j in range(counts.shape[1]):
+            present = counts[i, j] > 0
+            x = [dates[i]] if present else []
+            y = [int(counts[i, j])] if present else []
+            traces.append(go.Scatter(x=x, y=y, marker={'size': y}))
+        return traces
+    
+    fig = go.Figure()
+    first = frame_traces(0) if len(dates) else []
+    for j, attack_type in enumerate(frame_data.columns):
+        fig.add_trace(go.Scatter(
+            x=first[j].x if first else [],
+            y=first[j].y if first else [],
+            mode='markers',
+            name=str(attack_type),
+            marker=dict(
+                size=first[j].y if first else [],
+                sizemode='area',
+                sizeref=sizeref,
+                color=palette[j % len(palette)],
+            ),
+            hovertemplate=f'<b>{attack_type}</b><br>Date: %{{x}}<br>Attacks: %{{y:,d}}<extra></extra>'
+        ))
+    
+    trace_ids = list(range(counts.shape[1]))
+    fig.frames = [
+        go.Frame(data=frame_traces(i), traces=trace_ids, name=labels[i])
+        for i in range(len(dates))
+    ]
+    
+    # Fixed axes covering every frame, so points never leave the view
+    if len(dates):
+        pad = (dates[-1] - dates[0]) / 20 if len(dates) > 1 else pd.Timedelta(days=1)
+        fig.update_xaxes(range=[dates[0] - pad, dates[-1] + pad], title_text='Date')
+    fig.update_yaxes(range=[0, max_count * 1.15 + 1], title_text='Number of Attacks')
+    
+    transition = {'frame': {'duration': 500, 'redraw': False}, 'transition': {'duration': 300}, 'fromcurrent': True}
+    fig.update_layout(
+        updatemenus=[dict(
+            type='buttons', direction='left', x=0.1, y=0, xanchor='right', yanchor='top',
+            pad={'r': 10, 't': 70}, showactive=False,
+            buttons=[
+                dict(label='▶', method='animate', args=[None, transition]),
+                dict(label='◼', method='animate',
+                     args=[[None], {'frame': {'duration': 0, 'redraw': False}, 'mode': 'immediate'}]),
+            ]
+        )],
+        sliders=[dict(
+            active=0, x=0.1, y=0, xanchor='left', yanchor='top', len=0.9,
+            pad={'b': 10, 't': 60},
+            currentvalue={'prefix': 'Date: '},
+            steps=[
+                dict(label=label, method='animate',
+                     args=[[label], {'frame': {'duration': 0, 'redraw': False}, 'mode': 'immediate'}])
+                for label in labels
+            ]
+        )]
     )
     
     apply_theme(fig, title=title, height=500)
     
     return fig
 
-def create_sunburst_chart(df, title='🎯 Attack Hierarchy'):
-    """Create sunburst chart for hierarchical attack data"""
+def create_attack_trend(timeline, resolution, title='📈 Attack Trend', max_points=None,
+                        webgl_threshold=WEBGL_THRESHOLD):
+    """
+    Attack counts over time, one line per attack type plus their total
+    
+    Each line is downsampled (min/max per bucket, so peaks survive) to the
+    chart's point budget and drawn with WebGL once it has more than
+    webgl_threshold points.
+    
+    Parameters:
+    -----------
+    timeline : pd.DataFrame
+        'bucket', 'attack_type' and 'count' rows (data_loader_v2.get_attack_trend)
+    resolution : str
+        Bucket resolution of the timeline (time_rollups.RESOLUTIONS)
+    max_points : int, optional
+        Points per line (overrides CHART_POINT_BUDGETS['attack_trend'])
+    webgl_threshold : int, optional
+        WebGL switch-over point (None keeps SVG traces)
+    """
+    
+    bucket_ids, buckets = pd.factorize(timeline['bucket'], sort=True)
+    type_codes, type_labels = capped_codes(timeline['attack_type'], weights=timeline['count'].to_numpy())
+    valid = type_codes >= 0
+    counts = np.bincount(
+        bucket_ids[valid] * len(type_labels) + type_codes[valid],
+        weights=timeline['count'].to_numpy()[valid],
+        minlength=len(buckets) * len(type_labels)
+    )
+    trend = pd.DataFrame(
+        counts.reshape(len(buckets), len(type_labels)).astype(np.int64),
+        index=pd.DatetimeIndex(buckets, name='bucket'),
+        columns=pd.Index(type_labels, dtype=object, name='attack_type')
+    )
+    
+    return _render_attack_trend(trend, resolution, title, point_budget('attack_trend', max_points),
+                                webgl_threshold)
+
+@cached_figure
+def _render_attack_trend(trend, resolution, title, max_points, webgl_threshold):
+    """Render the downsampled trend lines from a (bucket x attack type) count matrix"""
+    
+    palette = [COLORS['cyan'], COLORS['purple'], COLORS['pink'], COLORS['green'], COLORS['orange']]
+    buckets = trend.index.to_numpy()
+    lines = [(str(attack_type), trend[attack_type].to_numpy()) for attack_type in trend.columns]
+    lines.append(('All attacks', trend.to_numpy().sum(axis=1)))
+    kept = [downsample_indices(buckets, counts, max_points, method='minmax') for _, counts in lines]
+    scatter_trace = go.Scattergl if use_webgl(max(map(len, kept), default=0), webgl_threshold) else go.Scatter
+    
+    fig = go.Figure()
+    for j, ((name, counts), idx) in enumerate(zip(lines[:-1], kept)):
+        fig.add_trace(scatter_trace(
+            x=buckets[idx],
+            y=counts[idx],
+            mode='lines',
+            name=name,
+            line=dict(color=palette[j % len(palette)], width=1.5),
+            hovertemplate=f'<b>{name}</b><br>%{{x}}<br>Attacks: %{{y:,d}}<extra></extra>'
+        ))
+    
+    total, total_idx = lines[-1][1], kept[-1]
+    fig.add_trace(scatter_trace(
+        x=buckets[total_idx],
+        y=total[total_idx],
+        mode='lines',
+        name='All attacks',
+        line=dict(color=COLORS['text'], width=2.5, dash='dot'),
+        hovertemplate='<b>All attacks</b><br>%{x}<br>Attacks: %{y:,d}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        xaxis_title=f'Time ({resolution})',
+        yaxis_title=f'Attacks per {resolution}',
+        hovermode='x unified',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0)
+    )
+    
+    apply_theme(fig, title=title, height=450)
+    
+    return fig
+
+def create_sunburst_chart(df, title='🎯 Attack Hierarchy', max_children=MAX_HIERARCHY_CHILDREN,
+                          focus=None, max_depth=None):
+    """
+    Create sunburst chart for hierarchical attack data
+    
+    Each parent keeps its max_children largest children and folds the rest
+    into "Other" (totals are exact). focus (e.g. {'industry': 'Finance'})
+    drills into one branch, and max_depth limits how many levels below it
+    are computed, so deeper levels are only built on drill-down.
+    """
     
     # Create hierarchy: Industry -> Attack Type -> Target System
-    hierarchy_data = df.groupby(['industry', 'attack_type', 'target_system']).size().reset_index(name='count')
-    
-    fig = px.sunburst(
-        hierarchy_data,
-        path=['industry', 'attack_type', 'target_system'],
-        values='count',
-        title=title,
-        color='count',
-        color_continuous_scale=[[0, COLORS['cyan']], [0.5, COLORS['purple']], [1, COLORS['pink']]]
+    hierarchy_data = capped_hierarchy(
+        df, ['industry', 'attack_type', 'target_system'], max_children,
+        focus=focus, max_depth=max_depth
     )
+    nodes = hierarchy_nodes(hierarchy_data, [c for c in hierarchy_data.columns if c != 'value'])
+    
+    return _render_sunburst_chart(nodes, title)
+
+@cached_figure
+def _render_sunburst_chart(nodes, title):
+    """Render the sunburst from flattened hierarchy nodes"""
+    
+    fig = go.Figure(go.Sunburst(
+        ids=nodes['ids'],
+        labels=nodes['labels'],
+        parents=nodes['parents'],
+        values=nodes['values'],
+        branchvalues='total',
+        marker=dict(
+            colors=nodes['colors'],
+            colorscale=[[0, COLORS['cyan']], [0.5, COLORS['purple']], [1, COLORS['pink']]],
+            colorbar=dict(title='count'),
+            showscale=True
+        ),
+        hovertemplate='<b>%{label}</b><br>count: %{value:,.0f}<extra></extra>'
+    ))
     
     apply_theme(fig, title=title, height=600)
     
     return fig
 
-def create_3d_scatter(df, title='🔮 3D Attack Correlation Analysis'):
-    """Create 3D scatter plot with even distribution across all axes"""
-    
-    # Sample attacks
-    sample_size = min(600, len(df))
-    sample_df = df.sample(sample_size, random_state=42).copy()
+@cached_figure
+def _render_3d_density(grid, value_label, title):
+    """Render the duration x data loss grid of create_3d_scatter's density mode"""
+    fig = density_heatmap(
+        grid, 'Attack Duration (min)', 'Data Compromised (GB)', value_label, COLORS,
+        row_label='attacks', hidden_axis='severity'
+    )
+    apply_theme(fig, title=title, height=700)
+    return fig
+
+def create_3d_scatter(df, title='🔮 3D Attack Correlation Analysis', signature=None, max_points=None,
+                      mode='sample', ranges=None, weights=None):
+    """
+    Create 3D scatter plot with even distribution across all axes
+    
+    The sample is stratified by attack type (rare types keep a minimum share),
+    seeded, and cached per filter signature (the filters that produced df).
+    max_points overrides the chart's entry in CHART_POINT_BUDGETS.
+    
+    With mode='density' every row is binned instead (duration x data loss, on
+    the fixed ranges if given, optionally weighted by a column such as
+    'data_compromised_GB') and drawn as a heatmap of constant size.
+    """
+    
+    if mode == 'density':
+        grid = cached_density_grid(
+            df, ['attack_duration_min', 'data_compromised_GB'],
+            ranges=ranges, weights=weights, signature=signature
+        )
+        value_label = 'Data Loss (GB)' if weights == 'data_compromised_GB' else 'Attacks'
+        return _render_3d_density(grid, value_label, title)
+    
+    # Sample attacks from a projection of the source columns. The cached sample
+    # is shared: with copy-on-write a shallow copy takes the derived columns
+    # below without duplicating or modifying the cached data
+    max_points = point_budget('3d_scatter', max_points)
+    sample_df = cached_stratified_sample(
+        df[SCATTER_3D_SOURCE_COLUMNS], 'attack_type', max_points, signature=signature
+    ).copy(deep=False)
+    sample_size = len(sample_df)
     
     # Convert to numeric
     sample_df['attack_duration_min'] = pd.to_numeric(sample_df['attack_duration_min'], errors='coerce').fillna(30)
@@ -224,7 +468,7 @@ def create_3d_scatter(df, title='🔮 3D Attack Correlation Analysis'):
     sample_df['data_display'] = (sample_df['data_rank'] / sample_size) * 28
     
     # Severity: keep as actual values
-    sample_df['severity_display'] = sample_df['attack_severity'].copy()
+    sample_df['severity_display'] = sample_df['attack_severity']
     
     # Add aggressive random jitter to spread points
     np.random.seed(42)
@@ -240,38 +484,44 @@ def create_3d_scatter(df, title='🔮 3D Attack Correlation Analysis'):
     # Variable marker sizes
     sample_df['marker_size'] = (sample_df['response_time_min'].clip(lower=1, upper=180) / 30) + 3
     
-    fig = px.scatter_3d(
-        sample_df,
-        x='duration_display',
-        y='data_display',
-        z='severity_display',
-        color='attack_type',
-        size='marker_size',
-        hover_data=['location', 'target_system', 'outcome', 'response_time_min', 
-                    'attack_duration_min', 'data_compromised_GB', 'attack_severity'],
-        title=title,
-        labels={
-            'duration_display': 'Attack Duration',
-            'data_display': 'Data Loss',
-            'severity_display': 'Severity (1-10)',
-            'marker_size': 'Response Time'
-        },
-        color_discrete_sequence=[COLORS['cyan'], COLORS['purple'], COLORS['pink'], 
-                                COLORS['green'], COLORS['orange']]
-    )
+    # Only the plotted and hovered columns reach the renderer
+    sample_df = sample_df[SCATTER_3D_COLUMNS]
     
-    # Enhanced hover template showing actual values
-    fig.update_traces(
-        hovertemplate='<b>%{fullData.name}</b><br>' +
-                      'Duration: %{customdata[4]:.0f} min<br>' +
-                      'Data Loss: %{customdata[5]:.1f} GB<br>' +
-                      'Severity: %{customdata[6]:.1f}/10<br>' +
-                      'Location: %{customdata[0]}<br>' +
-                      'Target: %{customdata[1]}<br>' +
-                      'Outcome: %{customdata[2]}<br>' +
-                      'Response Time: %{customdata[3]:.0f} min<br>' +
-                      '<extra></extra>'
-    )
+    return _render_3d_scatter(sample_df, sample_size, title)
+
+@cached_figure
+def _render_3d_scatter(sample_df, sample_size, title):
+    """Render the 3D scatter from the prepared sample"""
+    
+    palette = [COLORS['cyan'], COLORS['purple'], COLORS['pink'], COLORS['green'], COLORS['orange']]
+    max_size = sample_df['marker_size'].max()
+    
+    fig = go.Figure()
+    for i, attack_type in enumerate(pd.unique(sample_df['attack_type'])):
+        rows = sample_df[(sample_df['attack_type'] == attack_type).to_numpy()]
+        fig.add_trace(go.Scatter3d(
+            x=compact_array(rows['duration_display'].to_numpy()),
+            y=compact_array(rows['data_display'].to_numpy()),
+            z=compact_array(rows['severity_display'].to_numpy()),
+            mode='markers',
+            name=str(attack_type),
+            legendgroup=str(attack_type),
+            marker=area_marker(rows['marker_size'].to_numpy(), max_size, color=palette[i % len(palette)]),
+            customdata=compact_array(rows[[
+                'attack_duration_min', 'data_compromised_GB', 'attack_severity', 'response_time_min'
+            ]].to_numpy(dtype=float)),
+            text=rows['location'].astype(str).to_numpy(),
+            hovertext=(rows['target_system'].astype(str) + ' / ' + rows['outcome'].astype(str)).to_numpy(),
+            hovertemplate='<b>%{fullData.name}</b><br>' +
+                          'Duration: %{customdata[0]:.0f} min<br>' +
+                          'Data Loss: %{customdata[1]:.1f} GB<br>' +
+                          'Severity: %{customdata[2]:.1f}/10<br>' +
+                          'Location: %{text}<br>' +
+                          'Target / Outcome: %{hovertext}<br>' +
+                          'Response Time: %{customdata[3]:.0f} min<br>' +
+                          '<extra></extra>'
+        ))
+    fig.update_layout(legend_title_text='attack_type')
     
     # Update layout with better camera angle and axis settings
     fig.update_layout(
@@ -353,6 +603,12 @@ def create_radar_chart(df, title='📡 Security Posture Radar'):
         if max_val > 0:
             tool_metrics[col] = (1 - tool_metrics[col] / max_val) * 100  # Invert so higher is better
     
+    return _render_radar_chart(tool_metrics, title)
+
+@cached_figure
+def _render_radar_chart(tool_metrics, title):
+    """Render the radar from per-tool metrics"""
+    
     fig = go.Figure()
     
     for idx, row in tool_metrics.iterrows():
@@ -382,6 +638,12 @@ def create_heatmap_calendar(df, title='📅 Attack Patterns by Day of Week'):
     dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     dow_data = df['day_name'].value_counts().reindex(dow_order, fill_value=0)
     
+    return _render_heatmap_calendar(dow_data, title)
+
+@cached_figure
+def _render_heatmap_calendar(dow_data, title):
+    """Render the day-of-week bars from their counts"""
+    
     # Find peak day
     peak_day = dow_data.idxmax()
     peak_count = dow_data.max()
@@ -415,6 +677,7 @@ def create_heatmap_calendar(df, title='📅 Attack Patterns by Day of Week'):
     
     return fig
 
+@cached_figure
 def create_gauge_chart(value, title='Threat Level', max_value=100):
     """Create animated gauge chart"""
     
@@ -447,47 +710,54 @@ def create_gauge_chart(value, title='Threat Level', max_value=100):
     
     return fig
 
-def create_treemap(df, title='🗂️ Attack Distribution Treemap'):
-    """Create treemap visualization"""
+def create_treemap(df, title='🗂️ Attack Distribution Treemap', max_children=MAX_HIERARCHY_CHILDREN,
+                   focus=None, max_depth=None):
+    """Create treemap visualization (top-k children per parent, rest as "Other")"""
     
-    treemap_data = df.groupby(['industry', 'attack_type']).size().reset_index(name='count')
-    
-    fig = px.treemap(
-        treemap_data,
-        path=['industry', 'attack_type'],
-        values='count',
-        title=title,
-        color='count',
-        color_continuous_scale=[[0, COLORS['cyan']], [0.5, COLORS['purple']], [1, COLORS['pink']]]
+    treemap_data = capped_hierarchy(
+        df, ['industry', 'attack_type'], max_children, focus=focus, max_depth=max_depth
     )
+    nodes = hierarchy_nodes(treemap_data, [c for c in treemap_data.columns if c != 'value'])
+    
+    return _render_treemap(nodes, title)
+
+@cached_figure
+def _render_treemap(nodes, title):
+    """Render the treemap from flattened hierarchy nodes"""
+    
+    fig = go.Figure(go.Treemap(
+        ids=nodes['ids'],
+        labels=nodes['labels'],
+        parents=nodes['parents'],
+        values=nodes['values'],
+        branchvalues='total',
+        marker=dict(
+            colors=nodes['colors'],
+            colorscale=[[0, COLORS['cyan']], [0.5, COLORS['purple']], [1, COLORS['pink']]],
+            colorbar=dict(title='count'),
+            showscale=True
+        ),
+        hovertemplate='<b>%{label}</b><br>count: %{value:,.0f}<extra></extra>'
+    ))
     
     apply_theme(fig, title=title, height=500)
     
     return fig
 
-def create_sankey_flow(df, title='🔀 Attack Flow Diagram'):
+def create_sankey_flow(df, title='🔀 Attack Flow Diagram', max_nodes_per_level=15):
     """Create Sankey diagram"""
     
-    # Create flow: Attack Type -> Target System -> Outcome
-    flow_data = df.groupby(['attack_type', 'target_system', 'outcome']).size().reset_index(name='count')
-    
-    # Create node labels
-    attack_types = df['attack_type'].unique().tolist()
-    target_systems = df['target_system'].unique().tolist()
-    outcomes = df['outcome'].unique().tolist()
+    # Create flow: Attack Type -> Target System -> Outcome (nodes and links
+    # come straight from categorical codes; long tails fold into "Other")
+    flow = sankey_links(df, ['attack_type', 'target_system', 'outcome'], max_nodes_per_level)
     
-    all_nodes = attack_types + target_systems + outcomes
-    
-    # Create links
-    source = []
-    target = []
-    value = []
+    return _render_sankey_flow(flow, title)
+
+@cached_figure
+def _render_sankey_flow(flow, title):
+    """Render the Sankey from node labels and link arrays"""
     
-    for _, row in flow_data.iterrows():
-        # Attack Type -> Target System
-        source.append(all_nodes.index(row['attack_type']))
-        target.append(all_nodes.index(row['target_system']))
-        value.append(row['count'])
+    level_colors = np.array([COLORS['cyan'], COLORS['purple'], COLORS['pink']])
     
     fig = go.Figure(data=[go.Sankey(
         arrangement='perpendicular',
@@ -495,16 +765,14 @@ def create_sankey_flow(df, title='🔀 Attack Flow Diagram'):
             pad=30,
             thickness=30,
             line=dict(color=COLORS['cyan'], width=1),
-            label=all_nodes,
-            color=[COLORS['cyan']] * len(attack_types) + 
-                  [COLORS['purple']] * len(target_systems) + 
-                  [COLORS['pink']] * len(outcomes)
+            label=flow['labels'],
+            color=level_colors[flow['node_level']]
         ),
         link=dict(
-            source=source,
-            target=target,
-            value=value,
-            color=['rgba(0, 245, 255, 0.25)' for _ in value]
+            source=flow['source'],
+            target=flow['target'],
+            value=flow['value'],
+            color='rgba(0, 245, 255, 0.25)'
         )
     )])
     
@@ -528,6 +796,12 @@ def create_mitigation_chart(df, title='🛠️ Mitigation Methods Used'):
     if mitigation_counts.empty:
         mitigation_counts = pd.Series([len(df)], index=['Standard Protocol'])
     
+    return _render_mitigation_chart(mitigation_counts, title)
+
+@cached_figure
+def _render_mitigation_chart(mitigation_counts, title):
+    """Render the mitigation bars from their counts"""
+    
     # Create simple horizontal bar chart
     fig = go.Figure(go.Bar(
         y=mitigation_counts.index,
@@ -564,14 +838,21 @@ def create_waterfall_chart(df, title='📊 Attack Outcomes by Type'):
     # Calculate outcomes by attack type
     outcome_data = df.groupby(['attack_type', 'outcome']).size().unstack(fill_value=0)
     
-    # Get top attack types
+    # Get top attack types (categorical counts also list unobserved types)
     top_attacks = df['attack_type'].value_counts().head(8).index
+    top_attacks = top_attacks[top_attacks.isin(outcome_data.index)]
     outcome_data = outcome_data.loc[top_attacks] if len(outcome_data) > 0 else outcome_data
     
     # Handle empty data
     if outcome_data.empty:
         outcome_data = pd.DataFrame({'Unknown': [len(df)]}, index=['Various Attacks'])
     
+    return _render_waterfall_chart(outcome_data, title)
+
+@cached_figure
+def _render_waterfall_chart(outcome_data, title):
+    """Render the stacked outcome bars from the outcome matrix"""
+    
     fig = go.Figure()
     
     colors_list = [COLORS['green'], COLORS['orange'], COLORS['pink'], COLORS['cyan'], COLORS['purple']]
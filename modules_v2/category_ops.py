@@ -0,0 +1,194 @@
+"""
+Category Operations Module
+Evaluates string predicates and mappings once per distinct value and
+broadcasts the result back to every row through the categorical codes
+"""
+
+import numpy as np
+import pandas as pd
+
+# Substring searches loop over the categories in Python only up to this many;
+# above it (or on non-categorical columns) pandas' vectorized str methods win
+MAX_LOOPED_CATEGORIES = 1000
+
+
+def codes_and_categories(series):
+    """
+    Return (codes, categories) for a series, factorizing non-categorical input
+
+    Missing values get code -1.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes, pd.Index(uniques)
+
+
+def category_map(series, func, default=None, dtype=object):
+    """
+    Apply a function once per category and broadcast the result to every row
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Categorical (or low-cardinality) input column
+    func : callable
+        Function evaluated once for each distinct value
+    default : any
+        Result used for missing values
+    dtype : numpy dtype
+        Dtype of the mapped values
+
+    Returns:
+    --------
+    pd.Series
+        Mapped values aligned with the input index
+    """
+    codes, categories = codes_and_categories(series)
+    # The default sits at the end so the -1 code of missing values lands on it
+    lookup = np.array([func(value) for value in categories] + [default], dtype=dtype)
+    return pd.Series(lookup.take(codes), index=series.index, name=series.name)
+
+
+def category_predicate(series, predicate):
+    """
+    Evaluate a boolean predicate once per category
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Categorical (or low-cardinality) input column
+    predicate : callable
+        Function returning True/False for a single value
+
+    Returns:
+    --------
+    pd.Series
+        Boolean mask aligned with the input index (missing values are False)
+    """
+    return category_map(series, lambda value: bool(predicate(value)), default=False, dtype=bool)
+
+
+def category_contains_any(series, keywords, case=False):
+    """
+    Flag rows whose value contains any of the given keywords
+
+    Low-cardinality categorical columns are matched once per category;
+    other columns (e.g. IP addresses, where almost every value is distinct)
+    use the vectorized Series.str.contains.
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Input column
+    keywords : list of str
+        Substrings to look for
+    case : bool
+        Whether matching is case sensitive
+
+    Returns:
+    --------
+    pd.Series
+        Boolean mask aligned with the input index (missing values are False)
+    """
+    if not (isinstance(series.dtype, pd.CategoricalDtype)
+            and len(series.cat.categories) <= MAX_LOOPED_CATEGORIES):
+        text = series if pd.api.types.is_string_dtype(series.dtype) else series.astype(str).where(series.notna())
+        mask = pd.Series(False, index=series.index, name=series.name)
+        for keyword in keywords:
+            mask |= text.str.contains(keyword, case=case, regex=False, na=False).astype(bool)
+        return mask
+
+    if not case:
+        keywords = [keyword.lower() for keyword in keywords]
+
+    def _matches(value):
+        text = str(value) if case else str(value).lower()
+        return any(keyword in text for keyword in keywords)
+
+    return category_predicate(series, _matches)
+
+
+def category_contains(series, pattern, case=False):
+    """
+    Literal substring search (see category_contains_any for the strategy)
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Input column (IP addresses, names, ...)
+    pattern : str
+        Substring to look for
+    case : bool
+        Whether matching is case sensitive
+
+    Returns:
+    --------
+    pd.Series
+        Boolean mask aligned with the input index
+    """
+    return category_contains_any(series, [pattern], case=case)
+
+
+def category_transform(series, func):
+    """
+    Map every category through func and return a categorical column
+
+    Categories that collapse onto the same output (e.g. 'DDoS' and 'ddos'
+    after lowercasing) are merged into a single category.
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Categorical (or low-cardinality) input column
+    func : callable
+        Function evaluated once for each distinct value
+
+    Returns:
+    --------
+    pd.Series
+        Categorical series aligned with the input index
+    """
+    codes, categories = codes_and_categories(series)
+    mapped = [func(value) for value in categories]
+    new_codes, new_categories = pd.factorize(pd.Index(mapped, dtype=object), use_na_sentinel=True)
+    # Append the missing-value sentinel so the -1 code stays -1
+    remap = np.append(new_codes, -1).astype(np.int64)
+    result = pd.Categorical.from_codes(remap.take(codes), categories=pd.Index(new_categories))
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def category_lower(series):
+    """Lowercase a column once per category"""
+    return category_transform(series, lambda value: str(value).lower())
+
+
+def mapped_value_counts(series, func, order=None):
+    """
+    Count rows per mapped label without materializing the mapped column
+
+    Counts are taken per category with a bincount over the codes, then the
+    (few) category totals are relabelled through func and summed.
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Categorical (or low-cardinality) input column
+    func : callable
+        Label function evaluated once per distinct value
+    order : list, optional
+        Labels to reindex the result to (missing labels get 0)
+
+    Returns:
+    --------
+    pd.Series
+        Row counts indexed by mapped label
+    """
+    codes, categories = codes_and_categories(series)
+    valid = codes[codes >= 0]
+    per_category = np.bincount(valid, minlength=len(categories))
+    labels = [func(value) for value in categories]
+    counts = pd.Series(per_category, index=pd.Index(labels, dtype=object)).groupby(level=0, sort=False).sum()
+    if order is not None:
+        counts = counts.reindex(order, fill_value=0)
+    return counts
@@ -0,0 +1,525 @@
+"""
+Chart Utilities Module
+Shared, vectorized data preparation for the advanced and global visual modules
+"""
+
+import numpy as np
+import pandas as pd
+
+OTHER_LABEL = 'Other'
+
+# Children kept per parent in hierarchical charts (the rest fold into Other)
+MAX_HIERARCHY_CHILDREN = 12
+
+# Diameter in pixels of the largest area-scaled marker (px's size_max default)
+MARKER_SIZE_MAX = 20
+
+# Default point budget per time-series trace
+MAX_TRACE_POINTS = 1000
+
+# 2D scatter traces switch to WebGL (Scattergl) above this many points
+WEBGL_THRESHOLD = 500
+
+# Points sent per chart; 3D scatters are always WebGL, so the budget is
+# bounded by readability rather than by SVG rendering cost
+CHART_POINT_BUDGETS = {
+    '3d_scatter': 2000,
+    '3d_attack_correlation': 2000,
+    'yearly_trends': MAX_TRACE_POINTS,
+    'attack_trend': MAX_TRACE_POINTS,
+}
+
+# Buckets the attack trend asks the time rollups for: day resolution over
+# multi-year ranges, so daily peaks exist for the downsampler to keep
+ATTACK_TREND_BUCKETS = 1500
+
+
+def compact_array(values, float_dtype=np.float32):
+    """
+    Downcast a numeric array for Plotly's binary (base64 typed array) encoding
+
+    Floats become float32 and integers the smallest of the int8/16/32 and
+    uint8/16/32 types Plotly can decode; other dtypes are returned as is.
+    Only numeric arrays get the typed-array encoding, so charts pass numbers
+    through this (coordinates, sizes, numeric customdata) and keep string
+    labels in text/hovertext rather than in an object-typed customdata.
+
+    Parameters:
+    -----------
+    values : array-like
+        Numeric values
+    float_dtype : numpy dtype
+        Target float type
+
+    Returns:
+    --------
+    np.ndarray
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        return values.astype(float_dtype)
+    if values.dtype.kind == 'b':
+        return values.astype(np.uint8)
+    if values.dtype.kind in 'iu':
+        if values.size == 0:
+            return values.astype(np.int32)
+        low, high = values.min(), values.max()
+        for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+        return values.astype(np.float64)
+    return values
+
+
+def area_sizeref(max_value, size_max=MARKER_SIZE_MAX):
+    """
+    sizeref for sizemode='area' markers, scaled like Plotly Express' size_max
+
+    Marker area grows linearly with the value and the largest value is drawn
+    size_max pixels across (px uses sizeref = 2 * max / size_max ** 2).
+    """
+    return 2.0 * max(float(max_value), 1e-9) / size_max ** 2
+
+
+def area_marker(sizes, max_value=None, size_max=MARKER_SIZE_MAX, **style):
+    """
+    Marker dict with area-scaled sizes sent as a compact typed array
+
+    Parameters:
+    -----------
+    sizes : array-like
+        Numeric size per point
+    max_value : float, optional
+        Value drawn size_max pixels across (default: the largest size), so
+        several traces can share one scale
+    size_max : float
+        Diameter in pixels of the largest marker
+    **style :
+        Other marker properties (color, opacity, sizemin, ...)
+
+    Returns:
+    --------
+    dict
+    """
+    sizes = compact_array(sizes)
+    if max_value is None:
+        max_value = np.nanmax(sizes) if np.isfinite(sizes).any() else 1.0
+    return dict(size=sizes, sizemode='area', sizeref=area_sizeref(max_value, size_max), **style)
+
+
+def capped_codes(series, max_categories=None, other_label=OTHER_LABEL, weights=None):
+    """
+    Dense integer codes for the observed values of a column, capped at top-k
+
+    Values outside the top max_categories (by row count, or by summed
+    weights) are folded into a single trailing other_label code.
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Categorical or object column
+    max_categories : int, optional
+        Maximum number of distinct labels to keep (including the Other bucket)
+    other_label : str
+        Label of the folded bucket
+    weights : array-like, optional
+        Per-row weights used to rank the categories
+
+    Returns:
+    --------
+    tuple
+        (codes as np.ndarray of int64, labels as list)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        raw_codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        raw_codes, categories = pd.factorize(series, use_na_sentinel=True)
+    raw_codes = raw_codes.astype(np.int64)
+    valid = raw_codes >= 0
+
+    totals = np.bincount(
+        raw_codes[valid], minlength=len(categories),
+        weights=None if weights is None else np.asarray(weights, dtype=float)[valid]
+    )
+    observed = np.flatnonzero(np.bincount(raw_codes[valid], minlength=len(categories)))
+
+    # Rank observed categories by total (ties keep category order)
+    ranked = observed[np.argsort(-totals[observed], kind='stable')]
+    if max_categories is not None and len(ranked) > max_categories:
+        kept = ranked[:max(max_categories - 1, 0)]
+        fold = True
+    else:
+        kept = np.sort(observed)
+        fold = False
+
+    lookup = np.full(len(categories) + 1, len(kept) if fold else -1, dtype=np.int64)
+    lookup[kept] = np.arange(len(kept))
+    lookup[-1] = -1  # missing values stay missing
+    codes = lookup[raw_codes]
+
+    labels = [categories[i] for i in kept]
+    if fold:
+        labels.append(other_label)
+    return codes, labels
+
+
+def sankey_links(df, levels, max_nodes_per_level=None, weights=None, other_label=OTHER_LABEL):
+    """
+    Build Sankey node labels and link arrays from consecutive column levels
+
+    Node ids are level offsets plus per-level codes, and the links between
+    two levels are a single bincount over the combined pair codes.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Source rows
+    levels : list of str
+        Columns forming the flow, left to right
+    max_nodes_per_level : int, optional
+        Cap per level; the remainder is folded into an Other node
+    weights : str, optional
+        Column summed into the link values (default counts rows)
+    other_label : str
+        Label of the folded node
+
+    Returns:
+    --------
+    dict
+        {'labels': list, 'node_level': np.ndarray, 'source': np.ndarray,
+         'target': np.ndarray, 'value': np.ndarray}
+    """
+    row_weights = None if weights is None else pd.to_numeric(df[weights], errors='coerce').fillna(0).to_numpy()
+    level_codes, labels, node_level, sizes = [], [], [], []
+    for level_idx, column in enumerate(levels):
+        codes, level_labels = capped_codes(df[column], max_nodes_per_level, other_label, row_weights)
+        level_codes.append(codes)
+        labels.extend(level_labels)
+        node_level.append(np.full(len(level_labels), level_idx))
+        sizes.append(len(level_labels))
+    offsets = np.r_[0, np.cumsum(sizes)].astype(np.int64)
+
+    sources, targets, values = [], [], []
+    for i in range(len(levels) - 1):
+        left, right = level_codes[i], level_codes[i + 1]
+        n_left, n_right = sizes[i], sizes[i + 1]
+        valid = (left >= 0) & (right >= 0)
+        pair = left[valid] * n_right + right[valid]
+        totals = np.bincount(
+            pair, minlength=n_left * n_right,
+            weights=None if row_weights is None else row_weights[valid]
+        )
+        present = np.flatnonzero(totals)
+        sources.append(present // n_right + offsets[i])
+        targets.append(present % n_right + offsets[i + 1])
+        values.append(totals[present])
+
+    return {
+        'labels': labels,
+        'node_level': np.concatenate(node_level) if node_level else np.array([], dtype=int),
+        'source': np.concatenate(sources) if sources else np.array([], dtype=np.int64),
+        'target': np.concatenate(targets) if targets else np.array([], dtype=np.int64),
+        'value': np.concatenate(values) if values else np.array([]),
+    }
+
+
+def capped_hierarchy(df, path, max_children=MAX_HIERARCHY_CHILDREN, weights=None,
+                     focus=None, max_depth=None, other_label=OTHER_LABEL):
+    """
+    Leaf totals of a hierarchy with at most max_children children per parent
+
+    Level by level, the largest children of every parent are kept and the
+    rest are merged into one other_label leaf, so every total is preserved
+    exactly while the number of sectors stays bounded.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Source rows
+    path : list of str
+        Hierarchy columns, root first
+    max_children : int, optional
+        Children kept per parent, including the Other leaf (None = no cap)
+    weights : str, optional
+        Column summed into the values (default counts rows)
+    focus : dict, optional
+        {column: value} prefix of path to drill into; only the matching rows
+        and the levels below it are computed
+    max_depth : int, optional
+        Number of levels below the focus to compute (deeper ones on drill-down)
+    other_label : str
+        Label of the folded leaves
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per leaf with the remaining path columns (None below folded
+        leaves) and 'value'
+    """
+    focus = focus or {}
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in focus.items():
+        mask &= (df[column] == value).to_numpy()
+    levels = [column for column in path if column not in focus]
+    if max_depth is not None:
+        levels = levels[:max_depth]
+
+    rows = df[mask]
+    values = np.ones(len(rows)) if weights is None else pd.to_numeric(rows[weights], errors='coerce').fillna(0).to_numpy()
+    table = (
+        pd.DataFrame({column: rows[column].to_numpy() for column in levels})
+        .assign(value=values)
+        .groupby(levels, observed=True, sort=False, dropna=False)['value'].sum()
+        .reset_index()
+    )
+    for column in levels:
+        table[column] = table[column].astype(object)
+
+    if max_children is None:
+        return table
+
+    for depth, column in enumerate(levels):
+        keys = levels[:depth + 1]
+        children = table.groupby(keys, sort=False, dropna=False)['value'].sum().reset_index()
+        if depth:
+            by_parent = children.groupby(levels[:depth], sort=False, dropna=False)['value']
+            rank, siblings = by_parent.rank(method='first', ascending=False), by_parent.transform('size')
+        else:
+            rank, siblings = children['value'].rank(method='first', ascending=False), len(children)
+        # Keep max_children - 1 children and make room for the Other leaf
+        children['fold'] = (siblings > max_children) & (rank >= max_children) & children[column].notna()
+        if not children['fold'].any():
+            continue
+
+        fold = table[keys].merge(children[keys + ['fold']], on=keys, how='left')['fold'].to_numpy(dtype=bool)
+        table.loc[fold, column] = other_label
+        table.loc[fold, levels[depth + 1:]] = None
+        table = table.groupby(levels, sort=False, dropna=False)['value'].sum().reset_index()
+    return table
+
+
+def hierarchy_nodes(table, levels, value='value'):
+    """
+    Flatten leaf totals into ids/labels/parents arrays for Sunburst/Treemap traces
+
+    Node colors follow px.sunburst(color=value): every node gets the
+    value-weighted mean of its leaves.
+
+    Parameters:
+    -----------
+    table : pd.DataFrame
+        Output of capped_hierarchy (None below leaves of a ragged hierarchy)
+    levels : list of str
+        Path columns, root first
+    value : str
+        Value column
+
+    Returns:
+    --------
+    dict
+        {'ids', 'labels', 'parents', 'values', 'colors'} as lists/arrays
+    """
+    leaf_values = table[value].to_numpy(dtype=float)
+    nodes = []
+    ids = pd.Series('', index=table.index, dtype=object)
+    for depth, column in enumerate(levels):
+        labels = table[column]
+        present = labels.notna().to_numpy()
+        parents = ids
+        ids = labels.astype(str) if depth == 0 else ids + '/' + labels.astype(str)
+        level = pd.DataFrame({
+            'id': ids[present],
+            'label': labels[present].astype(str),
+            'parent': parents[present],
+            'value': leaf_values[present],
+            'weighted': leaf_values[present] ** 2,
+        }).groupby('id', sort=False).agg(
+            label=('label', 'first'), parent=('parent', 'first'),
+            value=('value', 'sum'), weighted=('weighted', 'sum')
+        )
+        nodes.append(level)
+
+    nodes = pd.concat(nodes) if nodes else pd.DataFrame(columns=['label', 'parent', 'value', 'weighted'])
+    totals = nodes['value'].to_numpy()
+    return {
+        'ids': nodes.index.tolist(),
+        'labels': nodes['label'].tolist(),
+        'parents': nodes['parent'].tolist(),
+        'values': totals,
+        'colors': np.divide(nodes['weighted'].to_numpy(), totals, out=np.zeros(len(totals)), where=totals > 0),
+    }
+
+
+def frame_buckets(dates, max_frames):
+    """
+    Group sorted or unsorted dates into at most max_frames animation frames
+
+    Every distinct date gets its own frame while they fit the budget;
+    otherwise the date span is cut into max_frames equal-width intervals.
+
+    Parameters:
+    -----------
+    dates : array-like
+        datetime64 values
+    max_frames : int
+        Frame budget
+
+    Returns:
+    --------
+    tuple
+        (frame id per value as np.ndarray, frame start per frame id as np.ndarray
+         of datetime64[ns]); empty intervals are dropped and ids are dense
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    if len(dates) == 0:
+        return np.array([], dtype=np.int64), dates[:0]
+    unique_dates, inverse = np.unique(dates, return_inverse=True)
+    if len(unique_dates) <= max_frames:
+        return inverse.astype(np.int64), unique_dates
+
+    ticks = dates.astype(np.int64)
+    lo, hi = ticks.min(), ticks.max()
+    raw = np.minimum(((ticks - lo) / (hi - lo + 1) * max_frames).astype(np.int64), max_frames - 1)
+    used, frame_ids = np.unique(raw, return_inverse=True)
+    # Each frame starts at the earliest date it actually contains
+    starts = np.full(len(used), np.iinfo(np.int64).max)
+    np.minimum.at(starts, frame_ids, ticks)
+    return frame_ids.astype(np.int64), starts.astype('datetime64[ns]')
+
+
+def use_webgl(n_points, threshold=WEBGL_THRESHOLD):
+    """
+    Whether a 2D scatter of n_points should be drawn with WebGL
+
+    Parameters:
+    -----------
+    n_points : int
+        Points in the trace
+    threshold : int, optional
+        Switch-over point (None keeps SVG traces)
+
+    Returns:
+    --------
+    bool
+    """
+    return threshold is not None and n_points > threshold
+
+
+def point_budget(chart, override=None):
+    """Point budget of a chart: the override if given, else CHART_POINT_BUDGETS"""
+    return override if override is not None else CHART_POINT_BUDGETS.get(chart)
+
+
+def _as_float(values):
+    """Numeric view of x values, with datetimes as int64 nanoseconds"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets selection of n_out points
+
+    The first and last points are always kept; every bucket in between
+    keeps the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket, which preserves peaks and dips.
+
+    Parameters:
+    -----------
+    x, y : array-like
+        Series sorted by x (y finite)
+    n_out : int
+        Number of points to keep
+
+    Returns:
+    --------
+    np.ndarray
+        Sorted indices of the kept points
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+
+    # n_out - 2 buckets over the interior points, as [edges[i], edges[i + 1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            next_x, next_y = x[n - 1], y[n - 1]
+        else:
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(x, y, n_out):
+    """
+    Keep the minimum and maximum of each of (n_out - 2) // 2 equal-count buckets
+
+    Cheaper than LTTB (fully vectorized) and keeps every extreme exactly.
+
+    Parameters:
+    -----------
+    x, y : array-like
+        Series sorted by x
+    n_out : int
+        Maximum number of points to keep
+
+    Returns:
+    --------
+    np.ndarray
+        Sorted indices of the kept points
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 4:
+        # No room for a min/max pair besides the endpoints
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+    y = np.asarray(y, dtype=float)
+    # Two points per bucket plus the two endpoints stay within n_out
+    n_buckets = max((n_out - 2) // 2, 1)
+    buckets = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[0, order[starts], order[ends], n - 1])
+
+
+def downsample_indices(x, y, max_points=MAX_TRACE_POINTS, method='lttb'):
+    """
+    Indices of the points to draw for a trace, capped at max_points
+
+    Parameters:
+    -----------
+    x, y : array-like
+        Series sorted by x
+    max_points : int, optional
+        Point budget (None disables downsampling)
+    method : str
+        'lttb' or 'minmax'
+
+    Returns:
+    --------
+    np.ndarray
+        All indices when the trace fits the budget, else the selected ones
+    """
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    if method == 'lttb':
+        return lttb_indices(x, y, max_points)
+    if method == 'minmax':
+        return minmax_indices(x, y, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
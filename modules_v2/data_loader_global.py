@@ -1,12 +1,73 @@
 """
 Data Loader for Global Cybersecurity Threats 2015-2024
 Handles loading and preprocessing of the global threat dataset
+
+The aggregate helpers accept optional rollups materialized once per load.
+A page built on this dataset would pass them along with its filters:
+
+    df = load_global_data()
+    rollups = load_global_rollups()
+    filtered = filter_data(df, filters)
+    yearly = get_yearly_trends(filtered, rollups, filters)
+    defense = get_defense_effectiveness(filtered, rollups, filters)
+    top = get_top_threats(filtered, rollups=rollups)
+
+Each helper documents which filters its rollup path can answer; for any
+other active filter it groups the filtered rows instead, with the same result.
 """
 
+import uuid
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime
 
+from .render_cache import DATASET_VERSION_ATTR
+from .quantile_sketch import build_sketch_index, query_digest, digest_quantile, digest_count, percentile_table
+
+# Measures carried by every materialized rollup (source column -> short name)
+ROLLUP_MEASURES = {
+    'Financial Loss (in Million $)': 'Financial_Loss',
+    'Number of Affected Users': 'Affected_Users',
+    'Incident Resolution Time (in Hours)': 'Resolution_Time',
+}
+
+# Column whose non-null count is the attack count (as in the row-level groupbys)
+ROLLUP_COUNT_COLUMN = 'Attack Type'
+
+# Rollup tables materialized at load time (name -> grouping dimensions)
+ROLLUP_DIMENSIONS = {
+    'year': ['Year'],
+    'defense': ['Defense Mechanism Used'],
+    'country_year': ['Country', 'Year'],
+    'industry_attack': ['Target Industry', 'Attack Type'],
+}
+
+# filter_data() keys and the column each one restricts
+FILTER_DIMENSIONS = {
+    'year_range': 'Year',
+    'countries': 'Country',
+    'attack_types': 'Attack Type',
+    'industries': 'Target Industry',
+    'sources': 'Attack Source',
+    'vulnerabilities': 'Security Vulnerability Type',
+    'defense_mechanisms': 'Defense Mechanism Used',
+    'severity_categories': 'Severity_Category',
+}
+
+# Percentile sketches: measures, and the filter keys the sketches are keyed by
+SKETCH_MEASURES = ['Incident Resolution Time (in Hours)', 'Financial Loss (in Million $)']
+SKETCH_DIMENSIONS = {'industries': 'Target Industry', 'attack_types': 'Attack Type'}
+
+# Columns ranked once at load time for get_top_threats()
+TOP_THREAT_COLUMNS = [
+    'Financial Loss (in Million $)',
+    'Number of Affected Users',
+    'Incident Resolution Time (in Hours)',
+    'Impact_Score',
+]
+
 @st.cache_data(ttl=3600)
 def load_global_data(file_path='Global_Cybersecurity_Threats_2015-2024_LARGE.csv'):
     """
@@ -65,6 +126,9 @@ def load_global_data(file_path='Global_Cybersecurity_Threats_2015-2024_LARGE.csv
             (df['Number of Affected Users'] / df['Number of Affected Users'].max()) * 50
         ).round(2)
         
+        # New version per load, keyed on by the sample and density caches
+        df.attrs[DATASET_VERSION_ATTR] = uuid.uuid4().hex
+        
         return df
         
     except FileNotFoundError:
@@ -75,6 +139,118 @@ def load_global_data(file_path='Global_Cybersecurity_Threats_2015-2024_LARGE.csv
         st.error(f"❌ Error loading data: {str(e)}")
         st.stop()
 
+def build_global_rollups(df):
+    """
+    Materialize the yearly/defense/country/industry rollups for a loaded frame
+
+    Every table holds the group dimensions, a row ``count``, the non-null
+    count of ROLLUP_COUNT_COLUMN as ``attacks_count`` and, for each measure
+    in ROLLUP_MEASURES, ``<name>_sum``, ``<name>_count`` (non-null rows) and
+    ``<name>_mean``. Sums and counts re-aggregate exactly, so filtered views
+    can be answered from these tables instead of the rows.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe returned by load_global_data
+
+    Returns:
+    --------
+    dict
+        {'tables': {name: pd.DataFrame}, 'top_order': {column: np.ndarray},
+         'row_count': int}
+    """
+    tables = {}
+    for name, dims in ROLLUP_DIMENSIONS.items():
+        if not all(dim in df.columns for dim in dims):
+            continue
+        grouped = df.groupby(dims, observed=True, sort=True)
+        table = grouped.size().rename('count').to_frame()
+        if ROLLUP_COUNT_COLUMN in df.columns:
+            table['attacks_count'] = grouped[ROLLUP_COUNT_COLUMN].count()
+        for column, alias in ROLLUP_MEASURES.items():
+            if column in df.columns:
+                table[f'{alias}_sum'] = grouped[column].sum()
+                table[f'{alias}_count'] = grouped[column].count()
+        tables[name] = _with_means(table.reset_index())
+
+    # Labels of the non-null rows ordered by each ranking column (descending,
+    # ties by position like nlargest(keep='first'), which also drops nulls)
+    # so top-N lookups never re-sort the frame
+    top_order = {}
+    for column in TOP_THREAT_COLUMNS:
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            ranked = np.flatnonzero(~np.isnan(values))
+            ranked = ranked[np.argsort(-values[ranked], kind='stable')]
+            top_order[column] = df.index.to_numpy()[ranked]
+
+    return {'tables': tables, 'top_order': top_order, 'row_count': len(df)}
+
+@st.cache_data(ttl=3600)
+def load_global_rollups(file_path='Global_Cybersecurity_Threats_2015-2024_LARGE.csv'):
+    """Load the global dataset and return its materialized rollups"""
+    return build_global_rollups(load_global_data(file_path))
+
+def _with_means(table):
+    """Recompute the mean columns of a rollup table from its sums and counts"""
+    for alias in ROLLUP_MEASURES.values():
+        if f'{alias}_sum' in table.columns:
+            table[f'{alias}_mean'] = table[f'{alias}_sum'] / table[f'{alias}_count'].replace(0, np.nan)
+    return table
+
+def _active_filter_dimensions(filters):
+    """Map the non-empty entries of a filter dict to the columns they restrict"""
+    return {
+        FILTER_DIMENSIONS.get(key, key): value
+        for key, value in (filters or {}).items()
+        if value
+    }
+
+def query_rollups(rollups, by, filters=None):
+    """
+    Re-aggregate a filtered view from the materialized rollups
+
+    Parameters:
+    -----------
+    rollups : dict
+        Output of build_global_rollups
+    by : list of str
+        Dimensions of the requested view
+    filters : dict, optional
+        Filter criteria in the filter_data() format
+
+    Returns:
+    --------
+    pd.DataFrame or None
+        Aggregated view, or None when no rollup covers the filter dimensions
+
+    A view is answerable when one ROLLUP_DIMENSIONS table contains both the
+    requested dimensions and every column restricted by an active filter.
+    """
+    active = _active_filter_dimensions(filters)
+    needed = set(by) | set(active)
+
+    candidates = [
+        table for name, table in rollups['tables'].items()
+        if needed <= set(ROLLUP_DIMENSIONS[name])
+    ]
+    if not candidates:
+        return None
+    table = min(candidates, key=len)
+
+    mask = pd.Series(True, index=table.index)
+    for column, value in active.items():
+        if column == 'Year':
+            start_year, end_year = value
+            mask &= table['Year'].between(start_year, end_year)
+        else:
+            mask &= table[column].isin(value)
+
+    additive = [col for col in table.columns if col == 'count' or col.endswith(('_sum', '_count'))]
+    view = table.loc[mask].groupby(by, observed=True, sort=True)[additive].sum().reset_index()
+    return _with_means(view)
+
 def get_data_summary(df):
     """
     Get comprehensive summary statistics
@@ -185,7 +361,20 @@ def filter_data(df, filters):
     
     return filtered
 
-def get_top_threats(df, n=10):
+def _top_rows(df, column, n, rollups=None):
+    """Top n rows of df by column (nulls never rank), read from the precomputed ranking when possible"""
+    order = (rollups or {}).get('top_order', {}).get(column)
+    labels = df.index
+    if order is None or not pd.api.types.is_integer_dtype(labels) or len(labels) == 0 \
+            or labels.min() < 0 or labels.max() >= rollups['row_count']:
+        return df.dropna(subset=[column]).nlargest(n, column)
+
+    # Walk the global ranking and keep the labels present in the filtered frame
+    present = np.zeros(rollups['row_count'], dtype=bool)
+    present[labels.to_numpy()] = True
+    return df.loc[order[present[order]][:n]]
+
+def get_top_threats(df, n=10, rollups=None):
     """
     Get top N threats by various criteria
     
@@ -195,6 +384,11 @@ def get_top_threats(df, n=10):
         Input dataframe
     n : int
         Number of top items to return
+    rollups : dict, optional
+        Rollups built from the frame df was filtered from; their precomputed
+        rankings replace the per-call nlargest sorts. This works for any
+        filters, as long as df keeps that frame's integer row labels;
+        otherwise each column falls back to nlargest
         
     Returns:
     --------
@@ -202,21 +396,21 @@ def get_top_threats(df, n=10):
         Top threats
     """
     return {
-        'by_financial_loss': df.nlargest(n, 'Financial Loss (in Million $)')[
+        'by_financial_loss': _top_rows(df, 'Financial Loss (in Million $)', n, rollups)[
             ['Year', 'Country', 'Attack Type', 'Target Industry', 'Financial Loss (in Million $)', 'Number of Affected Users']
         ].to_dict('records'),
-        'by_affected_users': df.nlargest(n, 'Number of Affected Users')[
+        'by_affected_users': _top_rows(df, 'Number of Affected Users', n, rollups)[
             ['Year', 'Country', 'Attack Type', 'Target Industry', 'Number of Affected Users', 'Financial Loss (in Million $)']
         ].to_dict('records'),
-        'by_resolution_time': df.nlargest(n, 'Incident Resolution Time (in Hours)')[
+        'by_resolution_time': _top_rows(df, 'Incident Resolution Time (in Hours)', n, rollups)[
             ['Year', 'Country', 'Attack Type', 'Incident Resolution Time (in Hours)', 'Defense Mechanism Used']
         ].to_dict('records'),
-        'by_impact_score': df.nlargest(n, 'Impact_Score')[
+        'by_impact_score': _top_rows(df, 'Impact_Score', n, rollups)[
             ['Year', 'Country', 'Attack Type', 'Target Industry', 'Impact_Score', 'Financial Loss (in Million $)']
         ].to_dict('records'),
     }
 
-def get_yearly_trends(df):
+def get_yearly_trends(df, rollups=None, filters=None):
     """
     Get year-over-year trends
     
@@ -224,12 +418,26 @@ def get_yearly_trends(df):
     -----------
     df : pd.DataFrame
         Input dataframe
+    rollups : dict, optional
+        Materialized rollups (build_global_rollups) of the unfiltered data
+    filters : dict, optional
+        Filters that produced df; used to re-aggregate from the rollups.
+        Only 'year_range' and 'countries' can be answered from them (the
+        'year' and 'country_year' tables); any other active filter falls
+        back to grouping df
         
     Returns:
     --------
     pd.DataFrame
         Yearly aggregated data
     """
+    if rollups is not None:
+        view = query_rollups(rollups, ['Year'], filters)
+        if view is not None:
+            yearly = view[['Year', 'attacks_count', 'Financial_Loss_sum', 'Affected_Users_sum', 'Resolution_Time_mean']]
+            yearly.columns = ['Year', 'Total_Attacks', 'Total_Financial_Loss', 'Total_Affected_Users', 'Avg_Resolution_Time']
+            return yearly
+
     yearly = df.groupby('Year').agg({
         'Attack Type': 'count',
         'Financial Loss (in Million $)': 'sum',
@@ -241,7 +449,7 @@ def get_yearly_trends(df):
     
     return yearly
 
-def get_defense_effectiveness(df):
+def get_defense_effectiveness(df, rollups=None, filters=None):
     """
     Calculate defense mechanism effectiveness
     
@@ -249,18 +457,31 @@ def get_defense_effectiveness(df):
     -----------
     df : pd.DataFrame
         Input dataframe
+    rollups : dict, optional
+        Materialized rollups (build_global_rollups) of the unfiltered data
+    filters : dict, optional
+        Filters that produced df; used to re-aggregate from the rollups.
+        Only 'defense_mechanisms' can be answered from them (the 'defense'
+        table); any other active filter falls back to grouping df
         
     Returns:
     --------
     pd.DataFrame
         Defense effectiveness metrics
     """
-    defense_stats = df.groupby('Defense Mechanism Used').agg({
-        'Attack Type': 'count',
-        'Financial Loss (in Million $)': 'mean',
-        'Number of Affected Users': 'mean',
-        'Incident Resolution Time (in Hours)': 'mean'
-    }).reset_index()
+    view = query_rollups(rollups, ['Defense Mechanism Used'], filters) if rollups is not None else None
+    if view is not None:
+        defense_stats = view[[
+            'Defense Mechanism Used', 'attacks_count', 'Financial_Loss_mean',
+            'Affected_Users_mean', 'Resolution_Time_mean'
+        ]].copy()
+    else:
+        defense_stats = df.groupby('Defense Mechanism Used').agg({
+            'Attack Type': 'count',
+            'Financial Loss (in Million $)': 'mean',
+            'Number of Affected Users': 'mean',
+            'Incident Resolution Time (in Hours)': 'mean'
+        }).reset_index()
     
     defense_stats.columns = ['Defense_Mechanism', 'Attack_Count', 'Avg_Financial_Loss', 'Avg_Affected_Users', 'Avg_Resolution_Time']
     
@@ -273,3 +494,74 @@ def get_defense_effectiveness(df):
     ).round(2)
     
     return defense_stats.sort_values('Effectiveness_Score', ascending=False)
+
+def build_global_sketches(df):
+    """
+    Build yearly-partitioned percentile sketches keyed by industry and attack type
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe returned by load_global_data
+        
+    Returns:
+    --------
+    dict
+        Sketch index (see quantile_sketch.build_sketch_index)
+    """
+    return build_sketch_index(
+        df, SKETCH_MEASURES, list(SKETCH_DIMENSIONS.values()), partition=df['Year']
+    )
+
+@st.cache_data(ttl=3600)
+def load_global_sketches(file_path='Global_Cybersecurity_Threats_2015-2024_LARGE.csv'):
+    """Load the global dataset and return its percentile sketches"""
+    return build_global_sketches(load_global_data(file_path))
+
+def get_global_percentiles(df, filters, sketches, measure, qs=(0.5, 0.95, 0.99)):
+    """
+    Percentiles of a measure over filtered global data, merged from sketches
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Filtered dataframe (used only when a filter is not sketch-aligned)
+    filters : dict
+        Filter criteria in the filter_data() format
+    sketches : dict
+        Output of build_global_sketches
+    measure : str
+        One of SKETCH_MEASURES
+    qs : float or tuple of float
+        Quantiles in [0, 1]
+        
+    Returns:
+    --------
+    float or np.ndarray
+        Percentile estimates (NaN when nothing matches)
+    """
+    filters = filters or {}
+    sketch_keys = set(SKETCH_DIMENSIONS) | {'year_range'}
+    if sketches is None or measure not in SKETCH_MEASURES or \
+            any(value for key, value in filters.items() if key not in sketch_keys):
+        values = df[measure].dropna().to_numpy(dtype=float)
+        if len(values) == 0:
+            return np.full(np.shape(qs), np.nan) if np.ndim(qs) else np.nan
+        return np.quantile(values, qs)
+    
+    selections = {
+        column: filters[key] for key, column in SKETCH_DIMENSIONS.items() if filters.get(key)
+    }
+    partitions = None
+    if filters.get('year_range'):
+        start_year, end_year = filters['year_range']
+        partitions = range(int(start_year), int(end_year) + 1)
+    
+    digest = query_digest(sketches, measure, selections, partitions)
+    if digest_count(digest) == 0:
+        return np.full(np.shape(qs), np.nan) if np.ndim(qs) else np.nan
+    return digest_quantile(digest, qs)
+
+def get_global_percentile_breakdown(sketches, measure, by='Target Industry', qs=(0.5, 0.95, 0.99)):
+    """p50/p95/p99 (by default) of a measure per industry or per attack type"""
+    return percentile_table(sketches, measure, by, qs)
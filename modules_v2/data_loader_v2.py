@@ -3,14 +3,54 @@ Enhanced Data Loader Module for DarkSentinel V2
 Handles loading and validation of the new cybersecurity attack data
 """
 
+import uuid
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime
 
-@st.cache_data(ttl=3600)
-def load_data(file_path='cybersecurity_large_synthesized_data.csv'):
+from .render_cache import DATASET_VERSION_ATTR
+from .time_rollups import build_time_rollups, get_timeline, get_row_timeline, DEFAULT_TARGET_POINTS
+from .quantile_sketch import (
+    build_sketch_index, build_digest, merge_digests, query_digest,
+    digest_quantile, digest_count, percentile_table
+)
+
+# Measures with mergeable percentile sketches, keyed by category and month
+SKETCH_MEASURES = ['attack_severity', 'response_time_min', 'attack_duration_min']
+SKETCH_DIMENSIONS = {'attack_types': 'attack_type', 'industries': 'industry'}
+
+# filter_data() keys that sketches cannot narrow down (only full selections pass)
+UNSKETCHED_FILTERS = {
+    'target_systems': 'target_system',
+    'locations': 'location',
+    'outcomes': 'outcome',
+    'user_roles': 'user_role',
+    'security_tools': 'security_tools_used',
+}
+
+# filter_data() keys the time rollups (keyed by attack type) cannot narrow down
+UNROLLED_FILTERS = {**UNSKETCHED_FILTERS, 'industries': 'industry'}
+
+# filter_data() keys answered from the shared row-position index
+INDEXED_FILTERS = {
+    'attack_types': 'attack_type',
+    'target_systems': 'target_system',
+    'locations': 'location',
+    'industries': 'industry',
+    'outcomes': 'outcome',
+    'user_roles': 'user_role',
+}
+
+# The shared frame is handed out as shallow views, which is only safe when
+# writes copy first (copy-on-write is always on from pandas 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+def _read_data(file_path):
     """
-    Load cybersecurity attack data from CSV file
+    Read and prepare the cybersecurity attack data from a CSV file
     
     Parameters:
     -----------
@@ -146,7 +186,166 @@ def load_data(file_path='cybersecurity_large_synthesized_data.csv'):
         st.error(f"❌ Error loading data: {str(e)}")
         st.stop()
 
-def get_data_summary(df):
+def _read_only_frame(df):
+    """
+    Rebuild a frame on read-only views of its arrays (no data is copied),
+    so an in-place write to it raises instead of changing shared data
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].array
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Categorical.codes is already a read-only view
+            values = pd.Categorical.from_codes(values.codes, dtype=values.dtype)
+        elif isinstance(df[col].dtype, np.dtype):
+            values = df[col].to_numpy().view()
+            values.flags.writeable = False
+        # Other extension arrays (Arrow-backed strings) are immutable already
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+@st.cache_resource(ttl=3600, show_spinner="Loading dataset...")
+def _shared_data(file_path):
+    """
+    The process-wide frame for a file, read once and shared by every session
+    and script thread. Its arrays are read-only, so writes through numpy
+    views raise; callers get copy-on-write views of it from load_data() and
+    must never write to this frame itself. Each load is stamped with a new
+    dataset version, which the sample and density caches key on.
+    """
+    frame = _read_only_frame(_read_data(file_path))
+    frame.attrs[DATASET_VERSION_ATTR] = uuid.uuid4().hex
+    return frame
+
+def load_data(file_path='cybersecurity_large_synthesized_data.csv'):
+    """
+    Load cybersecurity attack data from CSV file
+    
+    All callers share one read-only frame per file. The returned frame is a
+    shallow copy-on-write view of it (copy-on-write is enabled by this module
+    on pandas 2): adding, replacing or writing columns copies just what is
+    written, so derived frames never alter the shared data.
+    
+    Parameters:
+    -----------
+    file_path : str
+        Path to the CSV file
+        
+    Returns:
+    --------
+    pd.DataFrame
+        Loaded and validated dataframe
+    """
+    return _shared_data(file_path).copy(deep=False)
+
+def build_row_index(df):
+    """
+    Row positions of every category of the indexed filter columns
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe returned by load_data
+        
+    Returns:
+    --------
+    dict
+        'index': the frame's index (the positions are only valid for it) and
+        'columns': per column, 'categories', 'order' (row positions sorted by
+        category code) and 'offsets' (category i spans
+        order[offsets[i]:offsets[i + 1]]); arrays are read-only
+    """
+    columns = {}
+    for column in INDEXED_FILTERS.values():
+        if column not in df.columns or not isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        codes = df[column].cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        # Missing values (code -1) sort first and fall before offsets[0]
+        offsets = np.searchsorted(codes[order], np.arange(len(df[column].cat.categories) + 1))
+        order.flags.writeable = False
+        offsets.flags.writeable = False
+        columns[column] = {
+            'categories': df[column].cat.categories,
+            'order': order,
+            'offsets': offsets,
+        }
+    return {'index': df.index, 'columns': columns}
+
+@st.cache_resource(ttl=3600)
+def load_row_index(file_path='cybersecurity_large_synthesized_data.csv'):
+    """Row-position index of the shared dataset (one per process; read-only)"""
+    return build_row_index(_shared_data(file_path))
+
+def build_metadata_catalog(df, domain_limit=1000):
+    """
+    Build the dataset metadata catalog in a single pass over the loaded frame
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe returned by load_data
+    domain_limit : int
+        Columns with more distinct values than this keep no value domain
+        
+    Returns:
+    --------
+    dict
+        {'row_count', 'column_count', 'memory_bytes', 'columns': {column: {
+         'dtype', 'null_count', 'memory_bytes', 'nunique', 'domain', 'min',
+         'max', 'sum', 'mean'}}}
+    """
+    memory = df.memory_usage(deep=True)
+    columns = {}
+    
+    for col in df.columns:
+        series = df[col]
+        counts = series.value_counts(sort=False, dropna=True)
+        counts = counts[counts > 0]
+        entry = {
+            'dtype': str(series.dtype),
+            'null_count': int(series.isna().sum()),
+            'memory_bytes': int(memory[col]),
+            'nunique': int(len(counts)),
+            'domain': None,
+            'min': None,
+            'max': None,
+            'sum': None,
+            'mean': None,
+        }
+        
+        if len(counts) <= domain_limit:
+            try:
+                counts = counts.sort_index()
+            except TypeError:
+                pass  # Mixed types keep their observed order
+            entry['domain'] = {value: int(count) for value, count in counts.items()}
+        
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            entry.update(min=series.min(), max=series.max(), sum=series.sum(), mean=series.mean())
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            entry.update(min=series.min(), max=series.max())
+        
+        columns[col] = entry
+    
+    return {
+        'row_count': len(df),
+        'column_count': len(df.columns),
+        'memory_bytes': int(memory.sum()),
+        'columns': columns,
+    }
+
+@st.cache_resource(ttl=3600)
+def load_metadata_catalog(file_path='cybersecurity_large_synthesized_data.csv'):
+    """Metadata catalog of the shared dataset (one per process; treat as read-only)"""
+    return build_metadata_catalog(_shared_data(file_path))
+
+def catalog_domain(catalog, column):
+    """Sorted distinct values of a column as recorded in the catalog"""
+    domain = catalog['columns'].get(column, {}).get('domain')
+    return list(domain) if domain else []
+
+def get_data_summary(df, catalog=None):
     """
     Get comprehensive summary statistics
     
@@ -154,12 +353,18 @@ def get_data_summary(df):
     -----------
     df : pd.DataFrame
         Input dataframe
+    catalog : dict, optional
+        Metadata catalog of df (build_metadata_catalog); when given, the
+        summary is read from it instead of scanning the frame
         
     Returns:
     --------
     dict
         Summary statistics
     """
+    if catalog is not None:
+        return _summary_from_catalog(catalog)
+    
     summary = {
         'total_records': len(df),
         'total_columns': len(df.columns),
@@ -177,6 +382,29 @@ def get_data_summary(df):
     }
     return summary
 
+def _summary_from_catalog(catalog):
+    """Assemble the get_data_summary() dict from a metadata catalog"""
+    columns = catalog['columns']
+    rows = catalog['row_count']
+    start, end = columns['timestamp']['min'], columns['timestamp']['max']
+    outcome_domain = columns['outcome']['domain'] or {}
+    
+    return {
+        'total_records': rows,
+        'total_columns': catalog['column_count'],
+        'date_range_start': start,
+        'date_range_end': end,
+        'total_days': (end - start).days,
+        'unique_attackers': columns['attacker_ip']['nunique'],
+        'unique_targets': columns['target_ip']['nunique'],
+        'total_data_compromised_TB': columns['data_compromised_GB']['sum'] / 1024,
+        'avg_attack_duration_hours': columns['attack_duration_min']['mean'] / 60,
+        'avg_response_time_hours': columns['response_time_min']['mean'] / 60,
+        'success_rate': (outcome_domain.get('Success', 0) / rows * 100) if rows else 0,
+        'avg_severity': columns['attack_severity']['mean'],
+        'memory_usage_mb': catalog['memory_bytes'] / (1024**2)
+    }
+
 def get_attack_statistics(df):
     """
     Get detailed attack statistics
@@ -234,7 +462,21 @@ def get_real_time_metrics(df, last_n_hours=24):
     }
     return metrics
 
-def filter_data(df, filters):
+def _isin(df, column, selected, row_index=None):
+    """
+    Boolean mask of rows whose column value is in selected, marked from the
+    row-position index when it was built for this frame, else via isin()
+    """
+    entry = row_index['columns'].get(column) if row_index else None
+    if entry is None or not df.index.equals(row_index['index']):
+        return df[column].isin(selected)
+    mask = np.zeros(len(df), dtype=bool)
+    for code in entry['categories'].get_indexer(list(selected)):
+        if code >= 0:
+            mask[entry['order'][entry['offsets'][code]:entry['offsets'][code + 1]]] = True
+    return mask
+
+def filter_data(df, filters, row_index=None):
     """
     Apply multiple filters to dataframe using optimized boolean indexing
     
@@ -244,6 +486,9 @@ def filter_data(df, filters):
         Input dataframe
     filters : dict
         Filter criteria
+    row_index : dict, optional
+        Row-position index from build_row_index; used for the INDEXED_FILTERS
+        when df is the frame it was built for
         
     Returns:
     --------
@@ -261,19 +506,19 @@ def filter_data(df, filters):
         mask &= (df['timestamp'] >= start_dt) & (df['timestamp'] <= end_dt)
     
     if filters.get('attack_types'):
-        mask &= df['attack_type'].isin(filters['attack_types'])
+        mask &= _isin(df, 'attack_type', filters['attack_types'], row_index)
     
     if filters.get('target_systems'):
-        mask &= df['target_system'].isin(filters['target_systems'])
+        mask &= _isin(df, 'target_system', filters['target_systems'], row_index)
     
     if filters.get('locations'):
-        mask &= df['location'].isin(filters['locations'])
+        mask &= _isin(df, 'location', filters['locations'], row_index)
     
     if filters.get('industries'):
-        mask &= df['industry'].isin(filters['industries'])
+        mask &= _isin(df, 'industry', filters['industries'], row_index)
     
     if filters.get('outcomes'):
-        mask &= df['outcome'].isin(filters['outcomes'])
+        mask &= _isin(df, 'outcome', filters['outcomes'], row_index)
     
     if filters.get('severity_range'):
         min_sev, max_sev = filters['severity_range']
@@ -282,11 +527,14 @@ def filter_data(df, filters):
         mask &= (severity_numeric >= min_sev) & (severity_numeric <= max_sev)
     
     if filters.get('user_roles'):
-        mask &= df['user_role'].isin(filters['user_roles'])
+        mask &= _isin(df, 'user_role', filters['user_roles'], row_index)
     
     if filters.get('security_tools'):
         mask &= df['security_tools_used'].isin(filters['security_tools'])
     
+    # Filters that keep every row return the frame itself rather than a copy
+    if mask.all():
+        return df
     return df[mask]
 
 def get_top_threats(df, n=10):
@@ -318,3 +566,253 @@ def get_top_threats(df, n=10):
             ['timestamp', 'attack_type', 'response_time_min', 'mitigation_method']
         ].to_dict('records'),
     }
+
+def _month_id(timestamps):
+    """Integer month partition key (year * 12 + month - 1)"""
+    return timestamps.dt.year * 12 + timestamps.dt.month - 1
+
+def _is_month_start(ts):
+    """True for midnight on the first day of a month"""
+    return ts.day == 1 and ts == ts.normalize()
+
+def build_quantile_sketches(df):
+    """
+    Build the percentile sketches for a loaded frame
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataframe returned by load_data
+        
+    Returns:
+    --------
+    dict
+        Sketch index (see quantile_sketch.build_sketch_index) partitioned
+        by month and keyed by attack type and industry
+    """
+    return build_sketch_index(
+        df, SKETCH_MEASURES, list(SKETCH_DIMENSIONS.values()),
+        partition=_month_id(df['timestamp'])
+    )
+
+@st.cache_resource(ttl=3600)
+def load_quantile_sketches(file_path='cybersecurity_large_synthesized_data.csv'):
+    """Percentile sketches of the shared dataset (one per process; treat as read-only)"""
+    return build_quantile_sketches(_shared_data(file_path))
+
+@st.cache_resource(ttl=3600)
+def load_time_rollups(file_path='cybersecurity_large_synthesized_data.csv'):
+    """Minute/hour/day/week/month rollups of the shared dataset (one per process; treat as read-only)"""
+    return build_time_rollups(_shared_data(file_path))
+
+def _covers_domain(selected, catalog, column):
+    """True when a multiselect keeps every value of the column"""
+    if not selected:
+        return True
+    if catalog is None:
+        return False
+    return set(catalog_domain(catalog, column)) <= set(selected)
+
+def _filters_cover_domain(filters, catalog, keys):
+    """True when neither the given filter keys (key -> column) nor the severity range narrow the data"""
+    for key, column in keys.items():
+        if not _covers_domain(filters.get(key), catalog, column):
+            return False
+    if filters.get('severity_range'):
+        if catalog is None:
+            return False
+        severity = catalog['columns']['attack_severity']
+        min_sev, max_sev = filters['severity_range']
+        if min_sev > severity['min'] or max_sev < severity['max']:
+            return False
+    return True
+
+def _sketch_plan(df, filters, catalog):
+    """
+    How the sketches answer a filter state
+    
+    Returns (selections, partitions, edge_rows): the attack type / industry
+    selections, the whole months inside the date range (None for all time)
+    and a mask of the rows of df in partially covered edge months (None
+    without a date range). Returns None when a filter the sketches are not
+    keyed by narrows the data or the date range holds no whole month.
+    """
+    if not _filters_cover_domain(filters, catalog, UNSKETCHED_FILTERS):
+        return None
+    
+    selections = {
+        column: filters[key] for key, column in SKETCH_DIMENSIONS.items() if filters.get(key)
+    }
+    
+    partitions = None
+    edge_rows = None
+    if filters.get('date_range') and len(filters['date_range']) == 2:
+        start_dt = pd.to_datetime(filters['date_range'][0])
+        end_dt = pd.to_datetime(filters['date_range'][1]) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        covers_all = catalog is not None and \
+            start_dt <= catalog['columns']['timestamp']['min'] and end_dt >= catalog['columns']['timestamp']['max']
+        
+        if not covers_all:
+            # Months lying completely inside [start_dt, end_dt]
+            after_end = end_dt + pd.Timedelta(seconds=1)
+            first = start_dt.year * 12 + start_dt.month - 1 + (0 if _is_month_start(start_dt) else 1)
+            last = after_end.year * 12 + after_end.month - 1 - 1
+            partitions = range(first, last + 1)
+            if len(partitions) == 0:
+                return None
+            
+            months = _month_id(df['timestamp']).to_numpy()
+            edge_rows = (months < first) | (months > last)
+    
+    return selections, partitions, edge_rows
+
+def get_percentiles(df, filters, sketches, measure, qs=(0.5, 0.95, 0.99), catalog=None):
+    """
+    Percentiles of a measure over the filtered data, merged from sketches
+    
+    Whole months inside the date range and the attack type / industry
+    selections are answered by merging sketches. Rows in partially covered
+    edge months are sketched on the fly from df. Filters the sketches are
+    not keyed by fall back to an exact quantile over df.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Filtered dataframe (filter_data output for the same filters)
+    filters : dict
+        Filter criteria in the filter_data() format
+    sketches : dict
+        Output of build_quantile_sketches for the unfiltered data
+    measure : str
+        One of SKETCH_MEASURES
+    qs : float or tuple of float
+        Quantiles in [0, 1]
+    catalog : dict, optional
+        Metadata catalog, used to recognise "select all" filters
+        
+    Returns:
+    --------
+    float or np.ndarray
+        Percentile estimates (NaN when nothing matches)
+    """
+    def _exact():
+        values = pd.to_numeric(df[measure], errors='coerce').to_numpy(dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return np.full(np.shape(qs), np.nan) if np.ndim(qs) else np.nan
+        return np.quantile(values, qs)
+    
+    if sketches is None or measure not in SKETCH_MEASURES:
+        return _exact()
+    plan = _sketch_plan(df, filters, catalog)
+    if plan is None:
+        return _exact()
+    selections, partitions, edge_rows = plan
+    
+    digest = query_digest(sketches, measure, selections, partitions)
+    if edge_rows is not None:
+        edge_digest = build_digest(pd.to_numeric(df.loc[edge_rows, measure], errors='coerce'))
+        digest = merge_digests([digest, edge_digest])
+    if digest_count(digest) == 0:
+        return np.full(np.shape(qs), np.nan) if np.ndim(qs) else np.nan
+    return digest_quantile(digest, qs)
+
+def _exact_breakdown(df, measure, by, qs):
+    """percentile_table layout computed by sorting the rows of df"""
+    values = pd.to_numeric(df[measure], errors='coerce')
+    grouped = values.groupby(df[by], observed=True)
+    counts = grouped.count()
+    counts = counts[counts > 0]
+    if len(counts) == 0:
+        return pd.DataFrame(columns=[by, 'count'] + [f'p{q * 100:g}' for q in qs])
+    table = grouped.quantile(list(qs)).unstack().loc[counts.index]
+    table.columns = [f'p{q * 100:g}' for q in qs]
+    table.insert(0, 'count', counts.astype(int))
+    return table.rename_axis(by).reset_index()
+
+def get_percentile_breakdown(df, filters, sketches, measure, by='industry', qs=(0.5, 0.95, 0.99),
+                             catalog=None):
+    """
+    p50/p95/p99 (by default) of a measure per industry or per attack type
+    
+    Answered from the sketches the same way as get_percentiles: whole
+    months and the category selections merge sketches, edge-month rows are
+    sketched per category from df, and any other narrowing filter falls
+    back to exact per-category quantiles over df.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Filtered dataframe (filter_data output for the same filters)
+    filters : dict
+        Filter criteria in the filter_data() format
+    sketches : dict
+        Output of build_quantile_sketches for the unfiltered data
+    measure : str
+        One of SKETCH_MEASURES
+    by : str
+        'industry' or 'attack_type'
+    qs : tuple of float
+        Quantiles to report
+    catalog : dict, optional
+        Metadata catalog, used to recognise "select all" filters
+        
+    Returns:
+    --------
+    pd.DataFrame
+        One row per category with count and pNN columns
+    """
+    plan = None
+    if sketches is not None and measure in SKETCH_MEASURES:
+        plan = _sketch_plan(df, filters, catalog)
+    if plan is None:
+        return _exact_breakdown(df, measure, by, qs)
+    selections, partitions, edge_rows = plan
+    
+    extra = None
+    if edge_rows is not None and edge_rows.any():
+        edge = pd.to_numeric(df.loc[edge_rows, measure], errors='coerce')
+        extra = {
+            value: build_digest(group)
+            for value, group in edge.groupby(df.loc[edge_rows, by], observed=True)
+        }
+    return percentile_table(sketches, measure, by, qs, selections, partitions, extra=extra)
+
+def get_attack_trend(df, filters, rollups, catalog=None, target_points=DEFAULT_TARGET_POINTS):
+    """
+    Attack counts per time bucket and attack type over the filtered data
+    
+    The date range and attack type selection are answered from the time
+    rollups at the coarsest resolution giving about target_points buckets.
+    Any filter the rollups are not keyed by (UNROLLED_FILTERS, severity)
+    buckets the filtered rows instead, at the same resolution.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Filtered dataframe (filter_data output for the same filters)
+    filters : dict
+        Filter criteria in the filter_data() format
+    rollups : dict
+        Output of load_time_rollups for the unfiltered data
+    catalog : dict, optional
+        Metadata catalog, used to recognise "select all" filters
+    target_points : int
+        Approximate number of buckets
+        
+    Returns:
+    --------
+    tuple
+        (resolution, pd.DataFrame with 'bucket', 'attack_type' and 'count')
+    """
+    start = end = None
+    if filters.get('date_range') and len(filters['date_range']) == 2:
+        start = pd.to_datetime(filters['date_range'][0])
+        end = pd.to_datetime(filters['date_range'][1]) + pd.Timedelta(days=1)
+    
+    if rollups is None or not _filters_cover_domain(filters, catalog, UNROLLED_FILTERS):
+        return get_row_timeline(df, start, end, target_points)
+    
+    selected = filters.get('attack_types')
+    categories = None if _covers_domain(selected, catalog, 'attack_type') else list(selected)
+    return get_timeline(rollups, start, end, target_points, categories=categories)
@@ -0,0 +1,148 @@
+"""
+Density Module
+Server-side binning of every filtered point onto a fixed grid, so dense
+scatter views send a grid of constant size instead of a sample of rows
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from .chart_utils import compact_array
+from .render_cache import LRUCache, dataset_version, fingerprint
+
+DEFAULT_BINS = 60
+DENSITY_CACHE_MAX_BYTES = 16 * 1024**2
+
+
+def _numeric(df, column):
+    """Column as float64 with unparsable values as NaN"""
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def density_grid(df, columns, bins=DEFAULT_BINS, ranges=None, weights=None):
+    """
+    Bin rows onto a fixed grid with np.histogramdd
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Rows to bin
+    columns : list of str
+        Numeric columns forming the grid axes (2 for a heatmap)
+    bins : int or list of int
+        Bins per axis
+    ranges : list of (low, high), optional
+        Fixed extent per axis (e.g. catalog min/max, so the grid does not move
+        with the filters); defaults to the extent of df
+    weights : str, optional
+        Column summed into each cell instead of counting rows
+
+    Returns:
+    --------
+    dict
+        {'columns', 'weights', 'values' (np.ndarray indexed [axis0, axis1, ...]),
+         'edges' (list of arrays), 'centers' (list of arrays), 'rows' (binned rows)}
+    """
+    values = np.column_stack([_numeric(df, column) for column in columns]) if len(df) else np.empty((0, len(columns)))
+    valid = ~np.isnan(values).any(axis=1)
+    values = values[valid]
+    row_weights = None
+    if weights is not None:
+        row_weights = np.nan_to_num(_numeric(df, weights)[valid])
+
+    if ranges is None:
+        ranges = [
+            (float(values[:, i].min()), float(values[:, i].max())) if len(values) else (0.0, 1.0)
+            for i in range(len(columns))
+        ]
+    # A degenerate axis still needs a non-empty extent
+    ranges = [(low, high if high > low else low + 1.0) for low, high in ranges]
+
+    grid, edges = np.histogramdd(values, bins=bins, range=ranges, weights=row_weights)
+    in_range = np.all([(values[:, i] >= low) & (values[:, i] <= high) for i, (low, high) in enumerate(ranges)], axis=0)
+    return {
+        'columns': list(columns),
+        'weights': weights,
+        'values': grid,
+        'edges': list(edges),
+        'centers': [(e[:-1] + e[1:]) / 2 for e in edges],
+        'rows': int(np.count_nonzero(in_range)) if len(values) else 0,
+    }
+
+
+DENSITY_CACHE = LRUCache(DENSITY_CACHE_MAX_BYTES)
+
+
+def cached_density_grid(df, columns, bins=DEFAULT_BINS, ranges=None, weights=None, signature=None):
+    """
+    density_grid, cached per filter signature
+
+    Parameters:
+    -----------
+    df, columns, bins, ranges, weights :
+        Same as density_grid
+    signature : any, optional
+        Filter state that produced df; when omitted the row labels of df are
+        fingerprinted instead. Either way the key includes the dataset version
+
+    Returns:
+    --------
+    dict
+        Grid (shared between callers, treat as read-only)
+    """
+    rows = df.index if signature is None else (signature, len(df))
+    key = ('density', fingerprint(dataset_version(df), rows, list(columns), bins, ranges, weights))
+    hit, grid = DENSITY_CACHE.get(key)
+    if not hit:
+        grid = density_grid(df, columns, bins, ranges, weights)
+        DENSITY_CACHE.put(key, grid)
+    return grid
+
+
+def density_heatmap(grid, x_title, y_title, value_label, colors,
+                    row_label='rows', hidden_axis=None, x_format='.1f', y_format='.1f'):
+    """
+    Build a heatmap of a 2D density grid (empty cells transparent)
+
+    The figure is left unthemed: callers wrap this in their own cached
+    renderer and apply their module's theme and title there.
+
+    Parameters:
+    -----------
+    grid : dict
+        Grid from density_grid
+    x_title, y_title, value_label : str
+        Axis and colorbar titles
+    colors : dict
+        Palette of the calling module ('purple', 'cyan', 'pink', 'text')
+    row_label : str
+        What a binned row is, for the caption (e.g. 'attacks')
+    hidden_axis : str, optional
+        Axis of the scatter view that the 2D grid cannot show, named in the caption
+    x_format, y_format : str
+        d3 formats of the axis values on hover
+    """
+    z = grid['values'].T
+    fig = go.Figure(data=go.Heatmap(
+        x=compact_array(grid['centers'][0]),
+        y=compact_array(grid['centers'][1]),
+        z=compact_array(np.where(z > 0, z, np.nan)),
+        colorscale=[[0, colors['purple']], [0.5, colors['cyan']], [1, colors['pink']]],
+        colorbar=dict(title=value_label, thickness=15),
+        hovertemplate=f'{x_title}: %{{x:{x_format}}}<br>{y_title}: %{{y:{y_format}}}<br>'
+                      f'{value_label}: %{{z:,.0f}}<extra></extra>'
+    ))
+
+    fig.update_xaxes(title_text=x_title)
+    fig.update_yaxes(title_text=y_title)
+    caption = f"Density of all {grid['rows']:,} {row_label} on a fixed grid"
+    if hidden_axis:
+        caption += f" ({hidden_axis} is not shown)"
+    fig.add_annotation(
+        text=caption,
+        xref='paper', yref='paper', x=0.5, y=-0.15, showarrow=False,
+        font=dict(size=10, color=colors['text'])
+    )
+
+    return fig
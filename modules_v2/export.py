@@ -0,0 +1,133 @@
+"""
+Export Module
+On-demand export of explorer results: rows are serialized chunk by chunk
+straight into a byte buffer, so an export never builds the whole result
+as one text string and then a second encoded copy of it
+"""
+
+import gzip
+import importlib.util
+import io
+
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_GZIP_LEVEL = 6  # gzip's own default; 9 is slower for a few percent smaller files
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'JSON Lines': ('jsonl', 'application/x-ndjson'),
+}
+
+
+def available_formats():
+    """Export formats usable here (Parquet needs pyarrow)"""
+    has_pyarrow = importlib.util.find_spec('pyarrow') is not None
+    return [name for name in EXPORT_FORMATS if name != 'Parquet' or has_pyarrow]
+
+
+def _chunks(df, chunk_rows):
+    """Row slices of df (views under copy-on-write)"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv(df, fileobj, chunk_rows):
+    for i, chunk in enumerate(_chunks(df, chunk_rows)):
+        fileobj.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+    if len(df) == 0:
+        fileobj.write(df.to_csv(index=False).encode('utf-8'))
+
+
+def _write_jsonl(df, fileobj, chunk_rows):
+    for chunk in _chunks(df, chunk_rows):
+        text = chunk.to_json(orient='records', lines=True, date_format='iso')
+        fileobj.write(text.encode('utf-8'))
+        if not text.endswith('\n'):
+            fileobj.write(b'\n')
+
+
+def _write_parquet(df, fileobj, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # One row group per chunk; later chunks are coerced to the first one's schema
+    writer = None
+    try:
+        for chunk in _chunks(df, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(fileobj, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+        if writer is None:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), fileobj)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_export(df, fmt, fileobj, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Serialize rows into a binary file object, chunk by chunk
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Rows to export
+    fmt : str
+        One of EXPORT_FORMATS
+    fileobj : binary file-like
+        Destination
+    columns : list of str, optional
+        Columns to export, in this order (default: all)
+    chunk_rows : int
+        Rows serialized per step
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if columns is not None:
+        df = df[list(columns)]
+
+    if fmt == 'CSV':
+        _write_csv(df, fileobj, chunk_rows)
+    elif fmt == 'CSV (gzip)':
+        with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=EXPORT_GZIP_LEVEL) as compressed:
+            _write_csv(df, compressed, chunk_rows)
+    elif fmt == 'Parquet':
+        _write_parquet(df, fileobj, chunk_rows)
+    else:
+        _write_jsonl(df, fileobj, chunk_rows)
+
+
+def export_file(df, fmt, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Export rows to a rewound in-memory binary file
+
+    Meant to be called only when a download is requested, e.g. as the
+    callable data of st.download_button.
+
+    Parameters:
+    -----------
+    df, fmt, columns, chunk_rows :
+        Same as write_export
+
+    Returns:
+    --------
+    io.BytesIO
+        Exported file positioned at its start
+    """
+    buffer = io.BytesIO()
+    write_export(df, fmt, buffer, columns, chunk_rows)
+    buffer.seek(0)
+    return buffer
+
+
+def export_file_name(prefix, fmt, timestamp=None):
+    """File name with a timestamp and the extension of the format"""
+    timestamp = pd.Timestamp.now() if timestamp is None else timestamp
+    return f"{prefix}_{timestamp.strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[fmt][0]}"
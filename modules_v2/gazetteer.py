@@ -0,0 +1,444 @@
+"""
+Gazetteer Module
+Shared country/city coordinates with aliases, joined onto location columns
+through their categorical codes (one lookup per distinct location)
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+from .category_ops import codes_and_categories
+
+# Unplaced locations named on a map before the rest are counted
+UNMATCHED_SHOWN = 5
+
+# Country centroids (lat, lon), keyed by the names used in the datasets
+COUNTRIES = {
+    'Afghanistan': (33.9391, 67.7100),
+    'Albania': (41.1533, 20.1683),
+    'Algeria': (28.0339, 1.6596),
+    'Andorra': (42.5462, 1.6016),
+    'Angola': (-11.2027, 17.8739),
+    'Antigua and Barbuda': (17.0608, -61.7964),
+    'Argentina': (-38.4161, -63.6167),
+    'Armenia': (40.0691, 45.0382),
+    'Australia': (-25.2744, 133.7751),
+    'Austria': (47.5162, 14.5501),
+    'Azerbaijan': (40.1431, 47.5769),
+    'Bahamas': (25.0343, -77.3963),
+    'Bahrain': (25.9304, 50.6378),
+    'Bangladesh': (23.6850, 90.3563),
+    'Barbados': (13.1939, -59.5432),
+    'Belarus': (53.7098, 27.9534),
+    'Belgium': (50.5039, 4.4699),
+    'Belize': (17.1899, -88.4976),
+    'Benin': (9.3077, 2.3158),
+    'Bhutan': (27.5142, 90.4336),
+    'Bolivia': (-16.2902, -63.5887),
+    'Bosnia and Herzegovina': (43.9159, 17.6791),
+    'Botswana': (-22.3285, 24.6849),
+    'Brazil': (-14.2350, -51.9253),
+    'Brunei': (4.5353, 114.7277),
+    'Bulgaria': (42.7339, 25.4858),
+    'Burkina Faso': (12.2383, -1.5616),
+    'Burundi': (-3.3731, 29.9189),
+    'Cambodia': (12.5657, 104.9910),
+    'Cameroon': (7.3697, 12.3547),
+    'Canada': (56.1304, -106.3468),
+    'Cape Verde': (16.0020, -24.0132),
+    'Central African Republic': (6.6111, 20.9394),
+    'Chad': (15.4542, 18.7322),
+    'Chile': (-35.6751, -71.5430),
+    'China': (35.8617, 104.1954),
+    'Colombia': (4.5709, -74.2973),
+    'Comoros': (-11.8750, 43.8722),
+    'Congo': (-0.2280, 15.8277),
+    'Costa Rica': (9.7489, -83.7534),
+    'Croatia': (45.1000, 15.2000),
+    'Cuba': (21.5218, -77.7812),
+    'Cyprus': (35.1264, 33.4299),
+    'Czech Republic': (49.8175, 15.4730),
+    'DR Congo': (-4.0383, 21.7587),
+    'Denmark': (56.2639, 9.5018),
+    'Djibouti': (11.8251, 42.5903),
+    'Dominica': (15.4150, -61.3710),
+    'Dominican Republic': (18.7357, -70.1627),
+    'Ecuador': (-1.8312, -78.1834),
+    'Egypt': (26.8206, 30.8025),
+    'El Salvador': (13.7942, -88.8965),
+    'Equatorial Guinea': (1.6508, 10.2679),
+    'Eritrea': (15.1794, 39.7823),
+    'Estonia': (58.5953, 25.0136),
+    'Eswatini': (-26.5225, 31.4659),
+    'Ethiopia': (9.1450, 40.4897),
+    'Fiji': (-16.5782, 179.4144),
+    'Finland': (61.9241, 25.7482),
+    'France': (46.2276, 2.2137),
+    'Gabon': (-0.8037, 11.6094),
+    'Gambia': (13.4432, -15.3101),
+    'Georgia': (42.3154, 43.3569),
+    'Germany': (51.1657, 10.4515),
+    'Ghana': (7.9465, -1.0232),
+    'Greece': (39.0742, 21.8243),
+    'Grenada': (12.1165, -61.6790),
+    'Guatemala': (15.7835, -90.2308),
+    'Guinea': (9.9456, -9.6966),
+    'Guinea-Bissau': (11.8037, -15.1804),
+    'Guyana': (4.8604, -58.9302),
+    'Haiti': (18.9712, -72.2852),
+    'Honduras': (15.2000, -86.2419),
+    'Hong Kong': (22.3964, 114.1095),
+    'Hungary': (47.1625, 19.5033),
+    'Iceland': (64.9631, -19.0208),
+    'India': (20.5937, 78.9629),
+    'Indonesia': (-0.7893, 113.9213),
+    'Iran': (32.4279, 53.6880),
+    'Iraq': (33.2232, 43.6793),
+    'Ireland': (53.4129, -8.2439),
+    'Israel': (31.0461, 34.8516),
+    'Italy': (41.8719, 12.5674),
+    'Ivory Coast': (7.5400, -5.5471),
+    'Jamaica': (18.1096, -77.2975),
+    'Japan': (36.2048, 138.2529),
+    'Jordan': (30.5852, 36.2384),
+    'Kazakhstan': (48.0196, 66.9237),
+    'Kenya': (-0.0236, 37.9062),
+    'Kiribati': (-3.3704, -168.7340),
+    'Kosovo': (42.6026, 20.9030),
+    'Kuwait': (29.3117, 47.4818),
+    'Kyrgyzstan': (41.2044, 74.7661),
+    'Laos': (19.8563, 102.4955),
+    'Latvia': (56.8796, 24.6032),
+    'Lebanon': (33.8547, 35.8623),
+    'Lesotho': (-29.6100, 28.2336),
+    'Liberia': (6.4281, -9.4295),
+    'Libya': (26.3351, 17.2283),
+    'Liechtenstein': (47.1660, 9.5554),
+    'Lithuania': (55.1694, 23.8813),
+    'Luxembourg': (49.8153, 6.1296),
+    'Madagascar': (-18.7669, 46.8691),
+    'Malawi': (-13.2543, 34.3015),
+    'Malaysia': (4.2105, 101.9758),
+    'Maldives': (3.2028, 73.2207),
+    'Mali': (17.5707, -3.9962),
+    'Malta': (35.9375, 14.3754),
+    'Marshall Islands': (7.1315, 171.1845),
+    'Mauritania': (21.0079, -10.9408),
+    'Mauritius': (-20.3484, 57.5522),
+    'Mexico': (23.6345, -102.5528),
+    'Micronesia': (7.4256, 150.5508),
+    'Moldova': (47.4116, 28.3699),
+    'Monaco': (43.7503, 7.4128),
+    'Mongolia': (46.8625, 103.8467),
+    'Montenegro': (42.7087, 19.3744),
+    'Morocco': (31.7917, -7.0926),
+    'Mozambique': (-18.6657, 35.5296),
+    'Myanmar': (21.9162, 95.9560),
+    'Namibia': (-22.9576, 18.4904),
+    'Nauru': (-0.5228, 166.9315),
+    'Nepal': (28.3949, 84.1240),
+    'Netherlands': (52.1326, 5.2913),
+    'New Zealand': (-40.9006, 174.8860),
+    'Nicaragua': (12.8654, -85.2072),
+    'Niger': (17.6078, 8.0817),
+    'Nigeria': (9.0820, 8.6753),
+    'North Korea': (40.3399, 127.5101),
+    'North Macedonia': (41.6086, 21.7453),
+    'Norway': (60.4720, 8.4689),
+    'Oman': (21.5126, 55.9233),
+    'Pakistan': (30.3753, 69.3451),
+    'Palau': (7.5150, 134.5825),
+    'Palestine': (31.9522, 35.2332),
+    'Panama': (8.5380, -80.7821),
+    'Papua New Guinea': (-6.3150, 143.9555),
+    'Paraguay': (-23.4425, -58.4438),
+    'Peru': (-9.1900, -75.0152),
+    'Philippines': (12.8797, 121.7740),
+    'Poland': (51.9194, 19.1451),
+    'Portugal': (39.3999, -8.2245),
+    'Qatar': (25.3548, 51.1839),
+    'Romania': (45.9432, 24.9668),
+    'Russia': (61.5240, 105.3188),
+    'Rwanda': (-1.9403, 29.8739),
+    'Saint Kitts and Nevis': (17.3578, -62.7830),
+    'Saint Lucia': (13.9094, -60.9789),
+    'Saint Vincent and the Grenadines': (12.9843, -61.2872),
+    'Samoa': (-13.7590, -172.1046),
+    'San Marino': (43.9424, 12.4578),
+    'Sao Tome and Principe': (0.1864, 6.6131),
+    'Saudi Arabia': (23.8859, 45.0792),
+    'Senegal': (14.4974, -14.4524),
+    'Serbia': (44.0165, 21.0059),
+    'Seychelles': (-4.6796, 55.4920),
+    'Sierra Leone': (8.4606, -11.7799),
+    'Singapore': (1.3521, 103.8198),
+    'Slovakia': (48.6690, 19.6990),
+    'Slovenia': (46.1512, 14.9955),
+    'Solomon Islands': (-9.6457, 160.1562),
+    'Somalia': (5.1522, 46.1996),
+    'South Africa': (-30.5595, 22.9375),
+    'South Korea': (35.9078, 127.7669),
+    'South Sudan': (6.8770, 31.3070),
+    'Spain': (40.4637, -3.7492),
+    'Sri Lanka': (7.8731, 80.7718),
+    'Sudan': (12.8628, 30.2176),
+    'Suriname': (3.9193, -56.0278),
+    'Sweden': (60.1282, 18.6435),
+    'Switzerland': (46.8182, 8.2275),
+    'Syria': (34.8021, 38.9968),
+    'Taiwan': (23.6978, 120.9605),
+    'Tajikistan': (38.8610, 71.2761),
+    'Tanzania': (-6.3690, 34.8888),
+    'Thailand': (15.8700, 100.9925),
+    'Timor-Leste': (-8.8742, 125.7275),
+    'Togo': (8.6195, 0.8248),
+    'Tonga': (-21.1790, -175.1982),
+    'Trinidad and Tobago': (10.6918, -61.2225),
+    'Tunisia': (33.8869, 9.5375),
+    'Turkey': (38.9637, 35.2433),
+    'Turkmenistan': (38.9697, 59.5563),
+    'Tuvalu': (-7.1095, 177.6493),
+    'UAE': (23.4241, 53.8478),
+    'UK': (55.3781, -3.4360),
+    'USA': (37.0902, -95.7129),
+    'Uganda': (1.3733, 32.2903),
+    'Ukraine': (48.3794, 31.1656),
+    'Uruguay': (-32.5228, -55.7658),
+    'Uzbekistan': (41.3775, 64.5853),
+    'Vanuatu': (-15.3767, 166.9592),
+    'Vatican City': (41.9029, 12.4534),
+    'Venezuela': (6.4238, -66.5897),
+    'Vietnam': (14.0583, 108.2772),
+    'Yemen': (15.5527, 48.5164),
+    'Zambia': (-13.1339, 27.8493),
+    'Zimbabwe': (-19.0154, 29.1549),
+}
+
+# Major cities (lat, lon, country)
+CITIES = {
+    'Amsterdam': (52.3676, 4.9041, 'Netherlands'),
+    'Bangalore': (12.9716, 77.5946, 'India'),
+    'Bangkok': (13.7563, 100.5018, 'Thailand'),
+    'Beijing': (39.9042, 116.4074, 'China'),
+    'Berlin': (52.5200, 13.4050, 'Germany'),
+    'Buenos Aires': (-34.6037, -58.3816, 'Argentina'),
+    'Cairo': (30.0444, 31.2357, 'Egypt'),
+    'Chicago': (41.8781, -87.6298, 'USA'),
+    'Dallas': (32.7767, -96.7970, 'USA'),
+    'Delhi': (28.7041, 77.1025, 'India'),
+    'Dubai': (25.2048, 55.2708, 'UAE'),
+    'Dublin': (53.3498, -6.2603, 'Ireland'),
+    'Frankfurt': (50.1109, 8.6821, 'Germany'),
+    'Hanoi': (21.0278, 105.8342, 'Vietnam'),
+    'Ho Chi Minh City': (10.8231, 106.6297, 'Vietnam'),
+    'Istanbul': (41.0082, 28.9784, 'Turkey'),
+    'Jakarta': (-6.2088, 106.8456, 'Indonesia'),
+    'Johannesburg': (-26.2041, 28.0473, 'South Africa'),
+    'Kyiv': (50.4501, 30.5234, 'Ukraine'),
+    'Lagos': (6.5244, 3.3792, 'Nigeria'),
+    'London': (51.5074, -0.1278, 'UK'),
+    'Los Angeles': (34.0522, -118.2437, 'USA'),
+    'Madrid': (40.4168, -3.7038, 'Spain'),
+    'Manila': (14.5995, 120.9842, 'Philippines'),
+    'Melbourne': (-37.8136, 144.9631, 'Australia'),
+    'Mexico City': (19.4326, -99.1332, 'Mexico'),
+    'Milan': (45.4642, 9.1900, 'Italy'),
+    'Moscow': (55.7558, 37.6173, 'Russia'),
+    'Mumbai': (19.0760, 72.8777, 'India'),
+    'Nairobi': (-1.2921, 36.8219, 'Kenya'),
+    'New York': (40.7128, -74.0060, 'USA'),
+    'Osaka': (34.6937, 135.5023, 'Japan'),
+    'Paris': (48.8566, 2.3522, 'France'),
+    'Rome': (41.9028, 12.4964, 'Italy'),
+    'San Francisco': (37.7749, -122.4194, 'USA'),
+    'Sao Paulo': (-23.5505, -46.6333, 'Brazil'),
+    'Seattle': (47.6062, -122.3321, 'USA'),
+    'Seoul': (37.5665, 126.9780, 'South Korea'),
+    'Shanghai': (31.2304, 121.4737, 'China'),
+    'Shenzhen': (22.5431, 114.0579, 'China'),
+    'Stockholm': (59.3293, 18.0686, 'Sweden'),
+    'Sydney': (-33.8688, 151.2093, 'Australia'),
+    'Taipei': (25.0330, 121.5654, 'Taiwan'),
+    'Tehran': (35.6892, 51.3890, 'Iran'),
+    'Tel Aviv': (32.0853, 34.7818, 'Israel'),
+    'Tokyo': (35.6762, 139.6503, 'Japan'),
+    'Toronto': (43.6532, -79.3832, 'Canada'),
+    'Vancouver': (49.2827, -123.1207, 'Canada'),
+    'Warsaw': (52.2297, 21.0122, 'Poland'),
+    'Washington': (38.9072, -77.0369, 'USA'),
+    'Zurich': (47.3769, 8.5417, 'Switzerland'),
+}
+
+# Alternative spellings mapped to a COUNTRIES or CITIES key
+ALIASES = {
+    'Viet Nam': 'Vietnam',
+    'United States': 'USA',
+    'United States of America': 'USA',
+    'US': 'USA',
+    'U.S.': 'USA',
+    'U.S.A.': 'USA',
+    'America': 'USA',
+    'United Kingdom': 'UK',
+    'Great Britain': 'UK',
+    'Britain': 'UK',
+    'England': 'UK',
+    'U.K.': 'UK',
+    'United Arab Emirates': 'UAE',
+    'Russian Federation': 'Russia',
+    'Korea': 'South Korea',
+    'Republic of Korea': 'South Korea',
+    'Korea, Republic of': 'South Korea',
+    "Democratic People's Republic of Korea": 'North Korea',
+    'PRC': 'China',
+    "People's Republic of China": 'China',
+    'Czechia': 'Czech Republic',
+    'Türkiye': 'Turkey',
+    'Turkiye': 'Turkey',
+    'Iran, Islamic Republic of': 'Iran',
+    'Holland': 'Netherlands',
+    'The Netherlands': 'Netherlands',
+    'Deutschland': 'Germany',
+    "Côte d'Ivoire": 'Ivory Coast',
+    "Cote d'Ivoire": 'Ivory Coast',
+    'Democratic Republic of the Congo': 'DR Congo',
+    'Republic of the Congo': 'Congo',
+    'Swaziland': 'Eswatini',
+    'Macedonia': 'North Macedonia',
+    'Burma': 'Myanmar',
+    'Lao PDR': 'Laos',
+    'Syrian Arab Republic': 'Syria',
+    'East Timor': 'Timor-Leste',
+    'Cabo Verde': 'Cape Verde',
+    'Bengaluru': 'Bangalore',
+    'New Delhi': 'Delhi',
+    'Bombay': 'Mumbai',
+    'Saigon': 'Ho Chi Minh City',
+    'NYC': 'New York',
+    'New York City': 'New York',
+    'Washington, D.C.': 'Washington',
+    'Washington DC': 'Washington',
+    'São Paulo': 'Sao Paulo',
+    'Kiev': 'Kyiv',
+}
+
+
+def _normalize(name):
+    """Case- and whitespace-insensitive lookup key"""
+    return ' '.join(str(name).split()).casefold()
+
+
+@functools.lru_cache(maxsize=1)
+def _lookup_table():
+    """Normalized name -> (lat, lon, canonical place) for countries, cities and aliases"""
+    table = {}
+    for name, (lat, lon, _) in CITIES.items():
+        table[_normalize(name)] = (lat, lon, name)
+    # Countries win over cities of the same name
+    for name, (lat, lon) in COUNTRIES.items():
+        table[_normalize(name)] = (lat, lon, name)
+    for alias, target in ALIASES.items():
+        table.setdefault(_normalize(alias), table[_normalize(target)])
+    return table
+
+
+def _resolve(name):
+    """Coordinates of one location name, trying 'City, Country' parts in turn"""
+    table = _lookup_table()
+    hit = table.get(_normalize(name))
+    if hit is None and ',' in str(name):
+        for part in str(name).split(','):
+            hit = table.get(_normalize(part))
+            if hit is not None:
+                break
+    return hit
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_categories(categories):
+    """Per-category (lat, lon, place) arrays, cached per category set"""
+    hits = [_resolve(name) for name in categories]
+    lat = np.array([h[0] if h else np.nan for h in hits] + [np.nan])
+    lon = np.array([h[1] if h else np.nan for h in hits] + [np.nan])
+    place = np.array([h[2] if h else None for h in hits] + [None], dtype=object)
+    # Shared between callers through the cache
+    for array in (lat, lon, place):
+        array.flags.writeable = False
+    return lat, lon, place
+
+
+def geocode(series):
+    """
+    Join coordinates onto a location column through its categorical codes
+
+    Every distinct location is resolved once (countries, then cities, then
+    aliases; 'City, Country' strings fall back to their parts) and broadcast
+    to the rows with a single take.
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Country or city names
+
+    Returns:
+    --------
+    pd.DataFrame
+        'lat', 'lon' (NaN when unmatched) and the canonical 'place', aligned
+        with the input index
+    """
+    codes, categories = codes_and_categories(series)
+    lat, lon, place = _resolve_categories(tuple(categories))
+    return pd.DataFrame({
+        'lat': lat.take(codes),
+        'lon': lon.take(codes),
+        'place': place.take(codes),
+    }, index=series.index)
+
+
+def unmatched_locations(series):
+    """
+    Distinct non-null locations the gazetteer could not place
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Country or city names
+
+    Returns:
+    --------
+    list
+        Unmatched values, in order of first appearance
+    """
+    codes, categories = codes_and_categories(series)
+    lat, _, _ = _resolve_categories(tuple(categories))
+    observed = pd.unique(codes[codes >= 0])
+    return [categories[code] for code in observed if np.isnan(lat[code])]
+
+
+def unmatched_annotation(unmatched, color, shown=UNMATCHED_SHOWN):
+    """
+    Plotly annotation listing the locations a map could not place
+
+    Parameters:
+    -----------
+    unmatched : list
+        Output of unmatched_locations (or the unmatched rows' labels)
+    color : str
+        Text color
+    shown : int
+        Names listed before the rest are summarized as '(+N more)'
+
+    Returns:
+    --------
+    dict
+        Keyword arguments for fig.add_annotation
+    """
+    text = f"Not mapped: {', '.join(map(str, unmatched[:shown]))}"
+    if len(unmatched) > shown:
+        text += f" (+{len(unmatched) - shown} more)"
+    return dict(
+        text=text,
+        xref='paper', yref='paper', x=0.5, y=0.01, showarrow=False,
+        font=dict(size=10, color=color)
+    )
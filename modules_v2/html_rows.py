@@ -0,0 +1,114 @@
+"""
+HTML Rows Module
+Column-wise rendering of repeated HTML fragments: every field is formatted
+and escaped as a whole column, and a row template is filled by concatenating
+those columns instead of formatting row by row
+"""
+
+import html
+import string
+
+import numpy as np
+import pandas as pd
+
+from .category_ops import category_map
+
+
+def escaped(values):
+    """
+    HTML-escaped string form of every value
+
+    Escaping runs once per distinct value and is broadcast through the codes.
+
+    Parameters:
+    -----------
+    values : pd.Series or array-like
+        Values to display (str() of each, so numbers print as in an f-string)
+
+    Returns:
+    --------
+    np.ndarray
+        Object array of escaped strings
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    return category_map(series, lambda value: html.escape(str(value)), default='').to_numpy()
+
+
+def formatted(values, fmt):
+    """
+    printf-style formatting of a numeric column in one call (e.g. '%.2f')
+
+    Parameters:
+    -----------
+    values : array-like
+        Numbers
+    fmt : str
+        printf format with a single conversion
+
+    Returns:
+    --------
+    np.ndarray
+        Object array of strings
+    """
+    return np.char.mod(fmt, np.asarray(values)).astype(object)
+
+
+def thousands(values):
+    """Integers with thousands separators, like f'{value:,}'"""
+    return np.array([f'{value:,}' for value in np.asarray(values).tolist()], dtype=object)
+
+
+def formatted_timestamps(values, unit='s'):
+    """
+    Timestamps as 'YYYY-MM-DD HH:MM:SS' (unit='s') or 'YYYY-MM-DD' (unit='D')
+
+    Parameters:
+    -----------
+    values : pd.Series or array-like
+        datetime64 values
+    unit : str
+        numpy datetime unit to print down to
+
+    Returns:
+    --------
+    np.ndarray
+        Object array of strings
+    """
+    stamps = np.asarray(values, dtype='datetime64[ns]')
+    text = np.datetime_as_string(stamps, unit=unit)
+    return np.char.replace(text, 'T', ' ').astype(object)
+
+
+def render_rows(template, fields, sep=''):
+    """
+    Fill a str.format-style row template for every row and join the rows
+
+    Parameters:
+    -----------
+    template : str
+        Row template with {name} placeholders (no format specs; format the
+        columns beforehand) and {{ }} for literal braces
+    fields : dict
+        {name: array of already formatted and escaped strings}, one entry per row
+    sep : str
+        Separator placed between rows
+
+    Returns:
+    --------
+    str
+        All rendered rows
+    """
+    lengths = {len(column) for column in fields.values()}
+    if len(lengths) > 1:
+        raise ValueError("All fields must have the same number of rows")
+    n_rows = lengths.pop() if lengths else 0
+
+    rows = np.full(n_rows, '', dtype=object)
+    for literal, name, spec, conversion in string.Formatter().parse(template):
+        if literal:
+            rows = rows + literal
+        if name is not None:
+            if spec or conversion:
+                raise ValueError(f"Format the '{name}' column before rendering")
+            rows = rows + np.asarray(fields[name], dtype=object)
+    return sep.join(rows.tolist())
@@ -4,9 +4,13 @@ Terminal-style scrolling feed of recent attacks
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from .html_rows import escaped, formatted, formatted_timestamps, render_rows
+from .render_cache import cached_html, fingerprint
+
 COLORS = {
     'cyan': '#00f5ff',
     'purple': '#7b2ff7',
@@ -16,27 +20,7 @@ COLORS = {
     'text': '#b8c5d6',
 }
 
-def create_terminal_feed(df, n_recent=20):
-    """
-    Create terminal-style live attack feed
-    
-    Parameters:
-    -----------
-    df : pd.DataFrame
-        Attack data
-    n_recent : int
-        Number of recent attacks to show
-        
-    Returns:
-    --------
-    str
-        HTML for terminal feed
-    """
-    
-    # Get most recent attacks
-    recent_attacks = df.nlargest(n_recent, 'timestamp')
-    
-    feed_html = f"""
+FEED_HEADER = f"""
     <div style="
         background: rgba(0, 0, 0, 0.8);
         border: 1px solid {COLORS['cyan']};
@@ -55,80 +39,388 @@ def create_terminal_feed(df, n_recent=20):
             ┌─[darksentinel@security]─[~]
         </div>
     """
-    
-    for idx, attack in recent_attacks.iterrows():
-        # Determine severity color
-        severity = attack['attack_severity']
-        if severity >= 8:
-            sev_color = COLORS['pink']
-            sev_icon = '🔴'
-        elif severity >= 5:
-            sev_color = COLORS['orange']
-            sev_icon = '🟡'
-        else:
-            sev_color = COLORS['green']
-            sev_icon = '🟢'
-        
-        # Determine outcome color
-        outcome_color = COLORS['pink'] if attack['outcome'] == 'Success' else COLORS['green']
-        outcome_icon = '⚠️' if attack['outcome'] == 'Success' else '✓'
-        
-        timestamp_str = attack['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        feed_html += f"""
-        <div style="margin: 10px 0; padding: 10px; background: rgba(255, 255, 255, 0.02); border-left: 3px solid {sev_color}; border-radius: 5px;">
+
+# Placeholders are filled column-wise by render_rows
+FEED_ROW_TEMPLATE = f"""
+        <div style="margin: 10px 0; padding: 10px; background: rgba(255, 255, 255, 0.02); border-left: 3px solid {{sev_color}}; border-radius: 5px;">
             <div style="color: {COLORS['cyan']};">
-                └─$ [{timestamp_str}] {sev_icon} SEVERITY: {severity}/10
+                └─$ [{{timestamp}}] {{sev_icon}} SEVERITY: {{severity}}/10
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                ├─ TYPE: <span style="color: {COLORS['pink']};">{attack['attack_type']}</span>
+                ├─ TYPE: <span style="color: {COLORS['pink']};">{{attack_type}}</span>
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                ├─ TARGET: <span style="color: white;">{attack['target_system']}</span> @ {attack['location']}
+                ├─ TARGET: <span style="color: white;">{{target_system}}</span> @ {{location}}
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                ├─ SOURCE: <span style="color: {COLORS['orange']};">{attack['attacker_ip']}</span> → {attack['target_ip']}
+                ├─ SOURCE: <span style="color: {COLORS['orange']};">{{attacker_ip}}</span> → {{target_ip}}
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                ├─ DATA LOSS: <span style="color: {COLORS['pink']};">{attack['data_compromised_GB']:.2f} GB</span>
+                ├─ DATA LOSS: <span style="color: {COLORS['pink']};">{{data_loss}} GB</span>
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                ├─ DURATION: {attack['attack_duration_min']} min | RESPONSE: {attack['response_time_min']} min
+                ├─ DURATION: {{duration}} min | RESPONSE: {{response}} min
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                ├─ MITIGATION: <span style="color: {COLORS['green']};">{attack['mitigation_method']}</span>
+                ├─ MITIGATION: <span style="color: {COLORS['green']};">{{mitigation}}</span>
             </div>
             <div style="color: {COLORS['purple']}; margin-left: 20px;">
-                └─ STATUS: <span style="color: {outcome_color};">{outcome_icon} {attack['outcome']}</span>
+                └─ STATUS: <span style="color: {{outcome_color}};">{{outcome_icon}} {{outcome}}</span>
             </div>
         </div>
         """
+
+FEED_COLUMNS = [
+    'timestamp', 'attack_type', 'target_system', 'location', 'attacker_ip', 'target_ip',
+    'attack_severity', 'data_compromised_GB', 'attack_duration_min', 'response_time_min',
+    'mitigation_method', 'outcome',
+]
+TICKER_COLUMNS = ['attack_type', 'target_system', 'location', 'data_compromised_GB']
+TOP_ATTACK_COLUMNS = ['timestamp', 'attack_type', 'target_system', 'location', 'attack_severity', 'data_compromised_GB']
+
+TICKER_ITEM_TEMPLATE = "🚨 {attack_type} on {target_system} in {location} - {data_loss}GB lost"
+
+TOP_ATTACK_ROW_TEMPLATE = (
+    "<tr>\n<td style='padding:8px'>{date}</td>\n<td style='padding:8px'>{attack_type}</td>\n"
+    "<td style='padding:8px'>{target_system}</td>\n<td style='padding:8px'>{location}</td>\n"
+    "<td style='padding:8px'>{severity}</td>\n<td style='padding:8px'>{data_loss} GB</td>\n</tr>"
+)
+
+def create_terminal_feed(df, n_recent=20):
+    """
+    Create terminal-style live attack feed
     
-    feed_html += """
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Attack data
+    n_recent : int
+        Number of recent attacks to show
+        
+    Returns:
+    --------
+    str
+        HTML for terminal feed
+    """
+    
+    # Get most recent attacks
+    recent_attacks = df.nlargest(n_recent, 'timestamp')[FEED_COLUMNS]
+    
+    return _render_terminal_feed(recent_attacks)
+
+@cached_html
+def _render_terminal_feed(recent_attacks):
+    """Terminal feed HTML for the selected rows (memoized on their content)"""
+    return FEED_HEADER + _render_feed_rows(recent_attacks) + _feed_footer('[EOF] End of feed')
+
+def _render_feed_rows(rows):
+    """Feed entries for the given rows, newest first"""
+    severity = rows['attack_severity']
+    success = (rows['outcome'] == 'Success').to_numpy()
+    return render_rows(FEED_ROW_TEMPLATE, {
+        'timestamp': formatted_timestamps(rows['timestamp']),
+        'sev_color': np.select([severity >= 8, severity >= 5], [COLORS['pink'], COLORS['orange']], COLORS['green']),
+        'sev_icon': np.select([severity >= 8, severity >= 5], ['🔴', '🟡'], '🟢'),
+        'severity': escaped(severity),
+        'attack_type': escaped(rows['attack_type']),
+        'target_system': escaped(rows['target_system']),
+        'location': escaped(rows['location']),
+        'attacker_ip': escaped(rows['attacker_ip']),
+        'target_ip': escaped(rows['target_ip']),
+        'data_loss': formatted(rows['data_compromised_GB'], '%.2f'),
+        'duration': escaped(rows['attack_duration_min']),
+        'response': escaped(rows['response_time_min']),
+        'mitigation': escaped(rows['mitigation_method']),
+        'outcome_color': np.where(success, COLORS['pink'], COLORS['green']),
+        'outcome_icon': np.where(success, '⚠️', '✓'),
+        'outcome': escaped(rows['outcome']),
+    })
+
+def _feed_footer(status):
+    """Closing status line and scrollbar styles of the terminal block"""
+    return f"""
         <div style="color: #00ff88; margin-top: 15px;">
-            └─[EOF] End of feed
+            └─{status}
         </div>
     </div>
     
     <style>
         /* Custom scrollbar for terminal */
-        div::-webkit-scrollbar {
+        div::-webkit-scrollbar {{
             width: 8px;
-        }
-        div::-webkit-scrollbar-track {
+        }}
+        div::-webkit-scrollbar-track {{
             background: rgba(0, 0, 0, 0.5);
-        }
-        div::-webkit-scrollbar-thumb {
+        }}
+        div::-webkit-scrollbar-thumb {{
             background: #00f5ff;
             border-radius: 4px;
-        }
-        div::-webkit-scrollbar-thumb:hover {
+        }}
+        div::-webkit-scrollbar-thumb:hover {{
             background: #7b2ff7;
-        }
+        }}
     </style>
     """
+
+FEED_PAGE_SIZE = 20
+# Pages whose cursors are kept (a few ints each) and pages kept rendered;
+# any other visited page is rendered again from its cursor when shown
+FEED_MAX_PAGES = 250
+FEED_RENDERED_PAGES = 5
+
+def _feed_keys(df):
+    """(timestamp in ns, row id) sort keys of every row; row ids are the integer index labels"""
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    return timestamps, np.asarray(df.index, dtype=np.int64)
+
+def _newest(timestamps, ids, candidates, limit):
+    """Positions of the newest rows among candidates, newest first"""
+    if limit is not None and len(candidates) > limit:
+        # Partition on the timestamp alone, then break ties on the few rows at the threshold
+        candidate_times = timestamps[candidates]
+        threshold = np.partition(candidate_times, len(candidates) - limit)[len(candidates) - limit]
+        candidates = candidates[candidate_times >= threshold]
+    order = np.lexsort((ids[candidates], timestamps[candidates]))[::-1]
+    return candidates[order[:limit]]
+
+def _cursor(timestamps, ids, position):
+    """Cursor of the row at a position, as plain ints"""
+    return int(timestamps[position]), int(ids[position])
+
+def feed_page(df, before=None, page_size=FEED_PAGE_SIZE):
+    """
+    One page of the feed, newest first, strictly older than a cursor
     
-    return feed_html
+    Keyset pagination on (timestamp, row id): each page costs one pass over
+    the frame and a partial sort of the page, however deep the page is.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Attack data with a 'timestamp' column and integer index labels
+    before : tuple, optional
+        Cursor (timestamp ns, row id) of the last row already shown; None
+        starts from the newest row
+    page_size : int
+        Rows per page
+        
+    Returns:
+    --------
+    tuple
+        (rows of the page, cursor of its last row or None when no older rows remain)
+    """
+    timestamps, ids = _feed_keys(df)
+    if before is None:
+        candidates = np.arange(len(df))
+    else:
+        cursor_time, cursor_id = before
+        candidates = np.flatnonzero((timestamps < cursor_time) | ((timestamps == cursor_time) & (ids < cursor_id)))
+    
+    positions = _newest(timestamps, ids, candidates, page_size)
+    cursor = _cursor(timestamps, ids, positions[-1]) if len(candidates) > page_size else None
+    return df.iloc[positions], cursor
+
+def feed_newer(df, after, limit=None):
+    """
+    Rows strictly newer than a cursor, newest first
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Attack data with a 'timestamp' column and integer index labels
+    after : tuple
+        Cursor (timestamp ns, row id) of the newest row already shown
+    limit : int, optional
+        Keep only the newest rows
+        
+    Returns:
+    --------
+    pd.DataFrame
+        New rows, newest first
+    """
+    timestamps, ids = _feed_keys(df)
+    cursor_time, cursor_id = after
+    candidates = np.flatnonzero((timestamps > cursor_time) | ((timestamps == cursor_time) & (ids > cursor_id)))
+    return df.iloc[_newest(timestamps, ids, candidates, limit)]
+
+def _row_cursor(rows, position):
+    """Cursor of one row of an already selected page"""
+    timestamps, ids = _feed_keys(rows.iloc[[position]])
+    return _cursor(timestamps, ids, 0)
+
+def _keep_rendered(state, end, html):
+    """Remember a rendered page, keeping only the FEED_RENDERED_PAGES most recently shown"""
+    rendered = state['rendered']
+    rendered.pop(end, None)
+    rendered[end] = html
+    while len(rendered) > FEED_RENDERED_PAGES:
+        del rendered[next(iter(rendered))]
+
+def new_feed_state(df, signature=None, page_size=FEED_PAGE_SIZE):
+    """
+    Paged feed state holding the first page, rendered once
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Attack data
+    signature : any, optional
+        Filter state that produced df; a different signature starts a new feed
+    page_size : int
+        Rows per page
+        
+    Returns:
+    --------
+    dict
+        {'signature', 'page_size', 'counts' (rows per page, newest first),
+         'ends' (cursor of the last row of each page), 'rendered' (HTML of
+         the recently shown pages, keyed by their end cursor), 'head' (cursor
+         of the newest row), 'tail' (cursor to load older rows from, None
+         when exhausted), 'page' (visible page index)}
+    """
+    rows, tail = feed_page(df[FEED_COLUMNS], page_size=page_size)
+    state = {
+        'signature': fingerprint(signature),
+        'page_size': page_size,
+        'counts': [len(rows)] if len(rows) else [],
+        'ends': [_row_cursor(rows, -1)] if len(rows) else [],
+        'rendered': {},
+        'head': _row_cursor(rows, 0) if len(rows) else None,
+        'tail': tail,
+        'page': 0,
+    }
+    if len(rows):
+        _keep_rendered(state, state['ends'][0], _render_feed_rows(rows))
+    return state
+
+def prepend_new_events(state, df):
+    """
+    Record the pages of rows newer than the head of the feed
+    
+    Only their cursors are kept; they are rendered when shown. The visible
+    page stays on the same rows unless it was the newest one.
+    
+    Returns:
+    --------
+    int
+        Number of new rows
+    """
+    if state['head'] is None:
+        fresh = new_feed_state(df, page_size=state['page_size'])
+        fresh['signature'] = state['signature']
+        state.update(fresh)
+        return sum(state['counts'])
+    
+    page_size = state['page_size']
+    rows = feed_newer(df[FEED_COLUMNS], state['head'], limit=FEED_MAX_PAGES * page_size)
+    if len(rows) == 0:
+        return 0
+    
+    chunks = [rows.iloc[start:start + page_size] for start in range(0, len(rows), page_size)]
+    state['counts'][:0] = [len(chunk) for chunk in chunks]
+    state['ends'][:0] = [_row_cursor(chunk, -1) for chunk in chunks]
+    state['head'] = _row_cursor(rows, 0)
+    if state['page'] > 0:
+        state['page'] += len(chunks)
+    
+    # Bound the retained history; older pages can be loaded again from the tail
+    if len(state['counts']) > FEED_MAX_PAGES:
+        for name in ('counts', 'ends'):
+            del state[name][FEED_MAX_PAGES:]
+        state['tail'] = state['ends'][-1]
+        state['page'] = min(state['page'], FEED_MAX_PAGES - 1)
+    return len(rows)
+
+def load_older_page(state, df):
+    """
+    Render the next older page after the tail cursor and append it
+    
+    Returns:
+    --------
+    bool
+        Whether a page was added
+    """
+    if state['tail'] is None:
+        return False
+    rows, state['tail'] = feed_page(df[FEED_COLUMNS], before=state['tail'], page_size=state['page_size'])
+    if len(rows) == 0:
+        return False
+    state['counts'].append(len(rows))
+    state['ends'].append(_row_cursor(rows, -1))
+    _keep_rendered(state, state['ends'][-1], _render_feed_rows(rows))
+    return True
+
+def page_html(state, df, page):
+    """
+    Feed entries of a loaded page, rendered again from its cursors if evicted
+    
+    Page i holds the counts[i] rows right below the end of page i - 1; the
+    first page starts at the head (row ids are integers, so the head id + 1
+    is a cursor just above it).
+    """
+    end = state['ends'][page]
+    html = state['rendered'].get(end)
+    if html is None:
+        head_time, head_id = state['head']
+        before = state['ends'][page - 1] if page else (head_time, head_id + 1)
+        rows, _ = feed_page(df[FEED_COLUMNS], before=before, page_size=state['counts'][page])
+        html = _render_feed_rows(rows)
+    _keep_rendered(state, end, html)
+    return html
+
+def _show_page(key, df, step):
+    """Button callback: move the visible page, loading an older page when needed"""
+    state = st.session_state[key]
+    target = state['page'] + step if step else 0
+    if target >= len(state['counts']):
+        load_older_page(state, df)
+    state['page'] = max(0, min(target, len(state['counts']) - 1))
+
+def render_live_feed(df, signature=None, page_size=FEED_PAGE_SIZE, key='live_feed'):
+    """
+    Paged terminal feed with newer/older navigation
+    
+    Only the visible page is sent to the browser. The session keeps the
+    cursors of every loaded page but the HTML of only the last
+    FEED_RENDERED_PAGES shown; a rerun with the same signature records just
+    the events newer than the head of the feed.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Attack data (integer index labels serve as row ids)
+    signature : any, optional
+        Filter state that produced df (e.g. the sidebar filters dict)
+    page_size : int
+        Rows per page
+    key : str
+        Session state key of the feed
+    """
+    state = st.session_state.get(key)
+    if state is None or state['signature'] != fingerprint(signature) or state['page_size'] != page_size:
+        state = st.session_state[key] = new_feed_state(df, signature, page_size)
+    else:
+        prepend_new_events(state, df)
+    
+    page = state['page']
+    shown = sum(state['counts'][:page])
+    if state['counts']:
+        status = f"[{shown + 1:,}-{shown + state['counts'][page]:,}] page {page + 1} of {len(state['counts'])} loaded"
+        if state['tail'] is None and page == len(state['counts']) - 1:
+            status += " · [EOF] End of feed"
+        body = page_html(state, df, page)
+    else:
+        status, body = "[EOF] No events", ""
+    
+    col1, col2, col3 = st.columns(3)
+    col1.button("⏮ Latest", key=f"{key}_latest", disabled=page == 0,
+                on_click=_show_page, args=(key, df, 0), width='stretch')
+    col2.button("◀ Newer", key=f"{key}_newer", disabled=page == 0,
+                on_click=_show_page, args=(key, df, -1), width='stretch')
+    col3.button("Older ▶", key=f"{key}_older",
+                disabled=state['tail'] is None and page >= len(state['counts']) - 1,
+                on_click=_show_page, args=(key, df, 1), width='stretch')
+    st.markdown(FEED_HEADER + body + _feed_footer(status), unsafe_allow_html=True)
 
 def create_attack_ticker(df, n_items=10):
     """
@@ -147,27 +439,38 @@ def create_attack_ticker(df, n_items=10):
         HTML for ticker
     """
     
+    # Row positions are picked on arrays, so only the shown rows are ever taken
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    severity = pd.to_numeric(df['attack_severity'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    dated = ~np.isnat(timestamps)
+    
     # Get critical attacks (severity >= 8), fallback to high severity (>= 7) if not enough
-    critical = df[df['attack_severity'] >= 8].nlargest(n_items, 'timestamp')
+    candidates = np.flatnonzero(dated & (severity >= 8))
     
     # If we don't have enough critical attacks, add high severity ones
-    if len(critical) < n_items:
-        high_severity = df[df['attack_severity'] >= 7].nlargest(n_items, 'timestamp')
-        critical = high_severity
+    if len(candidates) < n_items:
+        candidates = np.flatnonzero(dated & (severity >= 7))
     
     # Ensure we have at least some items
-    if len(critical) == 0:
-        critical = df.nlargest(min(n_items, len(df)), 'timestamp')
+    if len(candidates) == 0:
+        candidates = np.flatnonzero(dated)
     
-    ticker_items = []
-    for idx, attack in critical.iterrows():
-        ticker_items.append(
-            f"🚨 {attack['attack_type']} on {attack['target_system']} "
-            f"in {attack['location']} - {attack['data_compromised_GB']:.1f}GB lost"
-        )
+    # Latest first; ties keep the earlier row, like nlargest
+    latest = candidates[np.argsort(-timestamps[candidates].view(np.int64), kind='stable')[:n_items]]
+    return _render_attack_ticker(df[TICKER_COLUMNS].iloc[latest])
+
+@cached_html
+def _render_attack_ticker(critical):
+    """Ticker HTML for the selected rows (memoized on their content)"""
+    ticker_items = render_rows(TICKER_ITEM_TEMPLATE, {
+        'attack_type': escaped(critical['attack_type']),
+        'target_system': escaped(critical['target_system']),
+        'location': escaped(critical['location']),
+        'data_loss': formatted(critical['data_compromised_GB'], '%.1f'),
+    }, sep=" | ")
     
     # Duplicate ticker items for seamless loop
-    ticker_text = " | ".join(ticker_items) + " | " + " | ".join(ticker_items)
+    ticker_text = ticker_items + " | " + ticker_items
     
     ticker_html = f"""
     <div style="
@@ -207,14 +510,28 @@ def create_top_attacks(df, n=10):
         """
         # Sort by severity then data loss
         if 'attack_severity' in df.columns:
-                top = df.sort_values(['attack_severity', 'data_compromised_GB'], ascending=False).head(n)
+                top = df.nlargest(n, ['attack_severity', 'data_compromised_GB'])
         else:
-                top = df.sort_values('data_compromised_GB', ascending=False).head(n)
+                top = df.nlargest(n, 'data_compromised_GB')
+
+        return _render_top_attacks(top[[c for c in TOP_ATTACK_COLUMNS if c in top.columns]], n)
+
+
+@cached_html
+def _render_top_attacks(top, n):
+        """Top attacks table HTML for the selected rows (memoized on their content)"""
+        def column(name, default):
+                return top[name] if name in top.columns else pd.Series(default, index=top.index)
 
-        rows = []
-        for _, a in top.iterrows():
-                ts = pd.to_datetime(a.get('timestamp', pd.Timestamp.now()))
-                rows.append(f"<tr>\n<td style='padding:8px'>{ts.strftime('%Y-%m-%d')}</td>\n<td style='padding:8px'>{a.get('attack_type','Unknown')}</td>\n<td style='padding:8px'>{a.get('target_system','Unknown')}</td>\n<td style='padding:8px'>{a.get('location','Unknown')}</td>\n<td style='padding:8px'>{a.get('attack_severity',0)}</td>\n<td style='padding:8px'>{a.get('data_compromised_GB',0):.1f} GB</td>\n</tr>")
+        timestamps = pd.to_datetime(column('timestamp', pd.Timestamp.now()))
+        rows = render_rows(TOP_ATTACK_ROW_TEMPLATE, {
+                'date': formatted_timestamps(timestamps, unit='D'),
+                'attack_type': escaped(column('attack_type', 'Unknown')),
+                'target_system': escaped(column('target_system', 'Unknown')),
+                'location': escaped(column('location', 'Unknown')),
+                'severity': escaped(column('attack_severity', 0)),
+                'data_loss': formatted(column('data_compromised_GB', 0), '%.1f'),
+        })
 
         table_html = f"""
         <div style="background: rgba(0,0,0,0.6); border:1px solid {COLORS['cyan']}; border-radius:10px; padding:12px;">
@@ -226,7 +543,7 @@ def create_top_attacks(df, n=10):
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join(rows)}
+                    {rows}
                 </tbody>
             </table>
         </div>
@@ -0,0 +1,317 @@
+"""
+Quantile Sketch Module
+Mergeable t-digest sketches built per partition and per category at ingest,
+so percentiles over any filter come from merging sketches instead of sorting rows
+"""
+
+import numpy as np
+import pandas as pd
+
+# Roughly compression/2 centroids per digest; centroids shrink towards the
+# tails, where the SLA percentiles (p95/p99) live
+DEFAULT_COMPRESSION = 200
+
+
+def _scale_bucket(q, compression):
+    """k1 scale function of the t-digest, floored to integer centroid buckets"""
+    q = np.clip(q, 0.0, 1.0)
+    return np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+
+
+def _compress(groups, values, weights, compression):
+    """
+    Collapse sorted (group, value) points into centroids, all groups at once
+
+    Parameters:
+    -----------
+    groups : np.ndarray
+        Group id per point, sorted ascending (ties ordered by value)
+    values : np.ndarray
+        Point or centroid means
+    weights : np.ndarray
+        Point or centroid weights
+
+    Returns:
+    --------
+    tuple
+        (groups, means, weights) of the resulting centroids
+    """
+    if len(values) == 0:
+        return groups[:0], values[:0].astype(float), weights[:0].astype(float)
+
+    boundaries = np.r_[True, groups[1:] != groups[:-1]]
+    group_starts = np.flatnonzero(boundaries)
+    cumulative = np.cumsum(weights)
+    offsets = np.repeat(np.r_[0.0, cumulative[group_starts[1:] - 1]], np.diff(np.r_[group_starts, len(values)]))
+    totals = np.add.reduceat(weights, group_starts)
+    totals = np.repeat(totals, np.diff(np.r_[group_starts, len(values)]))
+
+    # Quantile of each point's midpoint within its own group
+    q_mid = (cumulative - offsets - weights / 2) / totals
+    buckets = _scale_bucket(q_mid, compression)
+
+    starts = np.flatnonzero(boundaries | np.r_[True, buckets[1:] != buckets[:-1]])
+    centroid_weights = np.add.reduceat(weights, starts)
+    centroid_means = np.add.reduceat(values * weights, starts) / centroid_weights
+    return groups[starts], centroid_means, centroid_weights
+
+
+def build_digest(values, compression=DEFAULT_COMPRESSION):
+    """
+    Build a t-digest from raw values
+
+    Parameters:
+    -----------
+    values : array-like
+        Numeric values (NaNs are ignored)
+    compression : int
+        Digest compression (accuracy vs size)
+
+    Returns:
+    --------
+    dict
+        {'means', 'weights', 'min', 'max'}
+    """
+    values = np.asarray(values, dtype=float)
+    values = np.sort(values[~np.isnan(values)])
+    groups = np.zeros(len(values), dtype=np.int64)
+    _, means, weights = _compress(groups, values, np.ones(len(values)), compression)
+    return {
+        'means': means,
+        'weights': weights,
+        'min': values[0] if len(values) else np.nan,
+        'max': values[-1] if len(values) else np.nan,
+    }
+
+
+def merge_digests(digests, compression=DEFAULT_COMPRESSION):
+    """
+    Merge several digests into one
+
+    Parameters:
+    -----------
+    digests : iterable of dict
+        Digests from build_digest / merge_digests
+    compression : int
+        Compression of the merged digest
+
+    Returns:
+    --------
+    dict
+        Merged digest
+    """
+    digests = [d for d in digests if len(d['weights'])]
+    if not digests:
+        return build_digest([], compression)
+    means = np.concatenate([d['means'] for d in digests])
+    weights = np.concatenate([d['weights'] for d in digests])
+    return _merge_centroids(
+        means, weights,
+        min(d['min'] for d in digests), max(d['max'] for d in digests),
+        compression
+    )
+
+
+def _merge_centroids(means, weights, lo, hi, compression):
+    """Recompress an unsorted bag of centroids into a single digest"""
+    order = np.argsort(means, kind='stable')
+    groups = np.zeros(len(means), dtype=np.int64)
+    _, merged_means, merged_weights = _compress(groups, means[order], weights[order], compression)
+    return {'means': merged_means, 'weights': merged_weights, 'min': lo, 'max': hi}
+
+
+def digest_quantile(digest, qs):
+    """
+    Estimate quantiles from a digest
+
+    Parameters:
+    -----------
+    digest : dict
+        Digest to query
+    qs : float or array-like
+        Quantiles in [0, 1]
+
+    Returns:
+    --------
+    float or np.ndarray
+        Estimated quantile values (NaN for an empty digest)
+    """
+    qs_array = np.atleast_1d(np.asarray(qs, dtype=float))
+    weights = digest['weights']
+    if len(weights) == 0:
+        result = np.full(len(qs_array), np.nan)
+    else:
+        total = weights.sum()
+        centers = np.cumsum(weights) - weights / 2
+        positions = np.r_[0.0, centers, total]
+        anchors = np.r_[digest['min'], digest['means'], digest['max']]
+        result = np.interp(qs_array * total, positions, anchors)
+    return result if np.ndim(qs) else float(result[0])
+
+
+def digest_count(digest):
+    """Number of values summarized by a digest"""
+    return float(np.sum(digest['weights']))
+
+
+def build_sketch_index(df, measures, dims, partition=None, compression=DEFAULT_COMPRESSION):
+    """
+    Build one digest per (partition, category) group and per measure
+
+    All groups of a measure are compressed in a single vectorized pass
+    (one lexsort), so ingest cost is independent of the number of groups.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Source data
+    measures : list of str
+        Numeric columns to sketch
+    dims : list of str
+        Categorical columns each digest is keyed by
+    partition : array-like, optional
+        Integer partition key per row (e.g. month id); None for no partitioning
+    compression : int
+        Digest compression
+
+    Returns:
+    --------
+    dict
+        {'dims', 'compression', 'partitioned': level, 'total': level} where a
+        level is {'groups': pd.DataFrame of keys, 'measures': {measure: centroids}}
+    """
+    keys = df[dims].copy()
+    if partition is not None:
+        keys.insert(0, 'partition', np.asarray(partition))
+
+    index = {'dims': list(dims), 'compression': compression, 'partitioned': None}
+    if partition is not None:
+        index['partitioned'] = _build_level(df, keys, measures, compression)
+    index['total'] = _build_level(df, keys[list(dims)], measures, compression)
+    return index
+
+
+def _build_level(df, keys, measures, compression):
+    """Group digests for one key layout"""
+    group_ids, groups = pd.MultiIndex.from_frame(keys).factorize(sort=True)
+    groups = groups.to_frame(index=False)
+    groups.columns = keys.columns
+    level = {'groups': groups, 'measures': {}}
+
+    for measure in measures:
+        values = pd.to_numeric(df[measure], errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(values) & (group_ids >= 0)
+        codes, vals = group_ids[valid], values[valid]
+        order = np.lexsort((vals, codes))
+        codes, vals = codes[order], vals[order]
+
+        centroid_groups, means, weights = _compress(codes, vals, np.ones(len(vals)), compression)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=int)
+        group_min = np.full(len(groups), np.nan)
+        group_max = np.full(len(groups), np.nan)
+        if len(codes):
+            group_min[codes[starts]] = vals[starts]
+            group_max[codes[starts]] = vals[np.r_[starts[1:], len(vals)] - 1]
+
+        level['measures'][measure] = {
+            'groups': centroid_groups,
+            'means': means,
+            'weights': weights,
+            'min': group_min,
+            'max': group_max,
+        }
+    return level
+
+
+def query_digest(index, measure, selections=None, partitions=None):
+    """
+    Merge the digests matching a selection into one
+
+    Parameters:
+    -----------
+    index : dict
+        Output of build_sketch_index
+    measure : str
+        Sketched measure
+    selections : dict, optional
+        {dim: allowed values} restrictions on the indexed dimensions
+    partitions : iterable, optional
+        Partition keys to include; None merges the whole (unpartitioned) range
+
+    Returns:
+    --------
+    dict
+        Merged digest
+    """
+    if partitions is None:
+        level = index['total']
+    else:
+        level = index['partitioned']
+        if level is None:
+            raise ValueError("Sketch index was built without partitions")
+
+    groups = level['groups']
+    mask = np.ones(len(groups), dtype=bool)
+    for dim, allowed in (selections or {}).items():
+        mask &= groups[dim].isin(allowed).to_numpy()
+    if partitions is not None:
+        mask &= groups['partition'].isin(list(partitions)).to_numpy()
+
+    sketch = level['measures'][measure]
+    selected = mask[sketch['groups']]
+    if not selected.any():
+        return build_digest([], index['compression'])
+    return _merge_centroids(
+        sketch['means'][selected], sketch['weights'][selected],
+        np.nanmin(sketch['min'][mask]), np.nanmax(sketch['max'][mask]),
+        index['compression']
+    )
+
+
+def percentile_table(index, measure, by, qs=(0.5, 0.95, 0.99), selections=None, partitions=None,
+                     extra=None):
+    """
+    Percentiles of a measure for every value of one indexed dimension
+
+    Parameters:
+    -----------
+    index : dict
+        Output of build_sketch_index
+    measure : str
+        Sketched measure
+    by : str
+        Indexed dimension to break down by (e.g. 'industry')
+    qs : tuple of float
+        Quantiles to report
+    selections, partitions :
+        Same as query_digest
+    extra : dict, optional
+        {category value: digest} merged into that category (e.g. rows the
+        index does not cover)
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per category with a count and a 'pNN' column per quantile
+    """
+    level = index['total'] if partitions is None else index['partitioned']
+    extra = extra or {}
+    values = list(pd.unique(level['groups'][by]))
+    values += [value for value in extra if value not in set(values)]
+    rows = []
+    for value in values:
+        restricted = dict(selections or {})
+        allowed = restricted.get(by)
+        if allowed is not None and value not in allowed:
+            continue
+        restricted[by] = [value]
+        digest = query_digest(index, measure, restricted, partitions)
+        if value in extra:
+            digest = merge_digests([digest, extra[value]], index['compression'])
+        if digest_count(digest) == 0:
+            continue
+        row = {by: value, 'count': int(digest_count(digest))}
+        for q, estimate in zip(qs, digest_quantile(digest, list(qs))):
+            row[f'p{q * 100:g}'] = estimate
+        rows.append(row)
+    return pd.DataFrame(rows)
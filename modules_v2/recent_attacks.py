@@ -4,8 +4,12 @@ Replaces terminal feed with clean, professional table
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 
+from .html_rows import escaped, formatted, render_rows, thousands
+from .render_cache import cached_html
+
 COLORS = {
     'cyan': '#4dd0e1',
     'purple': '#7b2ff7',
@@ -14,6 +18,42 @@ COLORS = {
     'orange': '#ffaa00',
 }
 
+TABLE_COLUMNS = [
+    'Year', 'Country', 'Attack Type', 'Target Industry', 'Financial Loss (in Million $)',
+    'Number of Affected Users', 'Severity_Score',
+]
+
+# Placeholders are filled column-wise by render_rows
+ATTACK_ROW_TEMPLATE = f"""
+            <tr style="border-bottom: 1px solid rgba(255, 255, 255, 0.1); transition: background 0.3s;" 
+                onmouseover="this.style.background='rgba(77, 208, 225, 0.05)'" 
+                onmouseout="this.style.background='transparent'">
+                <td style="padding: 12px; color: white;">{{year}}</td>
+                <td style="padding: 12px; color: {COLORS['purple']}; font-weight: 600;">{{country}}</td>
+                <td style="padding: 12px; color: {COLORS['pink']};">{{attack_type}}</td>
+                <td style="padding: 12px; color: #b8c5d6;">{{industry}}</td>
+                <td style="padding: 12px; text-align: right; color: {COLORS['orange']}; font-weight: bold;">
+                    ${{loss}}M
+                </td>
+                <td style="padding: 12px; text-align: right; color: white;">
+                    {{users}}
+                </td>
+                <td style="padding: 12px; text-align: center;">
+                    <span style="
+                        background: rgba(255, 255, 255, 0.1);
+                        padding: 4px 12px;
+                        border-radius: 20px;
+                        color: {{severity_color}};
+                        font-size: 11px;
+                        font-weight: 600;
+                        border: 1px solid {{severity_color}};
+                    ">
+                        {{severity_icon}} {{severity_label}}
+                    </span>
+                </td>
+            </tr>
+        """
+
 def create_recent_attacks_table(df, n=10):
     """
     Create clean table showing top N critical attacks
@@ -33,7 +73,13 @@ def create_recent_attacks_table(df, n=10):
     
     # Get top attacks by financial loss
     top_attacks = df.nlargest(n, 'Financial Loss (in Million $)')
+    top_attacks = top_attacks[[c for c in TABLE_COLUMNS if c in top_attacks.columns]]
     
+    return _render_recent_attacks_table(top_attacks, n)
+
+@cached_html
+def _render_recent_attacks_table(top_attacks, n):
+    """Recent attacks table HTML for the selected rows (memoized on their content)"""
     table_html = f"""
     <div style="
         background: rgba(255, 255, 255, 0.03);
@@ -69,51 +115,20 @@ def create_recent_attacks_table(df, n=10):
             <tbody>
     """
     
-    for idx, row in top_attacks.iterrows():
-        # Determine severity color
-        severity_score = row.get('Severity_Score', row['Financial Loss (in Million $)'] / 10)
-        if severity_score >= 8:
-            severity_color = COLORS['pink']
-            severity_icon = '🔴'
-            severity_label = 'CRITICAL'
-        elif severity_score >= 5:
-            severity_color = COLORS['orange']
-            severity_icon = '🟡'
-            severity_label = 'HIGH'
-        else:
-            severity_color = COLORS['green']
-            severity_icon = '🟢'
-            severity_label = 'MEDIUM'
-        
-        table_html += f"""
-            <tr style="border-bottom: 1px solid rgba(255, 255, 255, 0.1); transition: background 0.3s;" 
-                onmouseover="this.style.background='rgba(77, 208, 225, 0.05)'" 
-                onmouseout="this.style.background='transparent'">
-                <td style="padding: 12px; color: white;">{row['Year']}</td>
-                <td style="padding: 12px; color: {COLORS['purple']}; font-weight: 600;">{row['Country']}</td>
-                <td style="padding: 12px; color: {COLORS['pink']};">{row['Attack Type']}</td>
-                <td style="padding: 12px; color: #b8c5d6;">{row['Target Industry']}</td>
-                <td style="padding: 12px; text-align: right; color: {COLORS['orange']}; font-weight: bold;">
-                    ${row['Financial Loss (in Million $)']:.2f}M
-                </td>
-                <td style="padding: 12px; text-align: right; color: white;">
-                    {row['Number of Affected Users']:,}
-                </td>
-                <td style="padding: 12px; text-align: center;">
-                    <span style="
-                        background: rgba(255, 255, 255, 0.1);
-                        padding: 4px 12px;
-                        border-radius: 20px;
-                        color: {severity_color};
-                        font-size: 11px;
-                        font-weight: 600;
-                        border: 1px solid {severity_color};
-                    ">
-                        {severity_icon} {severity_label}
-                    </span>
-                </td>
-            </tr>
-        """
+    loss = top_attacks['Financial Loss (in Million $)']
+    severity_score = top_attacks['Severity_Score'] if 'Severity_Score' in top_attacks.columns else loss / 10
+    levels = [severity_score >= 8, severity_score >= 5]
+    table_html += render_rows(ATTACK_ROW_TEMPLATE, {
+        'year': escaped(top_attacks['Year']),
+        'country': escaped(top_attacks['Country']),
+        'attack_type': escaped(top_attacks['Attack Type']),
+        'industry': escaped(top_attacks['Target Industry']),
+        'loss': formatted(loss, '%.2f'),
+        'users': thousands(top_attacks['Number of Affected Users']),
+        'severity_color': np.select(levels, [COLORS['pink'], COLORS['orange']], COLORS['green']),
+        'severity_icon': np.select(levels, ['🔴', '🟡'], '🟢'),
+        'severity_label': np.select(levels, ['CRITICAL', 'HIGH'], 'MEDIUM'),
+    })
     
     table_html += """
             </tbody>
@@ -131,6 +146,11 @@ def create_attack_summary_cards(df):
     avg_resolution = df['Incident Resolution Time (in Hours)'].mean()
     most_targeted = df['Target Industry'].mode()[0] if len(df) > 0 else 'N/A'
     
+    return _render_attack_summary_cards(total_loss, total_users, avg_resolution, most_targeted)
+
+@cached_html
+def _render_attack_summary_cards(total_loss, total_users, avg_resolution, most_targeted):
+    """Summary cards HTML for the given metrics (memoized on their values)"""
     cards_html = f"""
     <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 15px; margin-bottom: 20px;">
         <div style="
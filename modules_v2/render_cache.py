@@ -0,0 +1,232 @@
+"""
+Render Cache Module
+Memory-bounded LRU caches for rendered output, keyed by the rendering
+function, its parameters and a cheap fingerprint of the aggregated input.
+Generated HTML components are memoized the same way in a separate, smaller
+cache
+"""
+
+import functools
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+FIGURE_CACHE_MAX_BYTES = 128 * 1024**2
+HTML_CACHE_MAX_BYTES = 8 * 1024**2
+
+# df.attrs key under which the loaders stamp a per-load dataset version
+DATASET_VERSION_ATTR = 'dataset_version'
+
+
+def _update_hash(h, obj):
+    """Feed a stable byte representation of obj into a hashlib object"""
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(type(obj).__name__.encode())
+        if isinstance(obj, pd.DataFrame):
+            h.update(repr(list(obj.columns)).encode())
+            h.update(repr(list(obj.dtypes.astype(str))).encode())
+        else:
+            h.update(repr((obj.name, str(obj.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=not isinstance(obj, pd.Index)).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        if obj.dtype == object:
+            h.update(pd.util.hash_array(obj.ravel()).tobytes())
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b'{')
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'[' if isinstance(obj, list) else b'(')
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b']')
+    else:
+        h.update(repr((type(obj).__name__, obj)).encode())
+
+
+def fingerprint(*objects):
+    """
+    Cheap content fingerprint of aggregates, arrays and plain parameters
+
+    Parameters:
+    -----------
+    *objects : any
+        DataFrames/Series/arrays (hashed by content) and plain Python values
+
+    Returns:
+    --------
+    str
+        Hex digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objects:
+        _update_hash(h, obj)
+    return h.hexdigest()
+
+
+def dataset_version(df):
+    """
+    Version of the loaded dataset a frame was derived from
+
+    The loaders stamp df.attrs[DATASET_VERSION_ATTR] once per load and pandas
+    carries attrs through row selections and column projections, so filtered
+    views keep it. Frames without a stamp are fingerprinted by content.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Loaded frame or a view derived from one
+
+    Returns:
+    --------
+    str
+        Version token
+    """
+    version = df.attrs.get(DATASET_VERSION_ATTR)
+    return fingerprint(df) if version is None else version
+
+
+def estimate_nbytes(obj):
+    """Approximate in-memory size of a cached value"""
+    if isinstance(obj, go.Figure):
+        return estimate_nbytes(obj.to_plotly_json())
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.dtype != object else obj.size * 64
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, (str, bytes)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return 64 + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return 56 + sum(estimate_nbytes(item) for item in obj)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the estimated size of its values"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, nbytes=None):
+        """Store a value, evicting least recently used entries past max_bytes"""
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+FIGURE_CACHE = LRUCache(FIGURE_CACHE_MAX_BYTES)
+
+
+def cached_figure(func):
+    """
+    Cache a figure renderer by function name, parameters and input fingerprint
+
+    The decorated function must be a pure function of its arguments, which
+    should be aggregates (not raw frames). Cached figures are shared between
+    reruns and sessions, so callers must treat them as read-only.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (name, fingerprint(args, kwargs))
+        hit, fig = FIGURE_CACHE.get(key)
+        if not hit:
+            fig = func(*args, **kwargs)
+            FIGURE_CACHE.put(key, fig)
+        return fig
+
+    return wrapper
+
+
+def figure_cache_stats():
+    """Hit/miss statistics of the shared figure cache"""
+    return FIGURE_CACHE.stats()
+
+
+HTML_CACHE = LRUCache(HTML_CACHE_MAX_BYTES)
+
+
+def cached_html(func):
+    """
+    Memoize an HTML component builder by a content hash of its inputs
+
+    The decorated function must build its markup from its arguments alone,
+    which should be the few rows or values the component shows (e.g. the
+    top-n rows, metric values), not whole frames.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (name, fingerprint(args, kwargs))
+        hit, markup = HTML_CACHE.get(key)
+        if not hit:
+            markup = func(*args, **kwargs)
+            HTML_CACHE.put(key, markup)
+        return markup
+
+    return wrapper
+
+
+def html_cache_stats():
+    """Hit/miss statistics of the shared HTML component cache"""
+    return HTML_CACHE.stats()
@@ -0,0 +1,201 @@
+"""
+Sampling Module
+Seeded, stratified reservoir sampling: every row gets a deterministic
+priority from its index label, each stratum keeps its lowest-priority rows,
+and the final sample is allocated proportionally with a per-stratum minimum.
+The result does not depend on how the input was chunked.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .render_cache import LRUCache, dataset_version, fingerprint
+
+DEFAULT_SEED = 42
+DEFAULT_MIN_PER_STRATUM = 10
+SAMPLE_CACHE_MAX_BYTES = 32 * 1024**2
+
+_PRIORITY = '_sample_priority'
+
+
+def row_priorities(index, seed=DEFAULT_SEED):
+    """
+    Deterministic uniform priorities in [0, 1) for a set of row labels
+
+    The same label always gets the same priority for a given seed, so a row
+    stays in (or out of) the sample as filters add or remove other rows.
+
+    Parameters:
+    -----------
+    index : pd.Index
+        Row labels
+    seed : int
+        Sampling seed
+
+    Returns:
+    --------
+    np.ndarray
+        float64 priorities
+    """
+    hash_key = f'{seed:016x}'[-16:]
+    hashes = pd.util.hash_array(np.asarray(index), hash_key=hash_key, categorize=False)
+    return (hashes >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def allocate_quotas(sizes, sample_size, min_per_stratum=DEFAULT_MIN_PER_STRATUM):
+    """
+    Proportional allocation of a sample across strata with a floor per stratum
+
+    Parameters:
+    -----------
+    sizes : array-like
+        Number of rows in each stratum
+    sample_size : int
+        Target total sample size
+    min_per_stratum : int
+        Rows guaranteed to every stratum (or all of it, if smaller)
+
+    Returns:
+    --------
+    np.ndarray
+        Rows to draw per stratum; the total can exceed sample_size by the
+        minimums granted to small strata
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    total = sizes.sum()
+    if total <= sample_size:
+        return sizes.copy()
+
+    # Largest-remainder rounding of the proportional shares
+    ideal = sample_size * sizes / total
+    quotas = np.floor(ideal).astype(np.int64)
+    leftover = sample_size - quotas.sum()
+    if leftover > 0:
+        quotas[np.argsort(-(ideal - quotas), kind='stable')[:leftover]] += 1
+
+    quotas = np.maximum(quotas, np.minimum(sizes, min_per_stratum))
+    return np.minimum(quotas, sizes)
+
+
+class StratifiedReservoir:
+    """
+    Bottom-k reservoir per stratum, fed chunk by chunk
+
+    Every stratum keeps its capacity lowest-priority rows, which is enough to
+    serve any quota up to that capacity once the stratum sizes are known.
+    """
+
+    def __init__(self, by, sample_size, min_per_stratum=DEFAULT_MIN_PER_STRATUM, seed=DEFAULT_SEED):
+        self.by = by
+        self.sample_size = sample_size
+        self.min_per_stratum = min_per_stratum
+        self.seed = seed
+        self.capacity = max(sample_size, min_per_stratum)
+        self._kept = None
+        self._sizes = pd.Series(dtype=np.int64)
+
+    def update(self, chunk):
+        """Offer a chunk of rows (index labels must be unique across chunks)"""
+        if len(chunk) == 0:
+            return self
+        counts = chunk[self.by].value_counts(dropna=False)
+        counts.index = counts.index.astype(object)
+        self._sizes = self._sizes.add(counts, fill_value=0).astype(np.int64)
+
+        candidates = chunk.assign(**{_PRIORITY: row_priorities(chunk.index, self.seed)})
+        if self._kept is not None:
+            candidates = pd.concat([self._kept, candidates])
+        self._kept = self._take_lowest(candidates, lambda strata: self.capacity)
+        return self
+
+    def result(self):
+        """
+        Draw the final sample from the reservoirs
+
+        Returns:
+        --------
+        pd.DataFrame
+            Sampled rows in index order
+        """
+        if self._kept is None:
+            return pd.DataFrame()
+        sizes = self._sizes
+        quotas = pd.Series(allocate_quotas(sizes.to_numpy(), self.sample_size, self.min_per_stratum),
+                           index=sizes.index)
+        sample = self._take_lowest(self._kept, lambda strata: strata.map(quotas).to_numpy())
+        return sample.drop(columns=_PRIORITY).sort_index()
+
+    def _take_lowest(self, frame, limit):
+        """Keep the lowest-priority rows of every stratum up to limit(strata)"""
+        strata = frame[self.by]
+        codes, _ = pd.factorize(strata, use_na_sentinel=False)
+        order = np.lexsort((frame[_PRIORITY].to_numpy(), codes))
+        rank = pd.Series(codes[order]).groupby(codes[order], sort=False).cumcount().to_numpy()
+        # Rank on the stratum column alone; only the kept rows are taken
+        keep = rank < limit(strata.iloc[order].astype(object))
+        return frame.iloc[order[keep]]
+
+
+def stratified_sample(df, by, sample_size, min_per_stratum=DEFAULT_MIN_PER_STRATUM,
+                      seed=DEFAULT_SEED, chunk_size=None):
+    """
+    Seeded stratified sample of a frame
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Source rows (unique index labels)
+    by : str
+        Stratum column, e.g. 'attack_type'
+    sample_size : int
+        Target total sample size
+    min_per_stratum : int
+        Minimum rows per stratum, so rare strata stay visible
+    seed : int
+        Sampling seed
+    chunk_size : int, optional
+        Feed the reservoir in chunks of this many rows (same result)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Sampled rows in index order
+    """
+    reservoir = StratifiedReservoir(by, sample_size, min_per_stratum, seed)
+    step = chunk_size or max(len(df), 1)
+    for start in range(0, len(df), step):
+        reservoir.update(df.iloc[start:start + step])
+    return reservoir.result() if len(df) else df.iloc[:0]
+
+
+SAMPLE_CACHE = LRUCache(SAMPLE_CACHE_MAX_BYTES)
+
+
+def cached_stratified_sample(df, by, sample_size, min_per_stratum=DEFAULT_MIN_PER_STRATUM,
+                             seed=DEFAULT_SEED, signature=None):
+    """
+    stratified_sample, cached per filter signature
+
+    Parameters:
+    -----------
+    df, by, sample_size, min_per_stratum, seed :
+        Same as stratified_sample
+    signature : any, optional
+        Filter state that produced df (e.g. the sidebar filters dict); when
+        omitted the row labels of df are fingerprinted instead. Either way
+        the key includes the dataset version, so a reload never serves
+        samples of the previous data
+
+    Returns:
+    --------
+    pd.DataFrame
+        Sampled rows (shared between callers, treat as read-only)
+    """
+    rows = df.index if signature is None else (signature, len(df))
+    key = ('stratified', by, sample_size, min_per_stratum, seed,
+           fingerprint(dataset_version(df), rows, list(df.columns)))
+    hit, sample = SAMPLE_CACHE.get(key)
+    if not hit:
+        sample = stratified_sample(df, by, sample_size, min_per_stratum, seed)
+        SAMPLE_CACHE.put(key, sample)
+    return sample
@@ -0,0 +1,220 @@
+"""
+Time Rollups Module
+Minute/hour/day/week/month rollups computed once, with a timeline API that
+picks the coarsest resolution still giving about N points for a window
+"""
+
+import numpy as np
+import pandas as pd
+
+# Resolutions from finest to coarsest with their nominal bucket width
+RESOLUTIONS = {
+    'minute': pd.Timedelta(minutes=1),
+    'hour': pd.Timedelta(hours=1),
+    'day': pd.Timedelta(days=1),
+    'week': pd.Timedelta(weeks=1),
+    'month': pd.Timedelta(days=30.44),
+}
+
+# Measures summed into every bucket (means are sum / count)
+DEFAULT_MEASURES = ['data_compromised_GB', 'attack_severity', 'response_time_min']
+
+DEFAULT_TARGET_POINTS = 200
+
+
+def floor_timestamps(values, resolution):
+    """
+    Floor datetime64 values to a resolution without building Python objects
+
+    Parameters:
+    -----------
+    values : np.ndarray
+        datetime64 values
+    resolution : str
+        One of RESOLUTIONS (weeks start on Monday)
+
+    Returns:
+    --------
+    np.ndarray
+        datetime64[ns] bucket starts
+    """
+    values = np.asarray(values, dtype='datetime64[ns]')
+    if resolution == 'minute':
+        floored = values.astype('datetime64[m]')
+    elif resolution == 'hour':
+        floored = values.astype('datetime64[h]')
+    elif resolution == 'day':
+        floored = values.astype('datetime64[D]')
+    elif resolution == 'week':
+        days = values.astype('datetime64[D]')
+        # 1970-01-01 was a Thursday: shift by 3 so Mondays land on 0
+        floored = days - ((days.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    elif resolution == 'month':
+        floored = values.astype('datetime64[M]')
+    else:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    return floored.astype('datetime64[ns]')
+
+
+def _rollup(buckets, frame, by, sum_columns):
+    """Group (bucket, category) rows and sum the count and measure columns"""
+    grouped = frame.assign(bucket=buckets).groupby(['bucket', by], observed=True, sort=True)
+    return grouped[sum_columns].sum().reset_index()
+
+
+def build_time_rollups(df, by='attack_type', measures=None):
+    """
+    Precompute count and measure rollups at every resolution
+
+    The minute rollup is built from the rows; every coarser rollup is
+    re-aggregated from the next finer one, so only one pass touches the data.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Source data with a 'timestamp' column
+    by : str
+        Category column kept in every rollup
+    measures : list of str, optional
+        Numeric columns to sum (defaults to DEFAULT_MEASURES)
+
+    Returns:
+    --------
+    dict
+        {'by': by, 'measures': [...], 'tables': {resolution: pd.DataFrame}}
+        where each table has 'bucket', by, 'count' and the measure sums
+    """
+    measures = [m for m in (measures or DEFAULT_MEASURES) if m in df.columns]
+    frame = pd.DataFrame({by: df[by].to_numpy(), 'count': np.ones(len(df), dtype=np.int64)})
+    for measure in measures:
+        frame[measure] = pd.to_numeric(df[measure], errors='coerce').fillna(0).to_numpy()
+    if isinstance(df[by].dtype, pd.CategoricalDtype):
+        frame[by] = pd.Categorical(frame[by], categories=df[by].cat.categories)
+
+    sum_columns = ['count'] + measures
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    tables = {'minute': _rollup(floor_timestamps(timestamps, 'minute'), frame, by, sum_columns)}
+
+    parents = {'hour': 'minute', 'day': 'hour', 'week': 'day', 'month': 'day'}
+    for resolution, parent in parents.items():
+        source = tables[parent]
+        buckets = floor_timestamps(source['bucket'].to_numpy(), resolution)
+        tables[resolution] = _rollup(buckets, source.drop(columns='bucket'), by, sum_columns)
+
+    return {'by': by, 'measures': measures, 'tables': tables}
+
+
+def choose_resolution(start, end, target_points=DEFAULT_TARGET_POINTS):
+    """
+    Coarsest resolution that still yields at least target_points buckets
+
+    Parameters:
+    -----------
+    start, end : pd.Timestamp
+        Requested window
+    target_points : int
+        Desired number of points
+
+    Returns:
+    --------
+    str
+        Resolution name (the finest one when no resolution is fine enough)
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for resolution in reversed(list(RESOLUTIONS)):
+        if span / RESOLUTIONS[resolution] >= target_points:
+            return resolution
+    return 'minute'
+
+
+def _window_view(table, by, resolution, start, end, categories, total):
+    """Buckets of a bucket-sorted table inside [floor(start), floor(end))"""
+    buckets = table['bucket'].to_numpy()
+    lo = np.searchsorted(buckets, floor_timestamps([start], resolution)[0], side='left')
+    hi = np.searchsorted(buckets, floor_timestamps([end], resolution)[0], side='left')
+    view = table.iloc[lo:hi]
+
+    if categories is not None:
+        view = view[view[by].isin(categories)]
+    if total:
+        view = view.drop(columns=by).groupby('bucket', sort=True).sum().reset_index()
+    return view
+
+
+def get_timeline(rollups, start=None, end=None, target_points=DEFAULT_TARGET_POINTS,
+                 categories=None, resolution=None, total=False):
+    """
+    Slice a trend out of the rollups at an automatically chosen resolution
+
+    Parameters:
+    -----------
+    rollups : dict
+        Output of build_time_rollups
+    start, end : datetime-like, optional
+        Window bounds (default to the data extent). Both are floored to the
+        resolution; the bucket starting at floor(end) is excluded.
+    target_points : int
+        Approximate number of points per category
+    categories : list, optional
+        Restrict to these values of the rollup category
+    resolution : str, optional
+        Force a resolution instead of choosing one
+    total : bool
+        Sum the categories into one series per bucket
+
+    Returns:
+    --------
+    tuple
+        (resolution, pd.DataFrame with 'bucket', category, 'count' and measures;
+        without the category column when total is set)
+    """
+    day_buckets = rollups['tables']['day']['bucket']
+    if len(day_buckets) == 0:
+        return resolution or 'day', rollups['tables']['day']
+    start = pd.Timestamp(start) if start is not None else day_buckets.iloc[0]
+    end = pd.Timestamp(end) if end is not None else day_buckets.iloc[-1] + pd.Timedelta(days=1)
+
+    resolution = resolution or choose_resolution(start, end, target_points)
+    # Tables are sorted by bucket, so the window is a contiguous slice
+    view = _window_view(rollups['tables'][resolution], rollups['by'], resolution,
+                        start, end, categories, total)
+    return resolution, view
+
+
+def get_row_timeline(df, start=None, end=None, target_points=DEFAULT_TARGET_POINTS,
+                     by='attack_type', resolution=None, total=False):
+    """
+    Same trend as get_timeline, bucketed straight from rows
+
+    For frames the rollups do not describe (e.g. rows narrowed by a filter
+    the rollups are not keyed by): only the chosen resolution is built, and
+    only counts are kept.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Rows with 'timestamp' and the category column
+    start, end, target_points, resolution, total :
+        Same as get_timeline (the window defaults to the days df spans)
+    by : str
+        Category column
+
+    Returns:
+    --------
+    tuple
+        (resolution, pd.DataFrame with 'bucket', category and 'count')
+    """
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    if len(timestamps) == 0:
+        return resolution or 'day', pd.DataFrame({'bucket': timestamps, by: df[by].to_numpy(),
+                                                  'count': np.zeros(0, dtype=np.int64)})
+    days = floor_timestamps(timestamps, 'day')
+    start = pd.Timestamp(start) if start is not None else pd.Timestamp(days.min())
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(days.max()) + pd.Timedelta(days=1)
+
+    resolution = resolution or choose_resolution(start, end, target_points)
+    frame = pd.DataFrame({by: df[by].to_numpy(), 'count': np.ones(len(df), dtype=np.int64)})
+    if isinstance(df[by].dtype, pd.CategoricalDtype):
+        frame[by] = pd.Categorical(frame[by], categories=df[by].cat.categories)
+    table = _rollup(floor_timestamps(timestamps, resolution), frame, by, ['count'])
+    return resolution, _window_view(table, by, resolution, start, end, None, total)
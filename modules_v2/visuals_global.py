@@ -9,6 +9,15 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from .chart_utils import (
+    sankey_links, capped_hierarchy, hierarchy_nodes, compact_array, downsample_indices, point_budget, use_webgl, area_marker,
+    MAX_HIERARCHY_CHILDREN, WEBGL_THRESHOLD
+)
+from .render_cache import cached_figure
+from .sampling import cached_stratified_sample
+from .density import cached_density_grid, density_heatmap
+from .gazetteer import geocode, unmatched_annotation
+
 # Updated color scheme
 COLORS = {
     'bg': '#050816',
@@ -21,6 +30,12 @@ COLORS = {
     'text': '#b8c5d6',
 }
 
+# Columns the 3D correlation scatter plots or shows on hover
+CORRELATION_3D_COLUMNS = [
+    'Attack Type', 'Financial Loss (in Million $)', 'Number of Affected Users',
+    'Incident Resolution Time (in Hours)', 'Country', 'Target Industry', 'Year',
+]
+
 def apply_theme(fig, title=None, height=None):
     """Apply theme to figure with optional title and height"""
     fig.update_layout(
@@ -49,6 +64,7 @@ def apply_theme(fig, title=None, height=None):
         fig.update_layout(height=height)
     return fig
 
+@cached_figure
 def create_defense_effectiveness_chart(defense_stats, title='🛡️ Defense Mechanism Effectiveness'):
     """
     Create horizontal bar chart showing defense mechanism effectiveness
@@ -88,9 +104,11 @@ def create_defense_effectiveness_chart(defense_stats, title='🛡️ Defense Mec
     
     return fig
 
+@cached_figure
 def create_defense_metrics_comparison(defense_stats, title='📊 Defense Mechanism Metrics Comparison'):
     """Create grouped bar chart comparing defense metrics"""
     
+    defense_stats = defense_stats.copy()
     fig = go.Figure()
     
     # Normalize metrics to 0-100 scale for comparison
@@ -134,8 +152,26 @@ def create_defense_metrics_comparison(defense_stats, title='📊 Defense Mechani
     
     return fig
 
-def create_yearly_trend_chart(yearly_data, title='📈 Yearly Attack Trends (2015-2024)'):
-    """Create line chart showing yearly trends"""
+@cached_figure
+def create_yearly_trend_chart(yearly_data, title='📈 Yearly Attack Trends (2015-2024)',
+                              max_points=None, webgl_threshold=WEBGL_THRESHOLD):
+    """
+    Create line chart showing yearly trends
+    
+    Each line trace is downsampled (LTTB) to the chart's point budget and
+    drawn with WebGL once it has more than webgl_threshold points.
+    """
+    
+    years = yearly_data['Year'].to_numpy()
+    attacks = yearly_data['Total_Attacks'].to_numpy()
+    losses = yearly_data['Total_Financial_Loss'].to_numpy()
+    max_points = point_budget('yearly_trends', max_points)
+    attack_idx = downsample_indices(years, attacks, max_points)
+    loss_idx = downsample_indices(years, losses, max_points)
+    webgl = use_webgl(max(len(attack_idx), len(loss_idx)), webgl_threshold)
+    scatter_trace = go.Scattergl if webgl else go.Scatter
+    # WebGL lines have no spline interpolation
+    line_shape = 'linear' if webgl else 'spline'
     
     fig = make_subplots(
         rows=2, cols=1,
@@ -145,11 +181,11 @@ def create_yearly_trend_chart(yearly_data, title='📈 Yearly Attack Trends (201
     )
     
     # Attack count - Primary y-axis
-    fig.add_trace(go.Scatter(
-        x=yearly_data['Year'],
-        y=yearly_data['Total_Attacks'],
+    fig.add_trace(scatter_trace(
+        x=years[attack_idx],
+        y=attacks[attack_idx],
         name='Total Attacks',
-        line=dict(color=COLORS['cyan'], width=4, shape='spline'),
+        line=dict(color=COLORS['cyan'], width=4, shape=line_shape),
         mode='lines+markers',
         marker=dict(size=10, symbol='circle'),
         fill='tozeroy',
@@ -158,11 +194,11 @@ def create_yearly_trend_chart(yearly_data, title='📈 Yearly Attack Trends (201
     ), row=1, col=1, secondary_y=False)
     
     # Financial loss - Secondary y-axis
-    fig.add_trace(go.Scatter(
-        x=yearly_data['Year'],
-        y=yearly_data['Total_Financial_Loss'],
+    fig.add_trace(scatter_trace(
+        x=years[loss_idx],
+        y=losses[loss_idx],
         name='Financial Loss ($M)',
-        line=dict(color=COLORS['pink'], width=4, shape='spline'),
+        line=dict(color=COLORS['pink'], width=4, shape=line_shape),
         mode='lines+markers',
         marker=dict(size=10, symbol='diamond'),
         hovertemplate='<b>Year %{x}</b><br>Loss: $%{y:,.0f}M<extra></extra>'
@@ -195,6 +231,12 @@ def create_attack_type_distribution(df, title='⚠️ Attack Type Distribution')
     
     attack_counts = df['Attack Type'].value_counts()
     
+    return _render_attack_type_distribution(attack_counts, title)
+
+@cached_figure
+def _render_attack_type_distribution(attack_counts, title):
+    """Render the attack type donut from its counts"""
+    
     fig = go.Figure(data=[go.Pie(
         labels=attack_counts.index,
         values=attack_counts.values,
@@ -224,6 +266,12 @@ def create_country_heatmap(df, title='🌍 Attack Distribution by Country'):
     country_data.columns = ['Country', 'Attack_Count', 'Financial_Loss', 'Affected_Users']
     country_data = country_data.sort_values('Attack_Count', ascending=True)
     
+    return _render_country_heatmap(country_data, title)
+
+@cached_figure
+def _render_country_heatmap(country_data, title):
+    """Render the country bars from per-country aggregates"""
+    
     fig = go.Figure()
     
     fig.add_trace(go.Bar(
@@ -253,18 +301,35 @@ def create_country_heatmap(df, title='🌍 Attack Distribution by Country'):
     
     return fig
 
-def create_industry_sunburst(df, title='🏢 Industry Attack Breakdown'):
-    """Create sunburst chart for industry analysis"""
-    
-    industry_data = df.groupby(['Target Industry', 'Attack Type']).size().reset_index(name='count')
+def create_industry_sunburst(df, title='🏢 Industry Attack Breakdown', max_children=MAX_HIERARCHY_CHILDREN,
+                             focus=None, max_depth=None):
+    """Create sunburst chart for industry analysis (top-k children per parent, rest as "Other")"""
     
-    fig = px.sunburst(
-        industry_data,
-        path=['Target Industry', 'Attack Type'],
-        values='count',
-        color='count',
-        color_continuous_scale=[[0, COLORS['cyan']], [0.5, COLORS['purple']], [1, COLORS['pink']]]
+    industry_data = capped_hierarchy(
+        df, ['Target Industry', 'Attack Type'], max_children, focus=focus, max_depth=max_depth
     )
+    nodes = hierarchy_nodes(industry_data, [c for c in industry_data.columns if c != 'value'])
+    
+    return _render_industry_sunburst(nodes, title)
+
+@cached_figure
+def _render_industry_sunburst(nodes, title):
+    """Render the industry sunburst from flattened hierarchy nodes"""
+    
+    fig = go.Figure(go.Sunburst(
+        ids=nodes['ids'],
+        labels=nodes['labels'],
+        parents=nodes['parents'],
+        values=nodes['values'],
+        branchvalues='total',
+        marker=dict(
+            colors=nodes['colors'],
+            colorscale=[[0, COLORS['cyan']], [0.5, COLORS['purple']], [1, COLORS['pink']]],
+            colorbar=dict(title='count'),
+            showscale=True
+        ),
+        hovertemplate='<b>%{label}</b><br>count: %{value:,.0f}<extra></extra>'
+    ))
     
     apply_theme(fig, title=title, height=500)
     
@@ -275,6 +340,12 @@ def create_vulnerability_analysis(df, title='🔓 Security Vulnerability Analysi
     
     vuln_data = df.groupby(['Security Vulnerability Type', 'Attack Source']).size().reset_index(name='count')
     
+    return _render_vulnerability_analysis(vuln_data, title)
+
+@cached_figure
+def _render_vulnerability_analysis(vuln_data, title):
+    """Render the vulnerability bars from their counts"""
+    
     fig = px.bar(
         vuln_data,
         x='Security Vulnerability Type',
@@ -294,6 +365,12 @@ def create_financial_impact_chart(df, title='💰 Financial Impact by Attack Typ
     
     attack_loss = df.groupby('Attack Type')['Financial Loss (in Million $)'].sum().sort_values(ascending=False)
     
+    return _render_financial_impact_chart(attack_loss, title)
+
+@cached_figure
+def _render_financial_impact_chart(attack_loss, title):
+    """Render the financial waterfall from per-type losses"""
+    
     fig = go.Figure(go.Waterfall(
         name="Financial Loss",
         orientation="v",
@@ -317,8 +394,17 @@ def create_financial_impact_chart(df, title='💰 Financial Impact by Attack Typ
 def create_resolution_time_box(df, title='⏱️ Resolution Time Distribution'):
     """Create box plot for resolution times"""
     
+    # The box plot needs the raw values, but only these two columns
+    box_data = df[['Defense Mechanism Used', 'Incident Resolution Time (in Hours)']]
+    
+    return _render_resolution_time_box(box_data, title)
+
+@cached_figure
+def _render_resolution_time_box(box_data, title):
+    """Render the resolution time box plot from its two columns"""
+    
     fig = px.box(
-        df,
+        box_data,
         x='Defense Mechanism Used',
         y='Incident Resolution Time (in Hours)',
         color='Defense Mechanism Used',
@@ -336,20 +422,6 @@ def create_resolution_time_box(df, title='⏱️ Resolution Time Distribution'):
 def create_3d_globe_global(df, title='🌍 Global Attack Distribution'):
     """Create 3D globe visualization for global dataset"""
     
-    # Country coordinates
-    country_coords = {
-        'USA': {'lat': 37.0902, 'lon': -95.7129},
-        'UK': {'lat': 55.3781, 'lon': -3.4360},
-        'Germany': {'lat': 51.1657, 'lon': 10.4515},
-        'France': {'lat': 46.2276, 'lon': 2.2137},
-        'China': {'lat': 35.8617, 'lon': 104.1954},
-        'India': {'lat': 20.5937, 'lon': 78.9629},
-        'Brazil': {'lat': -14.2350, 'lon': -51.9253},
-        'Russia': {'lat': 61.5240, 'lon': 105.3188},
-        'Australia': {'lat': -25.2744, 'lon': 133.7751},
-        'Japan': {'lat': 36.2048, 'lon': 138.2529},
-    }
-    
     # Aggregate data by country
     country_data = df.groupby('Country').agg({
         'Attack Type': 'count',
@@ -358,9 +430,17 @@ def create_3d_globe_global(df, title='🌍 Global Attack Distribution'):
     }).reset_index()
     country_data.columns = ['Country', 'Attack_Count', 'Financial_Loss', 'Affected_Users']
     
-    # Add coordinates
-    country_data['lat'] = country_data['Country'].map(lambda x: country_coords.get(x, {}).get('lat', 0))
-    country_data['lon'] = country_data['Country'].map(lambda x: country_coords.get(x, {}).get('lon', 0))
+    # Shared gazetteer join; unknown countries are reported, not put at (0, 0)
+    coords = geocode(country_data['Country'])
+    matched = coords['lat'].notna().to_numpy()
+    unmatched = country_data.loc[~matched, 'Country'].astype(str).tolist()
+    country_data = country_data[matched].assign(lat=coords['lat'][matched], lon=coords['lon'][matched])
+    
+    return _render_3d_globe_global(country_data, unmatched, title)
+
+@cached_figure
+def _render_3d_globe_global(country_data, unmatched, title):
+    """Render the globe from per-country aggregates with coordinates"""
     
     # Marker sizing: scale by attack count with sizeref to avoid oversized bubbles
     max_count = max(country_data['Attack_Count'].max(), 1)
@@ -368,24 +448,24 @@ def create_3d_globe_global(df, title='🌍 Global Attack Distribution'):
     sizeref = 2.0 * max_count / (desired_max_px ** 2)
 
     # Customdata for hover (attack count, financial loss)
-    customdata = np.stack([
-        country_data['Attack_Count'].values,
-        country_data['Financial_Loss'].values
-    ], axis=-1)
+    customdata = compact_array(np.stack([
+        country_data['Attack_Count'].to_numpy(dtype=float),
+        country_data['Financial_Loss'].to_numpy(dtype=float)
+    ], axis=-1))
 
     # Create 3D scatter on globe
     fig = go.Figure(data=go.Scattergeo(
-        lon=country_data['lon'],
-        lat=country_data['lat'],
+        lon=compact_array(country_data['lon'].to_numpy()),
+        lat=compact_array(country_data['lat'].to_numpy()),
         text=country_data['Country'],
         mode='markers',
         marker=dict(
-            size=country_data['Attack_Count'],
+            size=compact_array(country_data['Attack_Count'].to_numpy()),
             sizemode='area',
             sizeref=sizeref,
             sizemin=4,
             opacity=0.85,
-            color=country_data['Financial_Loss'],
+            color=compact_array(country_data['Financial_Loss'].to_numpy()),
             colorscale=[[0, COLORS['green']], [0.5, COLORS['orange']], [1, COLORS['pink']]],
             colorbar=dict(title="Financial Loss ($M)", thickness=15),
             line=dict(width=0.6, color=COLORS['cyan']),
@@ -413,81 +493,115 @@ def create_3d_globe_global(df, title='🌍 Global Attack Distribution'):
     apply_theme(fig, title=title, height=600)
     fig.update_layout(margin=dict(l=0, r=0, t=50, b=0))
     
+    if unmatched:
+        fig.add_annotation(**unmatched_annotation(unmatched, COLORS['text']))
+    
     return fig
 
-def create_3d_attack_correlation(df, title='🔮 3D Attack Correlation Analysis'):
-    """Create 3D scatter plot showing attack correlations"""
-    
-    # Sample data for performance
-    sample_df = df.sample(min(500, len(df)))
-    
-    fig = px.scatter_3d(
-        sample_df,
-        x='Financial Loss (in Million $)',
-        y='Number of Affected Users',
-        z='Incident Resolution Time (in Hours)',
-        color='Attack Type',
-        size='Financial Loss (in Million $)',
-        hover_data=['Country', 'Target Industry', 'Year'],
-        title=title,
-        labels={
-            'Financial Loss (in Million $)': 'Financial Loss ($M)',
-            'Number of Affected Users': 'Affected Users',
-            'Incident Resolution Time (in Hours)': 'Resolution Time (h)'
-        },
-        color_discrete_sequence=[COLORS['cyan'], COLORS['purple'], COLORS['pink'], 
-                                COLORS['green'], COLORS['orange'], COLORS['cyan_bright']]
+@cached_figure
+def _render_3d_correlation_density(grid, value_label, title):
+    """Render the loss x affected users grid of create_3d_attack_correlation's density mode"""
+    fig = density_heatmap(
+        grid, 'Financial Loss ($M)', 'Affected Users', value_label, COLORS,
+        row_label='incidents', hidden_axis='resolution time', x_format=',.1f', y_format=',.0f'
+    )
+    apply_theme(fig, title=title, height=700)
+    return fig
+
+def create_3d_attack_correlation(df, title='🔮 3D Attack Correlation Analysis', signature=None,
+                                 max_points=None, mode='sample', ranges=None, weights=None):
+    """
+    Create 3D scatter plot showing attack correlations
+    
+    mode='density' bins every row (financial loss x affected users, optionally
+    weighted by e.g. 'Financial Loss (in Million $)') into a fixed-size heatmap.
+    """
+    
+    if mode == 'density':
+        grid = cached_density_grid(
+            df, ['Financial Loss (in Million $)', 'Number of Affected Users'],
+            ranges=ranges, weights=weights, signature=signature
+        )
+        value_label = 'Financial Loss ($M)' if weights == 'Financial Loss (in Million $)' else 'Incidents'
+        return _render_3d_correlation_density(grid, value_label, title)
+    
+    # Seeded sample stratified by attack type, cached per filter signature;
+    # only the plotted and hovered columns are sampled and reach the renderer
+    max_points = point_budget('3d_attack_correlation', max_points)
+    sample_df = cached_stratified_sample(df[CORRELATION_3D_COLUMNS], 'Attack Type', max_points, signature=signature)
+    
+    return _render_3d_attack_correlation(sample_df, title)
+
+@cached_figure
+def _render_3d_attack_correlation(sample_df, title):
+    """Render the 3D correlation scatter from the sample"""
+    
+    palette = [COLORS['cyan'], COLORS['purple'], COLORS['pink'],
+               COLORS['green'], COLORS['orange'], COLORS['cyan_bright']]
+    loss = pd.to_numeric(sample_df['Financial Loss (in Million $)'], errors='coerce')
+    
+    fig = go.Figure()
+    for i, attack_type in enumerate(pd.unique(sample_df['Attack Type'])):
+        rows = (sample_df['Attack Type'] == attack_type).to_numpy()
+        part = sample_df[rows]
+        fig.add_trace(go.Scatter3d(
+            x=compact_array(loss[rows].to_numpy(dtype=float)),
+            y=compact_array(part['Number of Affected Users'].to_numpy(dtype=float)),
+            z=compact_array(part['Incident Resolution Time (in Hours)'].to_numpy(dtype=float)),
+            mode='markers',
+            name=str(attack_type),
+            legendgroup=str(attack_type),
+            marker=area_marker(loss[rows].to_numpy(dtype=float), loss.max(), color=palette[i % len(palette)]),
+            customdata=compact_array(part['Year'].to_numpy()),
+            text=part['Country'].astype(str).to_numpy(),
+            hovertext=part['Target Industry'].astype(str).to_numpy(),
+            hovertemplate='<b>%{fullData.name}</b><br>' +
+                          'Financial Loss ($M): %{x:,.2f}<br>' +
+                          'Affected Users: %{y:,.0f}<br>' +
+                          'Resolution Time (h): %{z:.0f}<br>' +
+                          'Country: %{text}<br>' +
+                          'Target Industry: %{hovertext}<br>' +
+                          'Year: %{customdata}<extra></extra>'
+        ))
+    fig.update_layout(
+        legend_title_text='Attack Type',
+        scene=dict(
+            xaxis_title='Financial Loss ($M)',
+            yaxis_title='Affected Users',
+            zaxis_title='Resolution Time (h)'
+        )
     )
     
     apply_theme(fig, title=title, height=700)
     
     return fig
 
-def create_attack_flow_sankey(df, title='🔀 Attack Flow Diagram'):
+def create_attack_flow_sankey(df, title='🔀 Attack Flow Diagram', max_nodes_per_level=15):
     """Create Sankey diagram showing attack flow"""
     
     # Create flow: Attack Source -> Attack Type -> Target Industry
-    flow_data = df.groupby(['Attack Source', 'Attack Type', 'Target Industry']).size().reset_index(name='count')
-    
-    # Create node labels
-    sources = df['Attack Source'].unique().tolist()
-    attack_types = df['Attack Type'].unique().tolist()
-    industries = df['Target Industry'].unique().tolist()
+    flow = sankey_links(df, ['Attack Source', 'Attack Type', 'Target Industry'], max_nodes_per_level)
     
-    all_nodes = sources + attack_types + industries
-    
-    # Create links
-    source_indices = []
-    target_indices = []
-    values = []
-    
-    # Source -> Attack Type
-    for _, row in flow_data.iterrows():
-        source_indices.append(all_nodes.index(row['Attack Source']))
-        target_indices.append(all_nodes.index(row['Attack Type']))
-        values.append(row['count'])
+    return _render_attack_flow_sankey(flow, title)
+
+@cached_figure
+def _render_attack_flow_sankey(flow, title):
+    """Render the Sankey from node labels and link arrays"""
     
-    # Attack Type -> Industry (aggregate)
-    industry_flow = df.groupby(['Attack Type', 'Target Industry']).size().reset_index(name='count')
-    for _, row in industry_flow.iterrows():
-        source_indices.append(all_nodes.index(row['Attack Type']))
-        target_indices.append(all_nodes.index(row['Target Industry']))
-        values.append(row['count'])
+    level_colors = np.array([COLORS['orange'], COLORS['cyan'], COLORS['purple']])
     
     fig = go.Figure(data=[go.Sankey(
         node=dict(
             pad=15,
             thickness=20,
             line=dict(color=COLORS['cyan'], width=0.5),
-            label=all_nodes,
-            color=[COLORS['orange']] * len(sources) + 
-                  [COLORS['cyan']] * len(attack_types) + 
-                  [COLORS['purple']] * len(industries)
+            label=flow['labels'],
+            color=level_colors[flow['node_level']]
         ),
         link=dict(
-            source=source_indices,
-            target=target_indices,
-            value=values,
+            source=flow['source'],
+            target=flow['target'],
+            value=flow['value'],
             color='rgba(77, 208, 225, 0.2)'
         )
     )])
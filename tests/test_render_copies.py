@@ -0,0 +1,110 @@
+"""
+Frame copies made by one dashboard rerun
+
+Runs app_v2.py under Streamlit's AppTest on a synthetic dataset and counts
+deep DataFrame copies and row materializations (DataFrame.take, which backs
+boolean-mask __getitem__, .loc masks, .iloc positions, sample and nlargest)
+during a rerun with the render caches cleared, so every section rebuilds
+its aggregates and figures.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules_v2.chart_utils import CHART_POINT_BUDGETS  # noqa: E402
+from modules_v2.density import DENSITY_CACHE  # noqa: E402
+from modules_v2.render_cache import FIGURE_CACHE, HTML_CACHE  # noqa: E402
+from modules_v2.sampling import SAMPLE_CACHE  # noqa: E402
+
+DATASET_ROWS = 30_000
+ATTACK_TYPES = ['DDoS', 'Malware', 'Phishing', 'Ransomware', 'SQL Injection']
+
+# The explorer hands st.dataframe a 100-row preview, which Streamlit copies
+PREVIEW_ROWS = 100
+MAX_DEEP_COPIES_PER_RERUN = 1
+
+# The sampling reservoir keeps up to one point budget of rows per attack
+# type; nothing else may take more rows than that, whatever the data size
+MAX_TAKEN_ROWS = len(ATTACK_TYPES) * max(CHART_POINT_BUDGETS.values())
+
+
+def _synthetic_dataset(path, n=DATASET_ROWS, seed=7):
+    """Write a CSV with the columns load_data expects"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2021-01-01').value // 10**9
+    end = pd.Timestamp('2024-12-31').value // 10**9
+    pd.DataFrame({
+        'timestamp': pd.to_datetime(rng.integers(start, end, n), unit='s'),
+        'attack_type': rng.choice(ATTACK_TYPES, n),
+        'target_system': rng.choice(['Cloud', 'Database', 'Email Server', 'Web Server'], n),
+        'outcome': rng.choice(['Success', 'Failure', 'Blocked'], n),
+        'attacker_ip': [f'10.0.{a}.{b}' for a, b in rng.integers(0, 256, (n, 2))],
+        'target_ip': [f'192.168.{a}.{b}' for a, b in rng.integers(0, 256, (n, 2))],
+        'location': rng.choice(['United States', 'Germany', 'India', 'Brazil', 'Japan'], n),
+        'industry': rng.choice(['IT', 'Finance', 'Healthcare', 'Retail'], n),
+        'attack_severity': rng.integers(1, 11, n),
+        'data_compromised_GB': rng.uniform(0, 100, n).round(2),
+        'attack_duration_min': rng.integers(1, 300, n),
+        'response_time_min': rng.integers(1, 120, n),
+        'mitigation_method': rng.choice(['Patch', 'Isolation', 'Firewall', 'Training'], n),
+        'security_tools_used': rng.choice(['SIEM', 'EDR', 'IDS'], n),
+        'user_role': rng.choice(['Admin', 'User', 'Guest'], n),
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    _synthetic_dataset(tmp_path / 'cybersecurity_large_synthesized_data.csv')
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(str(ROOT / 'app_v2.py'), default_timeout=300)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_rerun_makes_no_full_frame_copies(app, monkeypatch):
+    copied_rows = []
+    copy = pd.DataFrame.copy
+
+    def counting_copy(self, deep=True):
+        if deep:
+            copied_rows.append(len(self))
+        return copy(self, deep=deep)
+
+    FIGURE_CACHE.clear()
+    HTML_CACHE.clear()
+    monkeypatch.setattr(pd.DataFrame, 'copy', counting_copy)
+    app.run()
+
+    assert not app.exception
+    assert len(copied_rows) <= MAX_DEEP_COPIES_PER_RERUN
+    assert all(rows <= PREVIEW_ROWS for rows in copied_rows)
+
+
+def test_rerun_takes_no_full_frame_rows(app, monkeypatch):
+    taken_rows = []
+    take = pd.DataFrame.take
+
+    def counting_take(self, indices, axis=0, **kwargs):
+        result = take(self, indices, axis=axis, **kwargs)
+        if axis in (0, 'index'):
+            taken_rows.append(len(result))
+        return result
+
+    for cache in (FIGURE_CACHE, HTML_CACHE, SAMPLE_CACHE, DENSITY_CACHE):
+        cache.clear()
+    monkeypatch.setattr(pd.DataFrame, 'take', counting_take)
+    app.run()
+
+    assert not app.exception
+    assert taken_rows, "no row selections were observed"
+    assert max(taken_rows) <= MAX_TAKEN_ROWS < DATASET_ROWS